@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
+
+    def ready(self):
+        # Connects the signals that keep the authentication token cache valid
+        import accounts.signals
+
+        # Registers the check of the token cache backend
+        import accounts.checks
@@ -0,0 +1,211 @@
+from collections import OrderedDict
+from core.functions import is_shared_cache
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from knox.auth import TokenAuthentication
+from knox.models import AuthToken
+from knox.settings import CONSTANTS, knox_settings
+from rest_framework.exceptions import AuthenticationFailed
+from threading import Lock
+from time import monotonic
+from uuid import uuid4
+import hashlib
+
+
+def get_token_cache_settings():
+    """
+    Returns the AUTH_TOKEN_CACHE settings, filled with the defaults
+    """
+    return {
+        "CACHE_ALIAS": "default",
+        "TTL": 60,
+        "MAX_SIZE": 4096,
+        "ALLOW_PER_PROCESS": False,
+        **getattr(settings, "AUTH_TOKEN_CACHE", {}),
+    }
+
+
+def is_token_cache_enabled():
+    """
+    Returns True if validated tokens can be cached, their invalidations reaching every worker
+    """
+    cache_settings = get_token_cache_settings()
+    return cache_settings["ALLOW_PER_PROCESS"] or is_shared_cache(
+        cache_settings["CACHE_ALIAS"]
+    )
+
+
+class TokenCache:
+    """
+    Bounded, thread safe LRU of validated tokens. Entries expire after 'ttl' seconds.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key):
+        """
+        Returns the cached value, or None if missing or expired
+        """
+        ttl = get_token_cache_settings()["TTL"]
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            cached_at, value = entry
+            if monotonic() - cached_at > ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Stores the value, evicting the least recently used entries past MAX_SIZE
+        """
+        max_size = get_token_cache_settings()["MAX_SIZE"]
+        with self._lock:
+            self._entries[key] = (monotonic(), value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > max_size:
+                self._entries.popitem(last=False)
+
+    def pop(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_cache = TokenCache()
+
+
+def get_row(instance):
+    """
+    Returns the (database, field names, values) of a model instance, to rebuild it with get_instance
+    """
+    fields = instance._meta.concrete_fields
+    return (
+        instance._state.db,
+        tuple(field.attname for field in fields),
+        tuple(getattr(instance, field.attname) for field in fields),
+    )
+
+
+def get_instance(model, row):
+    """
+    Returns a new instance of the model from a row of get_row, as if loaded from the database
+    """
+    return model.from_db(*row)
+
+
+def get_shared_cache():
+    """
+    Returns the cache shared by all worker processes
+    """
+    return caches[get_token_cache_settings()["CACHE_ALIAS"]]
+
+
+def token_generation_key(token_key):
+    return f"auth-token-generation:token:{token_key}"
+
+
+def user_generation_key(user_id):
+    return f"auth-token-generation:user:{user_id}"
+
+
+def get_generation(key):
+    """
+    Returns the current generation stored under the key, starting one if missing.
+
+    Values are never reused, so an evicted generation can only cause cache misses.
+    """
+    shared_cache = get_shared_cache()
+    generation = shared_cache.get(key)
+    if generation is None:
+        shared_cache.add(key, uuid4().hex, timeout=None)
+        generation = shared_cache.get(key)
+    return generation
+
+
+def bump_generation(key):
+    """
+    Starts a new generation, invalidating the matching cached tokens in all worker processes
+    """
+    get_shared_cache().set(key, uuid4().hex, timeout=None)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    """
+    Knox token authentication with a short lived in-process cache of validated tokens.
+
+    Each cached token is checked against two generations held in the shared cache:
+    one per token key, bumped when the token is deleted (logout, expiry), and one
+    per user, bumped when the user record changes. Both are read in one cache call.
+
+    Only the field values are cached. Every request gets its own token and user
+    instances, so changes a request makes to them are not seen by the others.
+
+    The generations only reach every worker through a shared cache (memcached, redis).
+    With a per process cache the tokens are not cached, unless ALLOW_PER_PROCESS is set
+    for a single process server, see accounts.checks.
+    """
+
+    def authenticate_credentials(self, token):
+        # Refreshing tokens writes the new expiry on each request, bypass the cache.
+        # Without a shared cache a logout would not reach the other workers
+        if knox_settings.AUTO_REFRESH or not is_token_cache_enabled():
+            return super().authenticate_credentials(token)
+
+        key = hashlib.sha256(token).hexdigest()
+        cached = token_cache.get(key)
+
+        if cached is not None:
+            token_row, user_row, token_generation, user_generation = cached
+            auth_token = get_instance(AuthToken, token_row)
+            auth_token.user = get_instance(get_user_model(), user_row)
+            token_key = token_generation_key(auth_token.token_key)
+            user_key = user_generation_key(auth_token.user_id)
+            generations = get_shared_cache().get_many([token_key, user_key])
+            expired = (auth_token.expiry is not None) and (
+                auth_token.expiry < timezone.now()
+            )
+            if (
+                (not expired)
+                and (generations.get(token_key) == token_generation)
+                and (generations.get(user_key) == user_generation)
+            ):
+                return self.validate_user(auth_token)
+            token_cache.pop(key)
+
+        # The token generation is read before the database, so a logout racing
+        # with this request results in a cache miss instead of a stale hit
+        token_generation = get_generation(
+            token_generation_key(token[: CONSTANTS.TOKEN_KEY_LENGTH].decode())
+        )
+
+        user, auth_token = super().authenticate_credentials(token)
+
+        # The user is only known from the token, so its generation is read after the
+        # token, and the user is loaded again. A change racing with this request is then
+        # either in the cached row, or bumps the generation past the cached one.
+        user_generation = get_generation(user_generation_key(auth_token.user_id))
+        auth_token.user = (
+            get_user_model()._default_manager.filter(pk=auth_token.user_id).first()
+        )
+        if auth_token.user is None:
+            raise AuthenticationFailed(_("User inactive or deleted."))
+        user, auth_token = self.validate_user(auth_token)
+
+        token_cache.set(
+            key,
+            (get_row(auth_token), get_row(user), token_generation, user_generation),
+        )
+
+        return user, auth_token
@@ -0,0 +1,23 @@
+from accounts.authentication import get_token_cache_settings, is_token_cache_enabled
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_token_cache(app_configs, **kwargs):
+    """
+    Warns when validated tokens are not cached, their invalidations not being shared
+    """
+    if is_token_cache_enabled():
+        return []
+    return [
+        Warning(
+            "Authentication tokens are not cached: the "
+            f"'{get_token_cache_settings()['CACHE_ALIAS']}' cache is kept per process.",
+            hint=(
+                "Configure a shared cache backend (memcached, redis) for "
+                "AUTH_TOKEN_CACHE['CACHE_ALIAS'], or set ALLOW_PER_PROCESS "
+                "when running a single process."
+            ),
+            id="accounts.W001",
+        )
+    ]
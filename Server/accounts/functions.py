@@ -0,0 +1,51 @@
+from django.contrib.sessions.models import Session
+from django.db import transaction
+from django.utils import timezone
+from knox.models import AuthToken
+from time import perf_counter
+
+
+def delete_in_batches(queryset, batch_size=1000):
+    """
+    Deletes the rows of the queryset, at most 'batch_size' rows per transaction.
+
+    Keeps each delete short so the table is never locked for long.
+    Returns the number of rows removed.
+    """
+    model = queryset.model
+    removed = 0
+
+    while True:
+        batch_ids = list(queryset.order_by().values_list("pk", flat=True)[:batch_size])
+        if not batch_ids:
+            break
+
+        with transaction.atomic():
+            _, removed_per_model = model._base_manager.filter(pk__in=batch_ids).delete()
+        removed += removed_per_model.get(model._meta.label, 0)
+
+    return removed
+
+
+def sweep_expired_auth(batch_size=1000):
+    """
+    Removes expired knox tokens and expired sessions.
+
+    Schedulable job, run through the 'sweep_expired_auth' management command.
+    Returns the number of rows removed per table and the time taken.
+    """
+    start = perf_counter()
+    now = timezone.now()
+
+    tokens = delete_in_batches(
+        AuthToken.objects.filter(expiry__lt=now), batch_size=batch_size
+    )
+    sessions = delete_in_batches(
+        Session.objects.filter(expire_date__lt=now), batch_size=batch_size
+    )
+
+    return {
+        "tokens": tokens,
+        "sessions": sessions,
+        "seconds": perf_counter() - start,
+    }
@@ -0,0 +1,29 @@
+from accounts.functions import sweep_expired_auth
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Deletes expired knox tokens and sessions in bounded batches.
+
+    Meant to be scheduled, e.g. hourly from cron: 'python manage.py sweep_expired_auth'
+    """
+
+    help = "Deletes expired authentication tokens and sessions in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=1000,
+            help="Maximum number of rows deleted per transaction",
+        )
+
+    def handle(self, *args, **options):
+        result = sweep_expired_auth(batch_size=options["batch_size"])
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Removed {result['tokens']} expired tokens and "
+                f"{result['sessions']} expired sessions in {result['seconds']:.2f}s"
+            )
+        )
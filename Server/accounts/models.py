@@ -1,9 +1,9 @@
 from datetime import timedelta
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models.functions import Lower
 from django.utils import timezone
 
-
 # Create your models here.
 
 
@@ -17,6 +17,9 @@ class User(AbstractUser):
             "last_name",
             "first_name",
         )
+        indexes = [
+            models.Index(Lower("email"), name="accounts_user_email_lower_idx"),
+        ]
 
     def __str__(self):
         if (not self.first_name) and (not self.last_name):
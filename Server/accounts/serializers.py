@@ -1,4 +1,6 @@
 from accounts.models import User
+from core.serializers import FastRepresentationMixin
+from django.db.models.functions import Lower
 from rest_framework import serializers
 
 
@@ -9,10 +11,24 @@ class RegistraterUserSerializer(serializers.ModelSerializer):
 
     password = serializers.CharField(write_only=True)
 
+    def validate_email(self, value):
+        """
+        Emails are optional, but can only belong to one user, whatever the case
+        """
+        if (
+            value
+            and User.objects.alias(email_lower=Lower("email"))
+            .filter(email_lower=value.lower())
+            .exists()
+        ):
+            raise serializers.ValidationError("A user with that email already exists.")
+        return value
+
     def create(self, validated_data):
 
         user = User.objects.create_user(
             username=validated_data["username"],
+            email=validated_data.get("email", ""),
             password=validated_data["password"],
         )
         return user
@@ -22,12 +38,13 @@ class RegistraterUserSerializer(serializers.ModelSerializer):
         fields = (
             "id",
             "username",
+            "email",
             "password",
         )
         extra_kwargs = {"password": {"write_only": True}}
 
 
-class UserReturnStringSerializer(serializers.ModelSerializer):
+class UserReturnStringSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     """
     Returns the string of the object
     """
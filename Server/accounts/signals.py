@@ -0,0 +1,25 @@
+from accounts.authentication import (
+    bump_generation,
+    token_generation_key,
+    user_generation_key,
+)
+from accounts.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from knox.models import AuthToken
+
+
+@receiver(post_delete, sender=AuthToken)
+def invalidate_cached_token(sender, instance, **kwargs):
+    """
+    Drops a deleted token (logout, logout all, expiry) from the token cache of every worker
+    """
+    bump_generation(token_generation_key(instance.token_key))
+
+
+@receiver(post_save, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    """
+    Cached tokens hold a copy of the user, so any change to the user invalidates them
+    """
+    bump_generation(user_generation_key(instance.pk))
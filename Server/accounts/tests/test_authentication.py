@@ -0,0 +1,216 @@
+from accounts.authentication import (
+    CachedTokenAuthentication,
+    bump_generation,
+    get_generation,
+    token_cache,
+    user_generation_key,
+)
+from accounts.checks import check_token_cache
+from accounts.models import User
+from accounts.tests.test_views import CreateCustomerViews
+from datetime import timedelta
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from knox.models import AuthToken
+from rest_framework.exceptions import AuthenticationFailed
+from unittest import mock
+
+
+class CachedTokenAuthenticationTestCase(TestCase):
+    """
+    Tests the in-process cache of validated knox tokens
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        token_cache.clear()
+        cache.clear()
+
+    def lookup_roles(self, c):
+        """
+        Sends a request to an endpoint that does no database work of its own
+        """
+        return c.client.post(
+            path="/roles/lookup",
+            data=dict(),
+            content_type="application/json",
+        )
+
+    def test_cached_token_skips_the_database(self):
+        """
+        Only the first request with a token queries the database
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        res = self.lookup_roles(c)
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+
+        with self.assertNumQueries(0):
+            res = self.lookup_roles(c)
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+
+    def test_cached_token_returns_new_instances(self):
+        """
+        Each request gets its own token and user, changes to them are not shared
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        authentication = CachedTokenAuthentication()
+        authentication.authenticate_credentials(c.token.encode())
+        with self.assertNumQueries(0):
+            user, auth_token = authentication.authenticate_credentials(c.token.encode())
+            other_user, other_auth_token = authentication.authenticate_credentials(
+                c.token.encode()
+            )
+
+        self.assertIsNot(user, other_user, "Cached user instance is shared")
+        self.assertIsNot(auth_token, other_auth_token, "Cached token is shared")
+        self.assertIs(auth_token.user, user, "Token user is not the returned user")
+
+        user.first_name = "Changed"
+        self.assertNotEqual(other_user.first_name, "Changed")
+        self.assertEqual(user.pk, other_user.pk)
+        self.assertFalse(user._state.adding, "Rebuilt user is not marked as saved")
+
+    def test_logout_invalidates_cached_token(self):
+        """
+        A logged out token is rejected even when it was cached
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        self.lookup_roles(c)
+        c.logout()
+        self.assertEqual(c.logout_response.status_code, 204, "Logout failed")
+
+        res = self.lookup_roles(c)
+        self.assertEqual(res.status_code, 401, f"Expected 401. Got {res.status_code}")
+
+    def test_logout_all_invalidates_cached_tokens(self):
+        """
+        Logging out of all sessions rejects every cached token of the user
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+        first_client = c.client
+        c.login()
+
+        self.assertEqual(self.lookup_roles(c).status_code, 200, "Request failed")
+        c.client, second_client = first_client, c.client
+        self.assertEqual(self.lookup_roles(c).status_code, 200, "Request failed")
+
+        c.logout_all()
+        self.assertEqual(c.logout_all_response.status_code, 204, "Logout failed")
+
+        self.assertEqual(self.lookup_roles(c).status_code, 401, "Token still valid")
+        c.client = second_client
+        self.assertEqual(self.lookup_roles(c).status_code, 401, "Token still valid")
+
+    def test_deactivated_user_is_rejected(self):
+        """
+        Changes to the user invalidate the cached tokens
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        self.lookup_roles(c)
+        c.user.is_active = False
+        c.user.save()
+
+        res = self.lookup_roles(c)
+        self.assertEqual(res.status_code, 401, f"Expected 401. Got {res.status_code}")
+
+    def test_expired_cached_token_is_rejected(self):
+        """
+        Tokens expiring while cached are rejected and removed
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        self.lookup_roles(c)
+
+        expired = timezone.now() + timedelta(days=1)
+        with mock.patch("django.utils.timezone.now", mock.Mock(return_value=expired)):
+            res = self.lookup_roles(c)
+
+        self.assertEqual(res.status_code, 401, f"Expected 401. Got {res.status_code}")
+        self.assertFalse(
+            AuthToken.objects.filter(user=c.user).exists(),
+            "Expired token was not removed",
+        )
+
+    def test_user_change_racing_with_a_miss_is_not_cached(self):
+        """
+        A user deactivated after the token is read, before it is cached, is not kept
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        def deactivate_then_get_generation(key):
+            # Runs between the token query and the caching of the user
+            if key == user_generation_key(c.user.pk):
+                User.objects.filter(pk=c.user.pk).update(is_active=False)
+                bump_generation(key)
+            return get_generation(key)
+
+        with mock.patch(
+            "accounts.authentication.get_generation",
+            side_effect=deactivate_then_get_generation,
+        ):
+            with self.assertRaises(AuthenticationFailed):
+                CachedTokenAuthentication().authenticate_credentials(c.token.encode())
+
+        res = self.lookup_roles(c)
+        self.assertEqual(res.status_code, 401, f"Expected 401. Got {res.status_code}")
+
+    @override_settings(AUTH_TOKEN_CACHE={"ALLOW_PER_PROCESS": False})
+    def test_per_process_cache_is_refused(self):
+        """
+        Without a shared cache every request validates the token in the database
+        """
+        self.assertEqual(
+            [error.id for error in check_token_cache(None)],
+            ["accounts.W001"],
+            "Per process cache not reported",
+        )
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        self.lookup_roles(c)
+        with self.assertNumQueries(3):
+            res = self.lookup_roles(c)
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+
+    @override_settings(AUTH_TOKEN_CACHE={"TTL": 0, "ALLOW_PER_PROCESS": True})
+    def test_entries_expire_after_ttl(self):
+        """
+        Entries older than the TTL are validated against the database again
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        self.lookup_roles(c)
+
+        # The token, the user, the user again after its generation, and the roles
+        with self.assertNumQueries(4):
+            res = self.lookup_roles(c)
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
@@ -0,0 +1,86 @@
+from accounts.functions import delete_in_batches, sweep_expired_auth
+from accounts.tests.test_models import CreateUser
+from datetime import timedelta
+from django.contrib.sessions.backends.db import SessionStore
+from django.contrib.sessions.models import Session
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from io import StringIO
+from knox.models import AuthToken
+
+
+class SweepExpiredAuthTestCase(TestCase):
+    """
+    Tests the removal of expired tokens and sessions
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.u = CreateUser()
+        self.u.create_user()
+
+    def create_session(self, expired=False):
+        session = SessionStore()
+        session.create()
+        if expired:
+            Session.objects.filter(session_key=session.session_key).update(
+                expire_date=timezone.now() - timedelta(days=1)
+            )
+
+    def test_only_expired_rows_are_removed(self):
+        """
+        Valid tokens, tokens without expiry and valid sessions are kept
+        """
+        for _ in range(5):
+            AuthToken.objects.create(self.u.user, expiry=timedelta(seconds=-1))
+        AuthToken.objects.create(self.u.user, expiry=timedelta(hours=1))
+        AuthToken.objects.create(self.u.user, expiry=None)
+        for _ in range(3):
+            self.create_session(expired=True)
+        self.create_session()
+
+        result = sweep_expired_auth(batch_size=2)
+
+        self.assertEqual(result["tokens"], 5, "Wrong number of tokens removed")
+        self.assertEqual(result["sessions"], 3, "Wrong number of sessions removed")
+        self.assertGreaterEqual(result["seconds"], 0, "Missing duration")
+        self.assertEqual(AuthToken.objects.count(), 2, "Valid tokens were removed")
+        self.assertEqual(Session.objects.count(), 1, "Valid session was removed")
+
+    def test_batches_are_bounded(self):
+        """
+        Each delete statement removes at most batch_size rows
+        """
+        for _ in range(5):
+            AuthToken.objects.create(self.u.user, expiry=timedelta(seconds=-1))
+
+        with CaptureQueriesContext(connection) as queries:
+            removed = delete_in_batches(
+                AuthToken.objects.filter(expiry__lt=timezone.now()), batch_size=2
+            )
+
+        deletes = [q for q in queries if q["sql"].startswith("DELETE")]
+        self.assertEqual(len(deletes), 3, "Expected 3 batched deletes")
+        self.assertEqual(removed, 5, "Wrong number of tokens removed")
+
+    def test_management_command_reports_removed_rows(self):
+        """
+        The command prints the number of rows removed
+        """
+        AuthToken.objects.create(self.u.user, expiry=timedelta(seconds=-1))
+        self.create_session(expired=True)
+
+        out = StringIO()
+        call_command("sweep_expired_auth", batch_size=10, stdout=out)
+
+        self.assertIn("Removed 1 expired tokens and 1 expired sessions", out.getvalue())
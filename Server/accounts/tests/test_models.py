@@ -1,5 +1,6 @@
 from django.test import TestCase
 from accounts.models import User
+from django.db import models
 from notes.tests.generic_functions import (
     random_bell_curve_int,
     random_string,
@@ -83,6 +84,13 @@ class UserModelsTestCase(TestCase):
     def setUp(self):
         pass
 
+    def test_email_fields_have_no_global_lower_lookup(self):
+        """
+        Importing the models does not add a 'lower' lookup to every EmailField
+        """
+        self.assertNotIn("lower", models.EmailField.get_lookups())
+        self.assertNotIn("lower", User._meta.get_field("email").get_lookups())
+
     def test_user_return_string_only_username(self):
         """
         Create a user with only the username. User model should only return the username.
@@ -1,5 +1,13 @@
+from accounts.models import User
 from accounts.tests.test_models import CreateUser
+from companies.models import CompanyInviteList
+from companies.tests.test_models import create_company_invite, create_company_obj
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.core import mail
 from django.test import Client, TestCase
+from unittest import mock
+import pytz
 import string
 
 
@@ -16,13 +24,19 @@ class CreateCustomerViews(CreateUser):
         # if not self.token:
         #     self.client=AsyncClient()
 
-    def registration(self):
+    def registration(self, invite_token=None):
         """
         Registers a new uesr
         """
+        data = dict(username=self.username, password=self.password)
+        if self.email:
+            data["email"] = self.email
+        if invite_token:
+            data["invite_token"] = invite_token
+
         self.registration_response = self.client.post(
             path="/accounts/registration",
-            data=dict(username=self.username, password=self.password),
+            data=data,
             content_type="application/json",
         )
 
@@ -33,15 +47,19 @@ class CreateCustomerViews(CreateUser):
             # Update the self.client with the token header
             self.client = Client(HTTP_AUTHORIZATION=f"Token {self.token}")
 
-    def login(self):
+    def login(self, invite_token=None):
         """
         Log in the user
         """
         self.check_user_exists()
 
+        data = dict(username=self.username, password=self.password)
+        if invite_token:
+            data["invite_token"] = invite_token
+
         self.login_response = self.client.post(
             path="/accounts/login",
-            data=dict(username=self.username, password=self.password),
+            data=data,
             content_type="application/json",
         )
 
@@ -418,3 +436,190 @@ class UserViewsTestCase(TestCase):
     #         "^20\d{2}-[0-1]\d-[0-3]\dT[0-2]\d:[0-5]\d:\d{2}.\d{6}Z$",
     #         "Django knox invalid date format",
     #     )
+
+
+class InviteRedemptionViewsTestCase(TestCase):
+    """
+    Tests that pending company invites are redeemed at registration and login
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self) -> None:
+        return super().setUp()
+
+    def test_registration_redeems_the_invite_of_its_token(self):
+        """
+        Only the active invite of the token grants its role and is removed
+        """
+        admin_company = create_company_obj()
+        viewer_company = create_company_obj()
+        expired_company = create_company_obj()
+
+        invite_obj = create_company_invite(
+            company_obj=admin_company,
+            email="new_user@email.com",
+            admin_in=True,
+            viewer_in=False,
+        )
+        create_company_invite(company_obj=viewer_company, email="new_user@email.com")
+        mocked = datetime.now(tz=pytz.utc) - timedelta(days=8)
+        with mock.patch("django.utils.timezone.now", mock.Mock(return_value=mocked)):
+            expired_obj = create_company_invite(
+                company_obj=expired_company, email="new_user@email.com"
+            )
+
+        c = CreateCustomerViews(
+            username="New_User", email="New_User@Email.com", password="New_Password!"
+        )
+        c.registration(invite_token=invite_obj.token)
+
+        self.assertEqual(
+            c.registration_response.status_code, 200, "Registration failed"
+        )
+        user = User.objects.get(username="New_User")
+        self.assertTrue(
+            admin_company.allowed_admins.filter(pk=user.pk).exists(),
+            "Admin invite not redeemed",
+        )
+        self.assertFalse(
+            viewer_company.allowed_viewers.filter(pk=user.pk).exists(),
+            "Invite of another token was redeemed",
+        )
+        self.assertEqual(
+            set(CompanyInviteList.objects.values_list("viewer_in", flat=True)),
+            {viewer_company.pk, expired_company.pk},
+            "Only the redeemed invite should be removed",
+        )
+
+        # An expired invite can not be redeemed, even with its token
+        c.user = user
+        c.login(invite_token=expired_obj.token)
+        self.assertEqual(c.login_response.status_code, 200, "Login failed")
+        self.assertFalse(
+            expired_company.allowed_viewers.filter(pk=user.pk).exists(),
+            "Expired invite was redeemed",
+        )
+
+    def test_emailed_invite_links_redeem_their_invites(self):
+        """
+        The tokens of the invite emails, single and bulk, redeem their own invite each
+        """
+        admin = CreateCustomerViews()
+        admin.create_user()
+        admin.login()
+        admin_company = create_company_obj(random_info=False)
+        viewer_company = create_company_obj(random_info=False)
+        admin_company.allowed_admins.add(admin.user)
+        viewer_company.allowed_admins.add(admin.user)
+
+        res = admin.client.post(
+            path=f"/companies/invite/{admin_company.id}",
+            data=dict(email="Invited@Email.com", admin_in=True, viewer_in=False),
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 201, f"Expected 201. Got {res.status_code}")
+        res = admin.client.post(
+            path=f"/companies/invite/{viewer_company.id}/bulk",
+            data=dict(
+                invites=[
+                    dict(email="invited@email.com", admin_in=False, viewer_in=True)
+                ]
+            ),
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 201, f"Expected 201. Got {res.status_code}")
+
+        self.assertEqual(len(mail.outbox), 2, "Expected one email per invite")
+        link_prefix = settings.COMPANY_INVITE_URL.split("{token}")[0]
+        tokens = []
+        for message in mail.outbox:
+            self.assertEqual(message.to, ["invited@email.com"], "Mail sent elsewhere")
+            self.assertIn(link_prefix, message.body, "Invite link missing")
+            tokens.append(message.body.split(link_prefix)[1].split()[0])
+
+        c = CreateCustomerViews(
+            username="Invited", email="invited@email.com", password="New_Password!"
+        )
+        c.registration(invite_token=tokens[0])
+        self.assertEqual(
+            c.registration_response.status_code, 200, "Registration failed"
+        )
+        c.user = User.objects.get(username="Invited")
+        self.assertTrue(
+            admin_company.allowed_admins.filter(pk=c.user.pk).exists(),
+            "Emailed admin invite not redeemed",
+        )
+        self.assertFalse(
+            viewer_company.allowed_viewers.filter(pk=c.user.pk).exists(),
+            "Invite of another link redeemed",
+        )
+
+        c.login(invite_token=tokens[1])
+        self.assertEqual(c.login_response.status_code, 200, "Login failed")
+        self.assertTrue(
+            viewer_company.allowed_viewers.filter(pk=c.user.pk).exists(),
+            "Emailed bulk invite not redeemed",
+        )
+        self.assertFalse(CompanyInviteList.objects.exists(), "Invites were not removed")
+
+    def test_unverified_email_redeems_no_invites(self):
+        """
+        Registering or logging in with an invited email, without the invite token, grants nothing
+        """
+        company_obj = create_company_obj()
+        create_company_invite(
+            company_obj=company_obj,
+            email="invited@email.com",
+            admin_in=True,
+            viewer_in=False,
+        )
+        other_invite_obj = create_company_invite(email="other@email.com")
+
+        c = CreateCustomerViews(
+            username="Invited", email="Invited@Email.com", password="New_Password!"
+        )
+        c.registration()
+        self.assertEqual(
+            c.registration_response.status_code, 200, "Registration failed"
+        )
+        c.user = User.objects.get(username="Invited")
+        c.login(invite_token="not-a-tokén")
+        self.assertEqual(c.login_response.status_code, 200, "Login failed")
+        # The token of an invite sent to another address does not verify this one
+        c.login(invite_token=other_invite_obj.token)
+        self.assertEqual(c.login_response.status_code, 200, "Login failed")
+
+        self.assertFalse(
+            company_obj.allowed_admins.filter(pk=c.user.pk).exists(),
+            "Invite redeemed without a verified email",
+        )
+        self.assertEqual(
+            CompanyInviteList.objects.count(), 2, "Unredeemed invites were removed"
+        )
+
+    def test_registration_rejects_taken_email(self):
+        """
+        An email already used by an account, in any case, can not be registered again
+        """
+        c = CreateCustomerViews(
+            username="Taken", email="taken@email.com", password="Password123!"
+        )
+        c.create_user()
+
+        other = CreateCustomerViews(
+            username="Other", email="Taken@Email.com", password="Password123!"
+        )
+        other.registration()
+        self.assertEqual(
+            other.registration_response.status_code,
+            400,
+            f"Expected 400. Got {other.registration_response.status_code}",
+        )
+        self.assertIn("email", other.registration_response.data["registration-errors"])
@@ -1,5 +1,6 @@
 from accounts.models import User
 from accounts.serializers import RegistraterUserSerializer
+from companies.functions import redeem_company_invites
 from datetime import datetime
 from django.contrib.auth import login
 from knox.models import AuthToken
@@ -21,6 +22,8 @@ class LoginView(KnoxLoginView):
         serializer = AuthTokenSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         user = serializer.validated_data["user"]
+        # Grant the roles of the pending company invites, when the invite link's token is sent
+        redeem_company_invites(user=user, invite_token=request.data.get("invite_token"))
         login(request, user)
         return super(LoginView, self).post(request, format=None)
 
@@ -41,6 +44,8 @@ class RegisterUserView(CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
         user = serializer.save()
+        # Grant the roles of the pending company invites, when the invite link's token is sent
+        redeem_company_invites(user=user, invite_token=request.data.get("invite_token"))
         token = AuthToken.objects.create(user)
         return Response(
             {
@@ -0,0 +1,188 @@
+from buildings.models import Buildings
+from buildings.serializers import BuildingCreationSerializer
+from contacts.functions import get_or_create_addresses, populate_address_dict
+from core.functions import bulk_create_with_pks
+from django.db import DatabaseError, transaction
+from general_ledger.functions import get_chart_template, provision_charts_of_accounts
+from general_ledger.models import ChartOfAccountsTemplate, ChartOfAccountsTemplateCode
+from notes.models import Notes
+from summaries.functions import increment_counter
+from summaries.models import BuildingSummaries, CompanySummaries
+import csv
+
+
+def create_buildings(company_id=None, buildings=None, user=None, chart_template=None):
+    """
+    Saves many buildings of one company, together with their address, chart of accounts and notes.
+
+    The buildings get the general ledgers of the chart of accounts template, the default
+    building chart if none is given.
+
+    Each item of 'buildings' is the validated data of a BuildingCreationSerializer,
+    still holding the nested 'address' dict and 'notes' list.
+
+    Every model is written with one batched insert, so the number of statements
+    does not grow with the number of buildings or notes.
+    Returns the created building objects, in the order given.
+    """
+    buildings = [dict(building) for building in buildings]
+
+    with transaction.atomic():
+
+        # Identical addresses reuse one stored row, blank addresses are saved as None
+        address_objs = get_or_create_addresses(
+            dict(building["address"]) for building in buildings
+        )
+
+        # Provision the chart of accounts of every building with one insert
+        if chart_template is None:
+            chart_template = get_chart_template(
+                entity_type=ChartOfAccountsTemplate.EntityList.BUILDING
+            )
+        charts = provision_charts_of_accounts(
+            template=chart_template,
+            names=[building["name"] for building in buildings],
+        )
+
+        # Save the buildings with all the addresses and newly created gl_codes
+        building_objs = []
+        building_notes = []
+        for building, address_obj, chart in zip(buildings, address_objs, charts):
+            building.pop("address")
+            building_notes.append(building.pop("notes", []))
+            building_objs.append(
+                Buildings(
+                    **building,
+                    company_id=company_id,
+                    address=address_obj,
+                    gl_code=chart[ChartOfAccountsTemplateCode.AccountRoleList.GENERAL],
+                )
+            )
+        bulk_create_with_pks(Buildings, building_objs)
+
+        # Create all notes, assigning the user to each note
+        note_objs = bulk_create_with_pks(
+            Notes,
+            [Notes(**note, user=user) for notes in building_notes for note in notes],
+        )
+
+        # Link the accounts and notes to their buildings. The buildings are new, so no links exist yet
+        Buildings.chart_of_accounts.through.objects.bulk_create(
+            [
+                Buildings.chart_of_accounts.through(
+                    buildings_id=building_obj.pk, generalledgercodes_id=gl_code_obj.pk
+                )
+                for building_obj, chart in zip(building_objs, charts)
+                for gl_code_obj in chart["accounts"]
+            ]
+        )
+        note_iter = iter(note_objs)
+        Buildings.notes.through.objects.bulk_create(
+            [
+                Buildings.notes.through(
+                    buildings_id=building_obj.pk, notes_id=next(note_iter).pk
+                )
+                for building_obj, notes in zip(building_objs, building_notes)
+                for _ in notes
+            ]
+        )
+
+        # Bulk inserts skip the summary signals, so the counters are written explicitly
+        BuildingSummaries.objects.bulk_create(
+            [
+                BuildingSummaries(building_id=building_obj.pk, note_count=len(notes))
+                for building_obj, notes in zip(building_objs, building_notes)
+            ]
+        )
+        increment_counter(
+            CompanySummaries, [company_id], "building_count", len(building_objs)
+        )
+
+    return building_objs
+
+
+# Address columns of the building import files
+ADDRESS_COLUMNS = ("address_1", "address_2", "city", "state", "zipcode")
+
+
+def populate_building_row_dict(row):
+    """
+    Takes in a CSV row dict and returns a building dict in the creation request format.
+
+    Columns: name, build_year, address_1, address_2, city, state, zipcode and note.
+    Blank values are treated as missing, unknown columns are ignored.
+    """
+    # Missing trailing cells are read as None
+    row = {column: (value or "").strip() for column, value in row.items() if column}
+
+    return dict(
+        name=row.get("name", ""),
+        build_year=row.get("build_year") or None,
+        address=populate_address_dict(
+            {column: row[column] for column in ADDRESS_COLUMNS if column in row}
+        ),
+        notes=[dict(note=row["note"])] if row.get("note") else [],
+    )
+
+
+def import_buildings(rows=None, company_id=None, user=None, chunk_size=500):
+    """
+    Creates buildings of one company from the rows of a CSV file.
+
+    Rows are read incrementally and validated one by one. Valid rows are written in
+    chunks with 'create_buildings', so memory use does not grow with the file size.
+    Rows are numbered as in a spreadsheet, the header being row 1.
+
+    Returns the number of created buildings and the result of each row.
+    """
+    report = {"created": 0, "rows": []}
+    chunk = []
+
+    def write_chunk():
+        try:
+            building_objs = create_buildings(
+                company_id=company_id,
+                buildings=[building for _, building in chunk],
+                user=user,
+            )
+        except DatabaseError as e:
+            report["rows"].extend(
+                {"row": row_number, "errors": {"database": str(e)}}
+                for row_number, _ in chunk
+            )
+        else:
+            report["created"] += len(building_objs)
+            report["rows"].extend(
+                {"row": row_number, "id": building_obj.pk}
+                for (row_number, _), building_obj in zip(chunk, building_objs)
+            )
+        chunk.clear()
+
+    rows = iter(rows)
+    row_number = 1
+    while True:
+        row_number += 1
+        try:
+            row = next(rows)
+        except StopIteration:
+            break
+        # The rest of the file can not be read, report it on the current row
+        except (csv.Error, UnicodeDecodeError) as e:
+            report["rows"].append(
+                {"row": row_number, "errors": {"invalid-file": str(e)}}
+            )
+            break
+
+        serializer = BuildingCreationSerializer(data=populate_building_row_dict(row))
+        if not serializer.is_valid():
+            report["rows"].append({"row": row_number, "errors": serializer.errors})
+            continue
+
+        chunk.append((row_number, serializer.validated_data))
+        if len(chunk) >= chunk_size:
+            write_chunk()
+
+    if chunk:
+        write_chunk()
+
+    return report
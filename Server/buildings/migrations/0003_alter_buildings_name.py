@@ -0,0 +1,18 @@
+# Generated by Django 3.2.8 on 2026-10-18 19:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0002_auto_20220109_1141'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='buildings',
+            name='name',
+            field=models.CharField(max_length=255),
+        ),
+    ]
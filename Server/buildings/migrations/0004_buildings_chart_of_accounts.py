@@ -0,0 +1,19 @@
+# Generated by Django 3.2.8 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('general_ledger', '0004_chart_of_accounts_templates'),
+        ('buildings', '0003_alter_buildings_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='buildings',
+            name='chart_of_accounts',
+            field=models.ManyToManyField(blank=True, related_name='building_chart_of_accounts_set', to='general_ledger.GeneralLedgerCodes'),
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0004_buildings_chart_of_accounts'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='buildings',
+            options={'ordering': ('company_id', 'name', 'id'), 'verbose_name': 'Building', 'verbose_name_plural': 'Buildings'},
+        ),
+        migrations.AddIndex(
+            model_name='buildings',
+            index=models.Index(fields=['company', 'name', 'id'], name='buildings_company_name_id_idx'),
+        ),
+    ]
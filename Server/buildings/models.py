@@ -32,6 +32,9 @@ class Buildings(PackageExtensionsMixin, TimeStampMixin):
     build_year = models.DateField(
         auto_now=False, auto_now_add=False, blank=True, null=True
     )
+    chart_of_accounts = models.ManyToManyField(
+        GeneralLedgerCodes, related_name="building_chart_of_accounts_set", blank=True
+    )
     allowed_admins = models.ManyToManyField(
         User, related_name="building_user_set", blank=True
     )
@@ -49,10 +52,18 @@ class Buildings(PackageExtensionsMixin, TimeStampMixin):
     class Meta:
         verbose_name = "Building"
         verbose_name_plural = "Buildings"
+        # Ordered on the company ID, ordering on the company would join and sort by its name
         ordering = (
-            "company",
+            "company_id",
             "name",
+            "id",
         )
+        indexes = [
+            models.Index(
+                fields=("company", "name", "id"),
+                name="buildings_company_name_id_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.company.company_name} | {self.name}"
@@ -101,3 +101,21 @@ class BuildingResponseSerializer(serializers.ModelSerializer):
             "images",
             "notes",
         )
+
+
+class BuildingListSerializer(serializers.ModelSerializer):
+    """
+    Returns the summary of a building for listings
+    """
+
+    address = AddressSerializer()
+
+    class Meta:
+        model = Buildings
+        fields = (
+            "id",
+            "company",
+            "name",
+            "address",
+            "build_year",
+        )
@@ -0,0 +1,101 @@
+from accounts.tests.test_models import CreateUser
+from buildings.functions import create_buildings, import_buildings
+from buildings.tests.test_views import building_no_company_data
+from companies.tests.test_models import create_company_obj
+from contacts.functions import collapse_spaces
+from contacts.tests.test_views import get_address_data
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from general_ledger.tests.test_functions import count_bulk_writes
+
+
+class CreateBuildingsTestCase(TestCase):
+    """
+    Tests the batched writer of buildings with their addresses, general ledgers and notes
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.u = CreateUser()
+        self.u.create_user()
+
+    def test_create_many_buildings_links_their_own_children(self):
+        """
+        Addresses, general ledgers and notes end up on the building they were sent with
+        """
+        company = create_company_obj()
+
+        buildings = [
+            building_no_company_data(num_notes=num_notes) for num_notes in (2, 0, 3)
+        ]
+        # The middle building has no address information
+        buildings[1]["address"] = {
+            field: "" for field in get_address_data(random_address=False)
+        }
+
+        building_objs = create_buildings(
+            company_id=company.pk, buildings=buildings, user=self.u.user
+        )
+
+        self.assertEqual(len(building_objs), 3, "Expected 3 buildings")
+        for building, building_obj in zip(buildings, building_objs):
+            building_obj.refresh_from_db()
+            self.assertEqual(building_obj.company, company, "Wrong company")
+            self.assertEqual(building_obj.name, building["name"], "Wrong name")
+            self.assertEqual(
+                building_obj.gl_code.name, building["name"], "Wrong general ledger"
+            )
+            self.assertEqual(
+                sorted(building_obj.notes.values_list("note", flat=True)),
+                sorted(note["note"] for note in building["notes"]),
+                "Notes linked to the wrong building",
+            )
+            self.assertTrue(
+                building_obj.notes.filter(user=self.u.user).count()
+                == len(building["notes"]),
+                "Notes not assigned to the user",
+            )
+
+        self.assertEqual(
+            building_objs[0].address.address_1,
+            collapse_spaces(buildings[0]["address"]["address_1"]),
+            "Wrong address",
+        )
+        self.assertIsNone(building_objs[1].address, "Blank address was saved")
+        self.assertEqual(
+            building_objs[2].address.address_1,
+            collapse_spaces(buildings[2]["address"]["address_1"]),
+            "Wrong address",
+        )
+
+    def test_import_write_count_grows_with_chunks_only(self):
+        """
+        Imported rows are written per chunk, not per row
+        """
+        company = create_company_obj()
+
+        # The larger import splits the chart of accounts insert into several SQLite batches
+        query_counts = []
+        for num_rows in (10, 40):
+            rows = [
+                dict(name=f"Building {i}", address_1=f"{i} Main St.", note="Note")
+                for i in range(num_rows)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                report = import_buildings(
+                    rows=rows, company_id=company.pk, user=self.u.user, chunk_size=50
+                )
+            self.assertEqual(report["created"], num_rows, "Import failed")
+            query_counts.append(count_bulk_writes(queries))
+
+        self.assertEqual(
+            query_counts[0], query_counts[1], "Write count grew with the rows"
+        )
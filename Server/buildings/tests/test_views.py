@@ -1,11 +1,18 @@
 from accounts.tests.test_views import CreateCustomerViews
+from base64 import urlsafe_b64encode
+from buildings.functions import create_buildings
 from buildings.models import Buildings
 from buildings.tests.test_models import create_building_obj
 from change_log.models import ChangeLog
+from companies.models import Companies
 from companies.tests.test_models import create_company_obj
 from contacts.tests.test_views import get_address_data
+from core.pagination import get_keyset_filter
 from datetime import datetime
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
 from notes.tests.generic_functions import (
     random_bell_curve_int,
     random_sentence,
@@ -224,6 +231,68 @@ class BuildingsWithNoCompanyViewsTestCase(TestCase):
             "Did not find expected key",
         )
 
+    def test_container_company_is_reused(self):
+        """
+        Buildings created without a company share the user's container company
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        building_ids = []
+        for _ in range(3):
+            res = c.client.post(
+                path="/buildings/no-company/new-building",
+                data=dict(name="Test"),
+                content_type="application/json",
+            )
+            self.assertEqual(
+                res.status_code, 201, f"Expected 201. Got {res.status_code}"
+            )
+            building_ids.append(res.data["id"])
+
+        self.assertEqual(
+            Companies.objects.filter(default_for=c.user).count(),
+            1,
+            "Expected a single container company",
+        )
+        self.assertEqual(
+            Buildings.objects.filter(
+                id__in=building_ids, company__default_for=c.user
+            ).count(),
+            3,
+            "Buildings not added to the container company",
+        )
+
+    def test_container_company_replaced_when_admin_role_removed(self):
+        """
+        A container the user no longer administers is not reused
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        res = c.client.post(
+            path="/buildings/no-company/new-building",
+            data=dict(name="Test"),
+            content_type="application/json",
+        )
+        old_company = Buildings.objects.get(id=res.data["id"]).company
+        old_company.allowed_admins.remove(c.user)
+
+        res = c.client.post(
+            path="/buildings/no-company/new-building",
+            data=dict(name="Test"),
+            content_type="application/json",
+        )
+        self.assertEqual(res.status_code, 201, f"Expected 201. Got {res.status_code}")
+        new_company = Buildings.objects.get(id=res.data["id"]).company
+
+        self.assertNotEqual(new_company.id, old_company.id, "Old container reused")
+        self.assertEqual(new_company.default_for, c.user, "New container not set")
+        old_company.refresh_from_db()
+        self.assertIsNone(old_company.default_for, "Old container not released")
+
 
 class BuildingsWithExistingCompanyViewsTestCase(TestCase):
     """
@@ -281,6 +350,84 @@ class BuildingsWithExistingCompanyViewsTestCase(TestCase):
             str(building.gl_code), "Test", "Did not get the expected GL Code name"
         )
 
+    def test_building_creation_query_count_does_not_grow_with_notes(self):
+        """
+        The building graph is written in batches and loaded back with a constant
+        number of queries, more notes do not mean more statements
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        company = create_company_obj()
+        company.allowed_admins.add(c.user)
+
+        query_counts = []
+        for num_notes in (1, 1, 25):
+            with CaptureQueriesContext(connection) as queries:
+                res = c.client.post(
+                    path=f"/buildings/{company.id}/new-building",
+                    data=building_no_company_data(num_notes=num_notes),
+                    content_type="application/json",
+                )
+            self.assertEqual(
+                res.status_code, 201, f"Expected 201. Got {res.status_code}"
+            )
+            self.assertEqual(
+                len(res.data["notes"]), num_notes, "Notes were not all linked"
+            )
+            query_counts.append(len(queries))
+
+        # The first request also authenticates the token, compare the later ones
+        self.assertEqual(
+            query_counts[1], query_counts[2], "Query count grew with the notes"
+        )
+
+    def test_building_creation_with_sparse_fieldset(self):
+        """
+        '?fields=' and '?expand=' prune the response, invalid fieldsets create nothing
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        company = create_company_obj(random_info=False)
+        company.allowed_admins.add(c.user)
+
+        res = c.client.post(
+            path=f"/buildings/{company.id}/new-building?fields=id,name,notes&expand=",
+            data=building_no_company_data(random_info=False),
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, 201, f"Expected 201. Got {res.status_code}")
+        self.assertEqual(
+            list(res.data), ["id", "name", "notes"], "Response was not pruned"
+        )
+        self.assertEqual(
+            sorted(res.data["notes"]),
+            sorted(
+                Buildings.objects.get(id=res.data["id"]).notes.values_list(
+                    "id", flat=True
+                )
+            ),
+            "Notes were not collapsed to their IDs",
+        )
+
+        res = c.client.post(
+            path=f"/buildings/{company.id}/new-building?fields=name,unknown",
+            data=building_no_company_data(random_info=False),
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+        self.assertIn("fieldset-error", res.data, "Did not find expected key")
+        self.assertEqual(
+            Buildings.objects.filter(company=company).count(),
+            1,
+            "Building was created with an invalid fieldset",
+        )
+
     def test_building_creation_fails_if_not_admin_in_company(self):
         """
         If the user does not have admin permissions in the company, creation fails
@@ -340,6 +487,249 @@ class BuildingsWithExistingCompanyViewsTestCase(TestCase):
         )
 
 
+class BuildingsListViewsTestCase(TestCase):
+    """
+    Tests the keyset paginated listing of a company's buildings
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.c = CreateCustomerViews()
+        self.c.create_user()
+        self.c.login()
+
+        self.company = create_company_obj()
+        self.company.allowed_viewers.add(self.c.user)
+        self.buildings = create_buildings(
+            company_id=self.company.id,
+            buildings=[building_no_company_data() for _ in range(25)],
+            user=self.c.user,
+        )
+        # Buildings of other companies are never listed
+        create_buildings(
+            company_id=create_company_obj().id,
+            buildings=[building_no_company_data() for _ in range(3)],
+            user=self.c.user,
+        )
+
+    def list_buildings(self, query=None):
+        return self.c.client.get(
+            path=f"/buildings/?company={self.company.id}&page_size=10{query or ''}"
+        )
+
+    def test_pages_cover_every_building_in_order(self):
+        """
+        Following the next links lists each building once, sorted by name, at a constant cost
+        """
+        ids = []
+        query_counts = []
+        res = None
+        while (res is None) or res.data["next"]:
+            with CaptureQueriesContext(connection) as queries:
+                if res is None:
+                    res = self.list_buildings()
+                else:
+                    res = self.c.client.get(res.data["next"])
+            self.assertEqual(
+                res.status_code, 200, f"Expected 200. Got {res.status_code}"
+            )
+            ids.extend(building["id"] for building in res.data["results"])
+            query_counts.append(len(queries))
+
+        self.assertEqual(
+            ids,
+            list(
+                Buildings.objects.filter(company=self.company)
+                .order_by("name", "id")
+                .values_list("id", flat=True)
+            ),
+            "Pages did not list every building in order",
+        )
+        self.assertEqual(len(query_counts), 3, "Expected 3 pages of 10")
+        # The first request also authenticates the token, compare the later ones
+        self.assertEqual(
+            query_counts[1], query_counts[2], "Deeper pages ran more queries"
+        )
+
+    def test_pages_are_stable_when_buildings_are_added(self):
+        """
+        Buildings added before the cursor do not shift the next page
+        """
+        first_page = self.list_buildings()
+
+        create_buildings(
+            company_id=self.company.id,
+            buildings=[building_no_company_data(random_info=False, name="A")],
+            user=self.c.user,
+        )
+        second_page = self.c.client.get(first_page.data["next"])
+
+        first_ids = {building["id"] for building in first_page.data["results"]}
+        second_ids = {building["id"] for building in second_page.data["results"]}
+        self.assertFalse(first_ids & second_ids, "Pages overlap")
+        self.assertEqual(len(second_ids), 10, "Second page was not full")
+
+    def test_building_roles_limit_the_listing(self):
+        """
+        Users with roles on single buildings only see those, users without roles get an error
+        """
+        self.company.allowed_viewers.remove(self.c.user)
+        self.buildings[3].allowed_viewers.add(self.c.user)
+
+        res = self.list_buildings()
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+        self.assertEqual(
+            [building["id"] for building in res.data["results"]],
+            [self.buildings[3].id],
+            "Listed buildings without a role",
+        )
+
+        self.buildings[3].allowed_viewers.remove(self.c.user)
+        res = self.list_buildings()
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+        self.assertIn("invite-error", res.data, "Did not find expected key")
+
+    def test_invalid_company_or_cursor(self):
+        """
+        A missing company returns 400, a tampered cursor returns 404
+        """
+        res = self.c.client.get(path="/buildings/")
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+        self.assertIn("building-errors", res.data, "Did not find expected key")
+
+        res = self.list_buildings(query="&cursor=invalid")
+        self.assertEqual(res.status_code, 404, f"Expected 404. Got {res.status_code}")
+
+        # Well formed cursors holding values of the wrong type
+        for values in (["a", [1]], ["a", "one"], [None, 1], ["a", {"id": 1}]):
+            cursor = urlsafe_b64encode(json.dumps(values).encode()).decode()
+            res = self.list_buildings(query=f"&cursor={cursor}")
+            self.assertEqual(
+                res.status_code,
+                404,
+                f"Expected 404 for {values}. Got {res.status_code}",
+            )
+
+    def test_pages_seek_on_the_index(self):
+        """
+        The next page query is answered from the (company, name, id) index, without sorting
+        """
+        plan = (
+            Buildings.objects.filter(company=self.company)
+            .filter(get_keyset_filter(("name", "id"), ["M", self.buildings[0].id]))
+            .order_by("name", "id")
+            .explain()
+        )
+
+        self.assertIn("buildings_company_name_id_idx", plan, "Index was not used")
+        self.assertNotIn("TEMP B-TREE", plan, "Rows were sorted")
+
+
+class BuildingsImportViewsTestCase(TestCase):
+    """
+    Tests the CSV import of buildings into an existing company
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        pass
+
+    def test_import_buildings_reports_each_row(self):
+        """
+        Valid rows are created, invalid rows are reported with their row number
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        company = create_company_obj()
+        company.allowed_admins.add(c.user)
+
+        csv_file = SimpleUploadedFile(
+            "buildings.csv",
+            (
+                "\ufeffname,build_year,address_1,city,state,zipcode,note\n"
+                "Tower,1970-01-01,111 1st St. S,City,MN,55555,First note\n"
+                ",1980-01-01,222 2nd St. S,City,MN,55555,\n"
+                "Annex,,,,,,\n"
+                "Bad Zip,,333 3rd St. S,City,MN,5,\n"
+            ).encode("utf-8"),
+            content_type="text/csv",
+        )
+
+        res = c.client.post(
+            path=f"/buildings/{company.id}/import", data=dict(file=csv_file)
+        )
+
+        self.assertEqual(res.status_code, 201, f"Expected 201. Got {res.status_code}")
+        self.assertEqual(res.data["created"], 2, "Expected 2 buildings created")
+        rows = {row["row"]: row for row in res.data["rows"]}
+        self.assertEqual(sorted(rows), [2, 3, 4, 5], "Expected a result per row")
+        self.assertIn("name", rows[3]["errors"], "Blank name not reported")
+        self.assertIn("address", rows[5]["errors"], "Invalid zipcode not reported")
+
+        tower = Buildings.objects.get(id=rows[2]["id"])
+        self.assertEqual(tower.company, company, "Building not in the company")
+        self.assertEqual(tower.address.zipcode, "55555", "Address not saved")
+        self.assertEqual(tower.notes.get().note, "First note", "Note not saved")
+        self.assertEqual(str(tower.gl_code), "Tower", "General ledger not saved")
+
+        annex = Buildings.objects.get(id=rows[4]["id"])
+        self.assertIsNone(annex.address, "Blank address was saved")
+        self.assertIsNone(annex.build_year, "Blank build year was saved")
+
+    def test_import_buildings_requires_company_admin(self):
+        """
+        Viewers of the company can not import buildings
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        company = create_company_obj()
+        company.allowed_viewers.add(c.user)
+
+        csv_file = SimpleUploadedFile(
+            "buildings.csv", b"name\nTower\n", content_type="text/csv"
+        )
+        res = c.client.post(
+            path=f"/buildings/{company.id}/import", data=dict(file=csv_file)
+        )
+
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+        self.assertFalse(Buildings.objects.exists(), "Building was created")
+
+    def test_import_buildings_without_file(self):
+        """
+        A missing file returns an error
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        company = create_company_obj()
+        company.allowed_admins.add(c.user)
+
+        res = c.client.post(path=f"/buildings/{company.id}/import", data=dict())
+
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+        self.assertIn("building-errors", res.data, "Did not find expected key")
+
+
 class BuildingsUpdateViewsTestCase(TestCase):
     """
     Creation of company with a company that it can be assigned to
@@ -379,6 +769,56 @@ class BuildingsUpdateViewsTestCase(TestCase):
             res.data["build_year"], "1970-01-01", "Did not get expected year"
         )
 
+    def test_retrieve_building_info_fails_without_a_role(self):
+        """
+        Users without a role in the building or its company can not view it.
+        """
+        c = CreateCustomerViews(
+            username="Test", email="test@email.com", password="123456789"
+        )
+        c.create_user()
+        c.login()
+
+        building = create_building_obj(random_info=False)
+
+        res = c.client.get(
+            path=f"/buildings/{building.id}/update",
+        )
+
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+        self.assertEqual(
+            res.data["invite-error"],
+            "Invalid invite permissions for requested building",
+            "Error message mis-match",
+        )
+
+    def test_retrieve_building_info_allowed_for_building_viewer(self):
+        """
+        Building viewers can view, but not update, the building.
+        """
+        c = CreateCustomerViews(
+            username="Test", email="test@email.com", password="123456789"
+        )
+        c.create_user()
+        c.login()
+
+        building = create_building_obj(random_info=False)
+        building.allowed_viewers.add(c.user)
+
+        res = c.client.get(
+            path=f"/buildings/{building.id}/update",
+        )
+
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+
+        res = c.client.patch(
+            path=f"/buildings/{building.id}/update",
+            data=dict(name="Testing"),
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+
     def test_update_building_info(self):
         """
         Update a building's information, save original information to the change log.
@@ -1,11 +1,14 @@
 from buildings.views import (
     BuildingCreationWithCompanyViewSet,
+    BuildingImportViewSet,
+    BuildingListViewSet,
     BuildingNoCompanyCreationViewSet,
     BuildingUpdateViewSet,
 )
 from django.urls import path
 
 urlpatterns = [
+    path("", BuildingListViewSet.as_view(), name="list-buildings"),
     path(
         "no-company/new-building",
         BuildingNoCompanyCreationViewSet.as_view(),
@@ -16,6 +19,11 @@ urlpatterns = [
         BuildingCreationWithCompanyViewSet.as_view(),
         name="new-building-with-company",
     ),
+    path(
+        "<int:pk>/import",
+        BuildingImportViewSet.as_view(),
+        name="import-buildings",
+    ),
     path(
         "<int:pk>/update",
         BuildingUpdateViewSet.as_view(),
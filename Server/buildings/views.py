@@ -1,50 +1,92 @@
+from buildings.functions import create_buildings, import_buildings
 from buildings.models import Buildings
 from buildings.serializers import (
     BuildingCreationSerializer,
+    BuildingListSerializer,
     BuildingResponseSerializer,
     BuildingRetrieveAndUpdateSerializer,
 )
-from companies.models import Companies
-from companies.views import send_invalid_permission_response
+from companies.functions import get_or_create_default_company
 from contacts.functions import populate_address_dict
-from contacts.models import Addresses
+from core.fieldsets import SparseFieldsetMixin
+from core.pagination import KeysetPagination
+from core.prefetch import PrefetchPlanMixin
 from django.db import transaction
-from general_ledger.models import GeneralLedgerCodes
-from notes.models import Notes
 from rest_framework import generics, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
-
+from roles.permissions import (
+    InvalidPermissionLevel,
+    IsBuildingEditor,
+    IsCompanyAdmin,
+)
+from roles.resolvers import get_role_resolver
+import codecs
+import csv
 
 # Create your views here.
 
 
-def check_building_admin(building_obj=None, user=None):
+class BuildingListViewSet(SparseFieldsetMixin, generics.ListAPIView):
     """
-    Checks if the specified user has the proper admin settings for building access.
+    Lists the buildings of the '?company=' company visible to the user, a page at a time.
+
+    Users with a role in the company see every building, users with roles on single
+    buildings only see those. Pages are read with keyset pagination, so deep pages
+    cost the same as the first one.
     """
-    company_admin = building_obj.company.allowed_admins.filter(pk=user.id).exists()
-    building_admin = building_obj.allowed_admins.filter(pk=user.id).exists()
-    building_viewer = building_obj.allowed_viewers.filter(pk=user.id).exists()
 
-    # First, check if they have admin privilege for the building, meaning edits allowed
-    # Then, check if they are a company admin AND not a building viewer, meaning edits allowed
-    # Finally, do a NOT to reverse the findings; if the result is True - send error message
-    return (building_admin) or ((company_admin) and (not building_viewer))
+    queryset = Buildings.objects.all()
+    serializer_class = BuildingListSerializer
+    pagination_class = KeysetPagination
+    permission_classes = (IsAuthenticated,)
+    # The company is fixed by the filter, so the (company, name, id) index
+    # is read in (name, id) order without sorting
+    keyset_ordering = ("name", "id")
+
+    def get_company_id(self):
+        company_id = self.request.query_params.get("company", "")
+        if not company_id.isdigit():
+            raise ValidationError(
+                {"building-errors": {"company": ["A valid company ID is required."]}}
+            )
+        return int(company_id)
+
+    def get_queryset(self):
+        company_id = self.get_company_id()
+        queryset = super().get_queryset().filter(company_id=company_id)
+
+        # The roles are loaded once, with the query already made by any permission check
+        resolver = get_role_resolver(self.request)
+        if resolver.can_view(company_id):
+            return queryset
+
+        building_ids = resolver.role_building_ids(company_id)
+        if not building_ids:
+            raise InvalidPermissionLevel(requested_level="company", level_id=company_id)
+        return queryset.filter(pk__in=building_ids)
+
+    def list(self, request):
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response(
+            self.get_response_serializer(page, many=True).data
+        )
 
 
-class BuildingNoCompanyCreationViewSet(generics.CreateAPIView):
+class BuildingNoCompanyCreationViewSet(SparseFieldsetMixin, generics.CreateAPIView):
     """
     Create a new building object
     """
 
     queryset = Buildings.objects.all()
     serializer_class = BuildingCreationSerializer
+    response_serializer_class = BuildingResponseSerializer
     permission_classes = (IsAuthenticated,)
 
     def create(self, request):
         """
-        Creates a new building record, and creates a container company name for the saved building name
+        Creates a new building record in the user's container company, created on first use
         """
 
         # Serialize the data
@@ -69,119 +111,47 @@ class BuildingNoCompanyCreationViewSet(generics.CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Pop out the business address information
-        address = serializer.validated_data.pop("address")
-
-        # Pop out company notes if provided
-        building_notes = serializer.validated_data.pop("notes")
-
-        # Create a company object built around the entered building name
-
         # Make all the posts behind an atomic transaction to make sure
         # all entries are successfully made
         with transaction.atomic():
 
-            ###### Company Creation ######
-            # Create the encompassing accounts receivable general ledger
-            accounts_receivable_gl = GeneralLedgerCodes.objects.create(
-                name="Accounts Receivable",
-                description=f"Accounts Receivable ledger",
-            )
-
-            # Create the encompassing accounts payable general ledger
-            accounts_payable_gl = GeneralLedgerCodes.objects.create(
-                name="Accounts Payable",
-                description=f"Accounts Payable ledger",
-            )
-
-            # Create the general ledger account for company expenses
-            company_gl_code = GeneralLedgerCodes.objects.create(
-                name="Rental Business",
-            )
-
-            # Save the company with all the newly created address and company_gl_code objects
-            company_obj = Companies.objects.create(
-                business_name="Rental Business",
-                accounts_payable_gl=accounts_payable_gl,
-                accounts_receivable_gl=accounts_receivable_gl,
-                gl_code=company_gl_code,
-            )
-
-            # Add the current user as an allowed admin
-            company_obj.allowed_admins.add(request.user)
+            ###### Company Selection ######
+            # Reuse the user's container company, created with the first building
+            company_obj = get_or_create_default_company(user=request.user)
 
             ###### Building Creation ######
-            # Check if any address values are present
-            if any(address.values()):
-                # Save the address
-                address_obj = Addresses.objects.create(**address)
-            # If all values are blank, save a None value
-            else:
-                address_obj = None
-
-            # Create the general ledger account for building expenses
-            building_gl_code = GeneralLedgerCodes.objects.create(
-                name=f"{serializer.validated_data['name']}",
-                description=f"{serializer.validated_data['name']} general ledger",
-            )
-
-            # Save the building with all the newly created address
-            building_obj = serializer.save(
-                company=company_obj, address=address_obj, gl_code=building_gl_code
-            )
-
-            # If notes are present, loop through each note
-            for building_note in building_notes:
-                # Assign the user to the note
-                building_note["user"] = request.user
-                # Create the note with associated user
-                building_note_obj = Notes.objects.create(**building_note)
-                # Add that note object to the ManyToMany notes field
-                building_obj.notes.add(building_note_obj)
+            # Save the building with its address, general ledger and notes
+            building_obj = create_buildings(
+                company_id=company_obj.pk,
+                buildings=[serializer.validated_data],
+                user=request.user,
+            )[0]
 
         headers = self.get_success_headers(building_obj)
 
         return Response(
-            data=BuildingResponseSerializer(building_obj).data,
+            data=self.get_response_data(building_obj),
             status=status.HTTP_201_CREATED,
             headers=headers,
         )
 
 
-class BuildingCreationWithCompanyViewSet(generics.CreateAPIView):
+class BuildingCreationWithCompanyViewSet(SparseFieldsetMixin, generics.CreateAPIView):
     """
     Creates a building that is contained within an existing company
     """
 
     queryset = Buildings.objects.all()
     serializer_class = BuildingCreationSerializer
-    permission_classes = (IsAuthenticated,)
+    response_serializer_class = BuildingResponseSerializer
+    permission_classes = (IsAuthenticated, IsCompanyAdmin)
 
     def post(self, request, **kwargs):
         """
-        Creates a new building record, and links to a container company name
-        """
-        # Check that the company exist
-        try:
-            company_obj = Companies.objects.get(pk=kwargs["pk"])
-        # If the company does not exist, return generic response
-        except Companies.DoesNotExist:
-            return Response(
-                data=send_invalid_permission_response(
-                    requested_level="company", level_id=kwargs["pk"]
-                ),
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Check that the requesting user is set as an admin for the indicated company
-        if not company_obj.allowed_admins.filter(pk=request.user.pk).exists():
-            return Response(
-                data=send_invalid_permission_response(
-                    requested_level="company", level_id=kwargs["pk"]
-                ),
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        Creates a new building record, and links to a container company name.
 
+        The IsCompanyAdmin permission has already verified the company exists and the user is an admin.
+        """
         # Serialize the data
         serializer = self.get_serializer(data=request.data)
 
@@ -204,86 +174,67 @@ class BuildingCreationWithCompanyViewSet(generics.CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Pop out the business address information
-        address = serializer.validated_data.pop("address")
-
-        # Pop out company notes if provided
-        building_notes = serializer.validated_data.pop("notes")
-
-        # Make all the posts behind an atomic transaction to make sure
-        # all entries are successfully made
-        with transaction.atomic():
-
-            ###### Building Creation ######
-            # Check if any address values are present
-            if any(address.values()):
-                # Save the address
-                address_obj = Addresses.objects.create(**address)
-            # If all values are blank, save a None value
-            else:
-                address_obj = None
-
-            # Create the general ledger account for building expenses
-            building_gl_code = GeneralLedgerCodes.objects.create(
-                name=f"{serializer.validated_data['name']}",
-                description=f"{serializer.validated_data['name']} general ledger",
-            )
-
-            # Save the building with all the newly created address
-            building_obj = serializer.save(
-                company=company_obj, address=address_obj, gl_code=building_gl_code
-            )
-
-            # If notes are present, loop through each note
-            for building_note in building_notes:
-                # Assign the user to the note
-                building_note["user"] = request.user
-                # Create the note with associated user
-                building_note_obj = Notes.objects.create(**building_note)
-                # Add that note object to the ManyToMany notes field
-                building_obj.notes.add(building_note_obj)
+        # Save the building with its address, general ledger and notes,
+        # behind an atomic transaction to make sure all entries are successfully made
+        building_obj = create_buildings(
+            company_id=kwargs["pk"],
+            buildings=[serializer.validated_data],
+            user=request.user,
+        )[0]
 
         headers = self.get_success_headers(building_obj)
 
         return Response(
-            data=BuildingResponseSerializer(building_obj).data,
+            data=self.get_response_data(building_obj),
             status=status.HTTP_201_CREATED,
             headers=headers,
         )
 
 
-class BuildingUpdateViewSet(generics.RetrieveUpdateAPIView):
+class BuildingImportViewSet(generics.GenericAPIView):
     """
-    Gets a building object or updates fields of a building, saving previous values to the change log.
+    Creates many buildings within an existing company from an uploaded CSV file.
+
+    The file is sent as the multipart 'file' field, with the columns: name, build_year,
+    address_1, address_2, city, state, zipcode and note. Large uploads are spooled to disk
+    and read row by row. Returns the result of each row, invalid rows do not stop the import.
     """
 
     queryset = Buildings.objects.all()
-    serializer_class = BuildingRetrieveAndUpdateSerializer
-    permission_classes = [IsAuthenticated]
+    permission_classes = (IsAuthenticated, IsCompanyAdmin)
 
-    def update(self, request, **kwargs):
+    def post(self, request, **kwargs):
         """
-        Ensures the requested user has the allowed credentials
+        The IsCompanyAdmin permission has already verified the company exists and the user is an admin.
         """
-
-        # Check that the company exist
-        try:
-            building_obj = Buildings.objects.get(pk=kwargs["pk"])
-        # If the company does not exist, return generic response
-        except Buildings.DoesNotExist:
+        if "file" not in request.FILES:
             return Response(
-                data=send_invalid_permission_response(
-                    requested_level="building", level_id=kwargs["pk"]
-                ),
+                {"building-errors": {"file": "A CSV file is required"}},
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Check that the requesting user is set as an admin for the indicated company / building
-        if not check_building_admin(building_obj=building_obj, user=request.user):
-            return Response(
-                data=send_invalid_permission_response(
-                    requested_level="building", level_id=kwargs["pk"]
-                ),
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-        return super().update(request, **kwargs)
+        # Decode the upload lazily, line by line. 'utf-8-sig' drops the BOM spreadsheets add
+        rows = csv.DictReader(codecs.iterdecode(request.FILES["file"], "utf-8-sig"))
+
+        report = import_buildings(rows=rows, company_id=kwargs["pk"], user=request.user)
+
+        return Response(
+            report,
+            status=(
+                status.HTTP_201_CREATED
+                if report["created"]
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
+
+
+class BuildingUpdateViewSet(PrefetchPlanMixin, generics.RetrieveUpdateAPIView):
+    """
+    Gets a building object or updates fields of a building, saving previous values to the change log.
+
+    Viewing requires any role in the building, updates require edit rights.
+    """
+
+    queryset = Buildings.objects.all()
+    serializer_class = BuildingRetrieveAndUpdateSerializer
+    permission_classes = [IsAuthenticated, IsBuildingEditor]
@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class CompaniesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'companies'
+
+    def ready(self):
+        # Connects the signals that invalidate the cached company details
+        import companies.signals
+
+        # Registers the check of the company details cache backend
+        import companies.checks
@@ -0,0 +1,119 @@
+from companies.models import Companies
+from companies.serializers import CompanyFullAdminSerializer
+from core.functions import is_shared_cache
+from core.prefetch import get_rendered_models
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Q
+from uuid import uuid4
+
+
+def get_company_cache_settings():
+    """
+    Returns the COMPANY_DETAIL_CACHE settings, filled with the defaults
+    """
+    return {
+        "CACHE_ALIAS": "default",
+        "TIMEOUT": 3600,
+        "ALLOW_PER_PROCESS": False,
+        **getattr(settings, "COMPANY_DETAIL_CACHE", {}),
+    }
+
+
+def is_company_cache_enabled():
+    """
+    Returns True if the company details can be cached.
+
+    Versions bumped in one worker must reach all of them, so a per process cache is
+    refused, unless ALLOW_PER_PROCESS is set for a single process server.
+    """
+    cache_settings = get_company_cache_settings()
+    return cache_settings["ALLOW_PER_PROCESS"] or is_shared_cache(
+        cache_settings["CACHE_ALIAS"]
+    )
+
+
+def get_company_cache():
+    return caches[get_company_cache_settings()["CACHE_ALIAS"]]
+
+
+def company_version_key(company_id):
+    return f"company-version:{company_id}"
+
+
+def company_detail_key(company_id, version, fieldset=""):
+    return f"company-detail:{company_id}:{version}:{fieldset}"
+
+
+def get_company_version(company_id):
+    """
+    Returns the current version of the company details, starting one if missing.
+
+    Versions are never reused, so an evicted version can only cause cache misses.
+    """
+    company_cache = get_company_cache()
+    version = company_cache.get(company_version_key(company_id))
+    if version is None:
+        company_cache.add(company_version_key(company_id), uuid4().hex, timeout=None)
+        version = company_cache.get(company_version_key(company_id))
+    return version
+
+
+def bump_company_versions(company_ids):
+    """
+    Starts a new version of each company, so their cached details are no longer used
+    """
+    if company_ids:
+        get_company_cache().set_many(
+            {
+                company_version_key(company_id): uuid4().hex
+                for company_id in company_ids
+            },
+            timeout=None,
+        )
+
+
+def invalidate_company_details(company_ids):
+    """
+    Bumps the versions now, and again once the transaction commits.
+
+    A request reading the database before the commit may cache the previous
+    details under the first new version. The second bump retires that entry.
+    """
+    company_ids = set(company_ids)
+    if not company_ids:
+        return
+    bump_company_versions(company_ids)
+    transaction.on_commit(lambda: bump_company_versions(company_ids))
+
+
+def get_affected_company_ids(model, pks):
+    """
+    Returns the IDs of the companies whose details render one of the objects
+    """
+    lookups = get_rendered_models(CompanyFullAdminSerializer).lookups.get(model)
+    if not lookups:
+        return set()
+    if model is Companies:
+        return set(pks)
+
+    query = Q()
+    for lookup in lookups:
+        query |= Q(**{f"{lookup}__in": pks})
+    return set(Companies.objects.filter(query).values_list("pk", flat=True))
+
+
+def get_cached_company_detail(company_id, version, render, fieldset=""):
+    """
+    Returns the cached details of the company version, rendering and storing them if missing.
+
+    Each fieldset of the details is cached on its own.
+    """
+    company_cache = get_company_cache()
+    key = company_detail_key(company_id, version, fieldset)
+    data = company_cache.get(key)
+    if data is None:
+        data = render()
+        company_cache.set(key, data, timeout=get_company_cache_settings()["TIMEOUT"])
+    return data
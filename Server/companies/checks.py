@@ -0,0 +1,23 @@
+from companies.cache import get_company_cache_settings, is_company_cache_enabled
+from django.core.checks import Tags, Warning, register
+
+
+@register(Tags.caches)
+def check_company_cache(app_configs, **kwargs):
+    """
+    Warns when the company details are not cached, their cache not being shared
+    """
+    if is_company_cache_enabled():
+        return []
+    return [
+        Warning(
+            "The company details are not cached: the "
+            f"'{get_company_cache_settings()['CACHE_ALIAS']}' cache is kept per process.",
+            hint=(
+                "Configure a shared cache backend (memcached, redis) for "
+                "COMPANY_DETAIL_CACHE['CACHE_ALIAS'], or set ALLOW_PER_PROCESS "
+                "when running a single process."
+            ),
+            id="companies.W001",
+        )
+    ]
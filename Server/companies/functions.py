@@ -0,0 +1,421 @@
+from companies.models import Companies, CompanyInviteList
+from companies.serializers import CompanyCreationSerializer
+from contacts.functions import (
+    get_or_create_addresses,
+    populate_address_dict,
+    populate_contact_dicts,
+)
+from contacts.models import Contacts
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from core.functions import SubqueryCount, bulk_create_with_pks
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from general_ledger.functions import get_chart_template, provision_charts_of_accounts
+from general_ledger.models import ChartOfAccountsTemplate
+from notes.models import Notes
+from roles.functions import get_company_role, refresh_company_roles
+from roles.models import EffectiveRoles
+from summaries.models import CompanySummaries
+import json
+import secrets
+
+
+def populate_company_dict(company):
+    """
+    Takes in a company dict and populates the missing addresses, contacts and notes.
+
+    Used to quickly serialize and validate a Company object for creation
+    """
+    # Creates valid address dictionaries to be validated against.
+    # Accounts for None or missing values
+    for field in ("business_address", "mailing_address"):
+        company[field] = populate_address_dict(company.get(field))
+
+    # Fail-safe to make sure the contacts and notes arrays are included
+    company.setdefault("contacts", [])
+    company.setdefault("notes", [])
+
+    return company
+
+
+def create_companies(companies=None, user=None, chart_template=None):
+    """
+    Saves many companies, together with their addresses, general ledgers, contacts and notes.
+
+    Each item of 'companies' is the validated data of a CompanyCreationSerializer. New companies
+    automatically get the general ledgers of the chart of accounts template, the default
+    company chart if none is given. The user is set as an admin of every company.
+
+    Every model is written with one batched insert, so the number of statements
+    does not grow with the number of companies or their children.
+    Returns the created company objects, in the order given.
+    """
+    companies = [dict(company) for company in companies]
+
+    with transaction.atomic():
+
+        # Identical addresses reuse one stored row, blank addresses are saved as None
+        address_objs = iter(
+            get_or_create_addresses(
+                dict(company.pop(field))
+                for company in companies
+                for field in ("business_address", "mailing_address")
+            )
+        )
+        for company in companies:
+            company["business_address"] = next(address_objs)
+            company["mailing_address"] = next(address_objs)
+
+        # Provision the chart of accounts of every company with one insert. The accounts
+        # with a role become the accounts receivable, accounts payable and company ledgers
+        if chart_template is None:
+            chart_template = get_chart_template(
+                entity_type=ChartOfAccountsTemplate.EntityList.COMPANY
+            )
+        charts = provision_charts_of_accounts(
+            template=chart_template,
+            names=[company["business_name"] for company in companies],
+        )
+
+        # Save the companies with all the newly created address and gl_code objects
+        company_objs = []
+        company_contacts = []
+        company_notes = []
+        for company, chart in zip(companies, charts):
+            company_contacts.append(company.pop("contacts", []))
+            company_notes.append(company.pop("notes", []))
+            company_objs.append(
+                Companies(
+                    **company,
+                    **{
+                        role: gl_code_obj
+                        for role, gl_code_obj in chart.items()
+                        if role != "accounts"
+                    },
+                )
+            )
+        bulk_create_with_pks(Companies, company_objs)
+
+        # Create all the contacts, after cleaning up the contact information in one pass
+        contact_objs = bulk_create_with_pks(
+            Contacts,
+            [
+                Contacts(**contact)
+                for contact in populate_contact_dicts(
+                    dict(contact)
+                    for contacts in company_contacts
+                    for contact in contacts
+                )
+            ],
+        )
+
+        # Create all the notes, assigning the user to each note
+        note_objs = bulk_create_with_pks(
+            Notes,
+            [Notes(**note, user=user) for notes in company_notes for note in notes],
+        )
+
+        # Link the children to their companies. The companies are new, so no links exist yet
+        contact_iter = iter(contact_objs)
+        Companies.contacts.through.objects.bulk_create(
+            [
+                Companies.contacts.through(
+                    companies_id=company_obj.pk, contacts_id=next(contact_iter).pk
+                )
+                for company_obj, contacts in zip(company_objs, company_contacts)
+                for _ in contacts
+            ]
+        )
+        Companies.chart_of_accounts.through.objects.bulk_create(
+            [
+                Companies.chart_of_accounts.through(
+                    companies_id=company_obj.pk, generalledgercodes_id=gl_code_obj.pk
+                )
+                for company_obj, chart in zip(company_objs, charts)
+                for gl_code_obj in chart["accounts"]
+            ]
+        )
+        note_iter = iter(note_objs)
+        Companies.notes.through.objects.bulk_create(
+            [
+                Companies.notes.through(
+                    companies_id=company_obj.pk, notes_id=next(note_iter).pk
+                )
+                for company_obj, notes in zip(company_objs, company_notes)
+                for _ in notes
+            ]
+        )
+
+        # Add the user as an allowed admin of every company. Bulk inserts skip the
+        # m2m_changed signal, so the effective roles are refreshed explicitly
+        Companies.allowed_admins.through.objects.bulk_create(
+            [
+                Companies.allowed_admins.through(
+                    companies_id=company_obj.pk, user_id=user.pk
+                )
+                for company_obj in company_objs
+            ]
+        )
+        refresh_company_roles(
+            company_ids=[company_obj.pk for company_obj in company_objs],
+            user_ids=[user.pk],
+        )
+
+        # Bulk inserts skip the summary signals too, the counts of new companies are known
+        CompanySummaries.objects.bulk_create(
+            [
+                CompanySummaries(
+                    company_id=company_obj.pk, note_count=len(notes), admin_count=1
+                )
+                for company_obj, notes in zip(company_objs, company_notes)
+            ]
+        )
+
+    return company_objs
+
+
+def get_or_create_default_company(user=None):
+    """
+    Returns the user's container company, holding the buildings created without a company.
+
+    The company is created on first use, with the user as its admin, and reused afterwards.
+    A container the user is no longer an admin of is released and replaced by a new one.
+    """
+    company_obj = Companies.objects.filter(default_for=user).first()
+    if company_obj is not None:
+        if (
+            get_company_role(user=user, company_id=company_obj.pk)
+            == EffectiveRoles.RoleList.ADMIN
+        ):
+            return company_obj
+        company_obj.default_for = None
+        company_obj.save(update_fields=["default_for", "updated_at"])
+
+    try:
+        with transaction.atomic():
+            return create_companies(
+                companies=[
+                    populate_company_dict(
+                        dict(
+                            business_name=Companies.DEFAULT_COMPANY_NAME,
+                            default_for=user,
+                        )
+                    )
+                ],
+                user=user,
+            )[0]
+    except IntegrityError:
+        # Created by a concurrent request of the same user
+        return Companies.objects.get(default_for=user)
+
+
+def get_user_companies(user=None):
+    """
+    Returns the companies the user is an admin or viewer of, in one query.
+
+    Each company is annotated with the user's 'role', and its 'building_count',
+    'document_count', 'note_count' and 'user_count'. The companies are found
+    through the user's effective roles. The building, document and note counts
+    come from the company summary, the user count is a correlated subquery.
+    """
+    company_roles = EffectiveRoles.objects.filter(
+        user_id=user.pk, building__isnull=True
+    )
+
+    return Companies.objects.filter(pk__in=company_roles.values("company_id")).annotate(
+        role=Subquery(
+            company_roles.filter(company_id=OuterRef("pk")).values("role")[:1]
+        ),
+        # Read from the counter cache, a company without a summary yet counts zero
+        building_count=Coalesce("summary__building_count", 0),
+        document_count=Coalesce("summary__document_count", 0),
+        note_count=Coalesce("summary__note_count", 0),
+        # Admins and viewers each hold one company level role
+        user_count=SubqueryCount(
+            EffectiveRoles.objects.filter(
+                company_id=OuterRef("pk"), building__isnull=True
+            )
+        ),
+    )
+
+
+def import_companies(lines=None, user=None, chunk_size=500):
+    """
+    Creates companies from newline delimited JSON, one company record per line.
+
+    Records have the same shape as the 'companies/create' request. Lines are read
+    incrementally and validated one by one. Valid records are written in chunks with
+    'create_companies'. Invalid lines are reported and skipped, without aborting the import.
+
+    Returns the number of created companies and the errors per line number.
+    """
+    report = {"created": 0, "errors": []}
+    chunk = []
+
+    def write_chunk():
+        try:
+            report["created"] += len(
+                create_companies(companies=[company for _, company in chunk], user=user)
+            )
+        except DatabaseError as e:
+            report["errors"].extend(
+                {"line": line_number, "errors": {"database": str(e)}}
+                for line_number, _ in chunk
+            )
+        chunk.clear()
+
+    for line_number, line in enumerate(lines, start=1):
+        try:
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            if not line.strip():
+                continue
+            company = json.loads(line)
+            if not isinstance(company, dict):
+                raise ValueError("Expected a JSON object")
+            serializer = CompanyCreationSerializer(data=populate_company_dict(company))
+        except (AttributeError, TypeError, ValueError) as e:
+            report["errors"].append(
+                {"line": line_number, "errors": {"invalid-record": str(e)}}
+            )
+            continue
+
+        if not serializer.is_valid():
+            report["errors"].append({"line": line_number, "errors": serializer.errors})
+            continue
+
+        chunk.append((line_number, serializer.validated_data))
+        if len(chunk) >= chunk_size:
+            write_chunk()
+
+    if chunk:
+        write_chunk()
+
+    return report
+
+
+def save_company_invites(company_obj=None, requested_roles=None):
+    """
+    Creates or updates the invites of many emails to one company with set-based queries.
+
+    'requested_roles' maps each email to True for an admin invite, or False for a viewer invite.
+    Existing invites for the email and company combination are updated in place, restarting
+    their validity period, even when expired but not yet swept.
+
+    Returns a dict of email to the saved invite.
+    """
+    now = timezone.now()
+    invites = {}
+    duplicate_ids = []
+
+    # Invites are ordered by the most recent update first
+    for invite_obj in CompanyInviteList.objects.filter(
+        Q(email__in=requested_roles),
+        Q(admin_in=company_obj) | Q(viewer_in=company_obj),
+    ):
+        # There should be only one entry for the email and company combination.
+        # Fail-safe: remove all records, except for the most recent one
+        if invite_obj.email in invites:
+            duplicate_ids.append(invite_obj.id)
+        else:
+            invites[invite_obj.email] = invite_obj
+
+    new_invites = []
+    for email, admin_requested in requested_roles.items():
+        invite_obj = invites.get(email)
+        if invite_obj is None:
+            invite_obj = CompanyInviteList(email=email)
+            invites[email] = invite_obj
+            new_invites.append(invite_obj)
+
+        invite_obj.admin_in = company_obj if admin_requested else None
+        invite_obj.viewer_in = None if admin_requested else company_obj
+        # Set explicitly, bulk writes do not call the model save method
+        invite_obj.updated_at = now
+        invite_obj.expires_at = now + CompanyInviteList.VALID_FOR
+
+    with transaction.atomic():
+        if duplicate_ids:
+            CompanyInviteList.objects.filter(id__in=duplicate_ids).delete()
+        CompanyInviteList.objects.bulk_update(
+            [invite_obj for invite_obj in invites.values() if invite_obj.pk],
+            fields=("admin_in", "viewer_in", "updated_at", "expires_at"),
+        )
+        CompanyInviteList.objects.bulk_create(new_invites)
+
+    return invites
+
+
+def send_company_invites(invites=None):
+    """
+    Emails each invite its link, carrying the token that redeems it.
+
+    The token is only sent to the invited address, so presenting it proves the user
+    controls the address. All mails go out over one connection.
+    Returns the number of mails sent.
+    """
+    messages = []
+    for invite_obj in invites:
+        company_obj = invite_obj.admin_in or invite_obj.viewer_in
+        role = "an admin" if invite_obj.admin_in_id else "a viewer"
+        messages.append(
+            (
+                f"Invitation to {company_obj.business_name}",
+                f"You are invited to join {company_obj.business_name} as {role}.\n\n"
+                f"Register or log in from this link to accept the invitation:\n"
+                f"{settings.COMPANY_INVITE_URL.format(token=invite_obj.token)}\n\n"
+                f"The link is valid until "
+                f"{invite_obj.expires_at.strftime('%b. %d, %Y - %I:%M %p UTC')}.\n",
+                None,
+                [invite_obj.email],
+            )
+        )
+    return send_mass_mail(messages)
+
+
+def redeem_company_invites(user=None, invite_token=None):
+    """
+    Grants the user the role of the active invite of 'invite_token', then removes that invite.
+
+    The email of an account is not verified, so only the invite whose token was emailed to
+    the user's address is redeemed, see send_company_invites. Other invites to the same
+    address wait for their own link. Without a matching token nothing is redeemed.
+
+    One indexed query reads the invites of the address.
+    Returns the number of invites redeemed.
+    """
+    if (not user.email) or (not invite_token):
+        return 0
+
+    for invite_id, admin_in_id, viewer_in_id, token in (
+        CompanyInviteList.objects.active()
+        .filter(email=user.email.lower())
+        .values_list("id", "admin_in_id", "viewer_in_id", "token")
+    ):
+        if secrets.compare_digest(token.encode(), str(invite_token).encode()):
+            break
+    else:
+        return 0
+
+    with transaction.atomic():
+        if admin_in_id:
+            user.company_user_set.add(admin_in_id)
+        else:
+            user.company_viewers_set.add(viewer_in_id)
+        CompanyInviteList.objects.filter(id=invite_id).delete()
+
+    return 1
+
+
+def sweep_expired_invites():
+    """
+    Removes all expired company invites with a single DELETE on the indexed 'expires_at' field.
+
+    Schedulable job, run through the 'sweep_expired_invites' management command.
+    Returns the number of invites removed.
+    """
+    removed, _ = CompanyInviteList.objects.expired().delete()
+    return removed
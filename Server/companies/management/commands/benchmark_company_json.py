@@ -0,0 +1,164 @@
+from accounts.models import User
+from companies.functions import create_companies, populate_company_dict
+from companies.models import Companies
+from companies.serializers import CompanyFullAdminSerializer
+from core.functions import bulk_create_with_pks
+from core.parsers import ORJSONParser
+from core.prefetch import apply_prefetch_plan
+from core.renderers import ORJSONRenderer
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from documents.models import Documents, Images
+from io import BytesIO
+from notes.models import Notes
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from timeit import repeat
+
+
+def build_benchmark_company(num_children=200):
+    """
+    Creates a company with 'num_children' contacts, notes, documents and images,
+    each document and image holding its own notes. Returns it with everything
+    the full company serializer renders loaded.
+
+    Must run inside a transaction that is rolled back afterwards.
+    """
+    user = User.objects.create(username="benchmark-user", first_name="Benchmark")
+
+    company_obj = create_companies(
+        companies=[
+            populate_company_dict(
+                dict(
+                    business_name="Benchmark Company",
+                    business_address=dict(
+                        address_1="1 Main St.",
+                        city="Fargo",
+                        state="ND",
+                        zipcode="58102",
+                    ),
+                    mailing_address=dict(
+                        address_1="PO Box 1", city="Fargo", state="ND", zipcode="58107"
+                    ),
+                    contacts=[
+                        dict(
+                            name_first="Jane",
+                            name_last=f"Doe {i}",
+                            phone_1="5555555555",
+                        )
+                        for i in range(num_children)
+                    ],
+                    notes=[
+                        dict(note=f"Company note {i} with unicode é and \u2028")
+                        for i in range(num_children)
+                    ],
+                )
+            )
+        ],
+        user=user,
+    )[0]
+
+    for model, file_field, relation in (
+        (Documents, "document", Companies.documents),
+        (Images, "image", Companies.images),
+    ):
+        file_objs = bulk_create_with_pks(
+            model,
+            [
+                model(
+                    name=f"{file_field} {i}",
+                    uploaded_by=user,
+                    **{file_field: f"{file_field}s/benchmark {i}.pdf"},
+                )
+                for i in range(num_children)
+            ],
+        )
+        relation.through.objects.bulk_create(
+            [
+                relation.through(
+                    companies_id=company_obj.pk,
+                    **{f"{model._meta.model_name}_id": obj.pk},
+                )
+                for obj in file_objs
+            ]
+        )
+        note_objs = bulk_create_with_pks(
+            Notes,
+            [
+                Notes(note=f"Note on {file_field} {i}", user=user)
+                for i in range(num_children)
+            ],
+        )
+        model.notes.through.objects.bulk_create(
+            [
+                model.notes.through(
+                    **{f"{model._meta.model_name}_id": obj.pk}, notes_id=note_obj.pk
+                )
+                for obj, note_obj in zip(file_objs, note_objs)
+            ]
+        )
+
+    return apply_prefetch_plan(Companies.objects.all(), CompanyFullAdminSerializer).get(
+        pk=company_obj.pk
+    )
+
+
+def build_company_payload(num_children=200):
+    """
+    Returns the full details of a benchmark company, see build_benchmark_company
+    """
+    return CompanyFullAdminSerializer(build_benchmark_company(num_children)).data
+
+
+class Command(BaseCommand):
+    """
+    Compares the DRF and orjson renderers and parsers on a large company details payload.
+
+    The company is created inside a transaction that is rolled back, the database is not changed.
+    'python manage.py benchmark_company_json --children 500 --repeat 50'
+    """
+
+    help = "Benchmarks JSON rendering and parsing of a large company details payload"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--children",
+            type=int,
+            default=200,
+            help="Number of contacts, notes, documents and images of the company",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Number of timed runs, best is kept"
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            data = build_company_payload(num_children=options["children"])
+            transaction.set_rollback(True)
+
+        body = JSONRenderer().render(data)
+        if ORJSONRenderer().render(data) != body:
+            raise CommandError("The orjson renderer output differs from JSONRenderer")
+        if ORJSONParser().parse(BytesIO(body)) != JSONParser().parse(BytesIO(body)):
+            raise CommandError("The orjson parser output differs from JSONParser")
+
+        self.stdout.write(f"Payload: {len(body)} bytes")
+        for action, standard, fast in (
+            (
+                "Render",
+                lambda: JSONRenderer().render(data),
+                lambda: ORJSONRenderer().render(data),
+            ),
+            (
+                "Parse",
+                lambda: JSONParser().parse(BytesIO(body)),
+                lambda: ORJSONParser().parse(BytesIO(body)),
+            ),
+        ):
+            standard_time = min(repeat(standard, number=1, repeat=options["repeat"]))
+            fast_time = min(repeat(fast, number=1, repeat=options["repeat"]))
+            self.stdout.write(
+                f"{action}: json {standard_time * 1000:.2f} ms, "
+                f"orjson {fast_time * 1000:.2f} ms "
+                f"({standard_time / fast_time:.1f}x)"
+            )
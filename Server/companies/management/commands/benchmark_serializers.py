@@ -0,0 +1,107 @@
+from accounts.serializers import UserReturnStringSerializer
+from companies.management.commands.benchmark_company_json import (
+    build_benchmark_company,
+)
+from companies.serializers import CompanyFullAdminSerializer
+from contacts.serializers import AddressSerializer, ContactSerializer
+from core.serializers import DRF_REPRESENTATION
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from documents.serializers import DocumentSerializer
+from notes.serializers import NotesSerializer
+from rest_framework.renderers import JSONRenderer
+from timeit import repeat
+
+
+def repeat_to(objs, count):
+    """
+    Returns 'count' objects, repeating the given ones as needed
+    """
+    return [objs[i % len(objs)] for i in range(count)]
+
+
+def get_benchmark_cases(company_obj, num_children):
+    """
+    Returns (name, serializer class, objects) for each benchmarked serializer.
+
+    Objects come from the loaded benchmark company, so no query runs while timing.
+    """
+    documents = list(company_obj.documents.all())
+    return (
+        ("NotesSerializer", NotesSerializer, list(company_obj.notes.all())),
+        (
+            "AddressSerializer",
+            AddressSerializer,
+            repeat_to(
+                [company_obj.business_address, company_obj.mailing_address],
+                num_children,
+            ),
+        ),
+        (
+            "UserReturnStringSerializer",
+            UserReturnStringSerializer,
+            [document.uploaded_by for document in documents],
+        ),
+        ("DocumentSerializer", DocumentSerializer, documents),
+        ("ContactSerializer", ContactSerializer, list(company_obj.contacts.all())),
+        (
+            "ContactSerializer .values()",
+            ContactSerializer,
+            list(company_obj.contacts.values(*ContactSerializer.Meta.fields)),
+        ),
+        ("CompanyFullAdminSerializer", CompanyFullAdminSerializer, [company_obj]),
+    )
+
+
+class Command(BaseCommand):
+    """
+    Compares the fast read only serializers with their DRF implementation.
+
+    The company is created inside a transaction that is rolled back, the database is not changed.
+    'python manage.py benchmark_serializers --children 500 --repeat 50'
+    """
+
+    help = "Benchmarks the fast read only serializers against the DRF implementation"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--children",
+            type=int,
+            default=200,
+            help="Number of contacts, notes, documents and images of the company",
+        )
+        parser.add_argument(
+            "--repeat", type=int, default=20, help="Number of timed runs, best is kept"
+        )
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            company_obj = build_benchmark_company(num_children=options["children"])
+            cases = get_benchmark_cases(company_obj, options["children"])
+
+            for name, serializer_class, objs in cases:
+
+                def render():
+                    return serializer_class(objs, many=True).data
+
+                def render_drf():
+                    return serializer_class(
+                        objs, many=True, context={DRF_REPRESENTATION: True}
+                    ).data
+
+                standard = JSONRenderer().render(render_drf())
+                standard_time = min(
+                    repeat(render_drf, number=1, repeat=options["repeat"])
+                )
+                if JSONRenderer().render(render()) != standard:
+                    raise CommandError(f"{name} output differs from DRF")
+                fast_time = min(repeat(render, number=1, repeat=options["repeat"]))
+
+                self.stdout.write(
+                    f"{name} ({len(objs)} objects): "
+                    f"DRF {standard_time * 1000:.2f} ms, "
+                    f"fast {fast_time * 1000:.2f} ms "
+                    f"({standard_time / fast_time:.1f}x)"
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,55 @@
+from accounts.models import User
+from companies.functions import import_companies
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.exceptions import ValidationError
+import json
+
+
+class Command(BaseCommand):
+    """
+    Imports companies from a newline delimited JSON file.
+
+    Each line holds one company in the same format as the 'companies/create' request.
+    Usage: 'python manage.py import_companies companies.ndjson --username admin'
+    """
+
+    help = "Creates companies from a newline delimited JSON file"
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Path of the NDJSON file")
+        parser.add_argument(
+            "--username",
+            required=True,
+            help="User set as the admin of the imported companies",
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of companies written per transaction",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options["username"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['username']}' does not exist")
+
+        with open(options["path"], "rb") as ndjson_file:
+            try:
+                report = import_companies(
+                    lines=ndjson_file, user=user, chunk_size=options["chunk_size"]
+                )
+            except ValidationError as e:
+                # The chart of accounts template can not be provisioned
+                raise CommandError(json.dumps(e.detail))
+
+        for error in report["errors"]:
+            self.stderr.write(f"Line {error['line']}: {json.dumps(error['errors'])}")
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Created {report['created']} companies, "
+                f"skipped {len(report['errors'])} invalid lines"
+            )
+        )
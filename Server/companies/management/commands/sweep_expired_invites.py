@@ -0,0 +1,16 @@
+from companies.functions import sweep_expired_invites
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    """
+    Deletes expired company invites.
+
+    Meant to be scheduled, e.g. hourly from cron: 'python manage.py sweep_expired_invites'
+    """
+
+    help = "Deletes expired company invites"
+
+    def handle(self, *args, **options):
+        removed = sweep_expired_invites()
+        self.stdout.write(self.style.SUCCESS(f"Removed {removed} expired invites"))
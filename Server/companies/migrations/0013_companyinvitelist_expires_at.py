@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.db import migrations, models
+from django.db.models import F
+import django.utils.timezone
+
+
+def backfill_expires_at(apps, schema_editor):
+    """
+    Existing invites keep their seven (7) day validity, counted from their latest change.
+    """
+    CompanyInviteList = apps.get_model("companies", "CompanyInviteList")
+    CompanyInviteList.objects.update(expires_at=F("updated_at") + timedelta(days=7))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0012_auto_20220102_1606'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companyinvitelist',
+            name='expires_at',
+            field=models.DateTimeField(db_index=True, default=django.utils.timezone.now, editable=False, verbose_name='Invite expiration'),
+            preserve_default=False,
+        ),
+        migrations.RunPython(backfill_expires_at, migrations.RunPython.noop),
+    ]
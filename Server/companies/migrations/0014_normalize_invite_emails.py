@@ -0,0 +1,43 @@
+from django.db import migrations
+
+
+def normalize_invite_emails(apps, schema_editor):
+    """
+    Lower cases the stored invite emails.
+
+    Invites which now clash on the email and company combination are merged,
+    keeping the most recently updated one.
+    """
+    CompanyInviteList = apps.get_model("companies", "CompanyInviteList")
+
+    seen = set()
+    duplicate_ids = []
+    renamed_invites = []
+    for invite in CompanyInviteList.objects.order_by("-updated_at", "-id").only(
+        "id", "email", "admin_in_id", "viewer_in_id"
+    ):
+        email = invite.email.lower()
+        key = (email, invite.admin_in_id or invite.viewer_in_id)
+        if key in seen:
+            duplicate_ids.append(invite.id)
+            continue
+        seen.add(key)
+        if invite.email != email:
+            invite.email = email
+            renamed_invites.append(invite)
+
+    # Remove the duplicates first, so the renames do not hit the unique constraint
+    for i in range(0, len(duplicate_ids), 500):
+        CompanyInviteList.objects.filter(id__in=duplicate_ids[i : i + 500]).delete()
+    CompanyInviteList.objects.bulk_update(renamed_invites, ["email"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0013_companyinvitelist_expires_at'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_invite_emails, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.8 on 2026-10-18 19:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('general_ledger', '0004_chart_of_accounts_templates'),
+        ('companies', '0014_normalize_invite_emails'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companies',
+            name='chart_of_accounts',
+            field=models.ManyToManyField(blank=True, related_name='company_chart_of_accounts_set', to='general_ledger.GeneralLedgerCodes'),
+        ),
+    ]
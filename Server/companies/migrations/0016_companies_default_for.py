@@ -0,0 +1,21 @@
+# Generated by Django 3.2.8 on 2026-10-18 19:58
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('companies', '0015_companies_chart_of_accounts'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companies',
+            name='default_for',
+            field=models.OneToOneField(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='default_company', to=settings.AUTH_USER_MODEL),
+        ),
+    ]
@@ -0,0 +1,135 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import migrations
+
+# Copied from Companies.DEFAULT_COMPANY_NAME, so later model changes do not alter this migration
+DEFAULT_COMPANY_NAME = "Rental Business"
+
+# A container was saved in the same request as its building, and never edited afterwards
+CREATION_WINDOW = timedelta(minutes=1)
+
+
+def consolidate_container_companies(apps, schema_editor):
+    """
+    Merges the container companies created for buildings without a company.
+
+    The name alone does not tell a container from a real company named "Rental Business".
+    Containers are the companies of that name which still have the exact shape of their
+    creation: no other data, a single admin, and a single building saved with the
+    company and never edited afterwards. Any other company of that name is left alone,
+    to be merged by hand if it is a container after all.
+
+    The oldest container of each user becomes the user's default company and receives
+    the buildings of the other containers, which are then removed with their general
+    ledger accounts.
+    """
+    Companies = apps.get_model("companies", "Companies")
+    CompanyInviteList = apps.get_model("companies", "CompanyInviteList")
+    Buildings = apps.get_model("buildings", "Buildings")
+    EffectiveRoles = apps.get_model("roles", "EffectiveRoles")
+    GeneralLedgerCodes = apps.get_model("general_ledger", "GeneralLedgerCodes")
+
+    candidate_ids = set(
+        Companies.objects.filter(business_name=DEFAULT_COMPANY_NAME).values_list(
+            "id", flat=True
+        )
+    )
+    containers = Companies.objects.filter(
+        id__in=candidate_ids,
+        legal_name="",
+        business_address__isnull=True,
+        mailing_address__isnull=True,
+        default_for__isnull=True,
+        accounts_payable_extension=False,
+        accounts_receivable_extension=False,
+        maintenance_extension=False,
+    )
+    for relation in ("contacts", "notes", "documents", "images", "allowed_viewers"):
+        containers = containers.exclude(
+            id__in=getattr(Companies, relation).through.objects.values("companies_id")
+        )
+    containers = containers.exclude(
+        id__in=CompanyInviteList.objects.filter(admin_in__isnull=False).values(
+            "admin_in_id"
+        )
+    ).exclude(
+        id__in=CompanyInviteList.objects.filter(viewer_in__isnull=False).values(
+            "viewer_in_id"
+        )
+    )
+    timestamps = {
+        company_id: (created_at, updated_at)
+        for company_id, created_at, updated_at in containers.values_list(
+            "id", "created_at", "updated_at"
+        )
+    }
+
+    admins = defaultdict(list)
+    for company_id, user_id in Companies.allowed_admins.through.objects.filter(
+        companies_id__in=timestamps
+    ).values_list("companies_id", "user_id"):
+        admins[company_id].append(user_id)
+
+    buildings = defaultdict(list)
+    for company_id, created_at, updated_at in Buildings.objects.filter(
+        company_id__in=timestamps
+    ).values_list("company_id", "created_at", "updated_at"):
+        buildings[company_id].append((created_at, updated_at))
+
+    # Keep the containers of exactly one admin and one untouched building, grouped by admin
+    user_containers = defaultdict(list)
+    for company_id in sorted(timestamps):
+        created_at, updated_at = timestamps[company_id]
+        if (
+            len(admins[company_id]) == 1
+            and len(buildings[company_id]) == 1
+            and updated_at - created_at <= CREATION_WINDOW
+            and all(
+                abs(timestamp - created_at) <= CREATION_WINDOW
+                for timestamp in buildings[company_id][0]
+            )
+        ):
+            user_containers[admins[company_id][0]].append(company_id)
+
+    for user_id, company_ids in user_containers.items():
+        kept_id, duplicate_ids = company_ids[0], company_ids[1:]
+        Companies.objects.filter(id=kept_id).update(default_for_id=user_id)
+        if not duplicate_ids:
+            continue
+
+        # Move the buildings, with their building level roles, to the kept container
+        Buildings.objects.filter(company_id__in=duplicate_ids).update(
+            company_id=kept_id
+        )
+        EffectiveRoles.objects.filter(
+            company_id__in=duplicate_ids, building__isnull=False
+        ).update(company_id=kept_id)
+
+        # Remove the empty containers, then their general ledger accounts
+        gl_code_ids = set(
+            Companies.chart_of_accounts.through.objects.filter(
+                companies_id__in=duplicate_ids
+            ).values_list("generalledgercodes_id", flat=True)
+        )
+        for gl_codes in Companies.objects.filter(id__in=duplicate_ids).values_list(
+            "gl_code_id", "accounts_payable_gl_id", "accounts_receivable_gl_id"
+        ):
+            gl_code_ids.update(gl_codes)
+
+        Companies.objects.filter(id__in=duplicate_ids).delete()
+        GeneralLedgerCodes.objects.filter(id__in=gl_code_ids).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0004_buildings_chart_of_accounts'),
+        ('companies', '0016_companies_default_for'),
+        ('general_ledger', '0005_seed_chart_of_accounts_templates'),
+        ('roles', '0002_backfill_effective_roles'),
+    ]
+
+    operations = [
+        migrations.RunPython(consolidate_container_companies, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+import companies.models
+from django.db import migrations, models
+import secrets
+
+
+def generate_invite_tokens(apps, schema_editor):
+    """
+    Gives every existing invite its own token
+    """
+    CompanyInviteList = apps.get_model("companies", "CompanyInviteList")
+    invite_objs = list(CompanyInviteList.objects.all())
+    for invite_obj in invite_objs:
+        invite_obj.token = secrets.token_urlsafe(32)
+    CompanyInviteList.objects.bulk_update(invite_objs, ["token"], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('companies', '0017_consolidate_container_companies'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='companyinvitelist',
+            name='token',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(generate_invite_tokens, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='companyinvitelist',
+            name='token',
+            field=models.CharField(default=companies.models.generate_invite_token, editable=False, max_length=64, unique=True),
+        ),
+    ]
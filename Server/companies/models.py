@@ -8,6 +8,7 @@ from accounts.models import User
 from contacts.models import Addresses, Contacts
 from general_ledger.models import GeneralLedgerCodes
 from notes.models import Notes, TimeStampMixin
+import secrets
 
 # Create your models here.
 
@@ -43,6 +44,9 @@ class Companies(PackageExtensionsMixin, TimeStampMixin):
     Additionally, set base information
     """
 
+    # Name of the container company holding buildings created without a company
+    DEFAULT_COMPANY_NAME = "Rental Business"
+
     business_name = models.CharField(max_length=255, blank=False, default=None)
     legal_name = models.CharField(max_length=255, blank=True)
     business_address = models.ForeignKey(
@@ -75,12 +79,23 @@ class Companies(PackageExtensionsMixin, TimeStampMixin):
         related_name="accounts_receivable_gl_codes_set",
         on_delete=models.CASCADE,
     )
+    chart_of_accounts = models.ManyToManyField(
+        GeneralLedgerCodes, related_name="company_chart_of_accounts_set", blank=True
+    )
     allowed_admins = models.ManyToManyField(
         User, related_name="company_user_set", blank=True
     )
     allowed_viewers = models.ManyToManyField(
         User, related_name="company_viewers_set", blank=True
     )
+    default_for = models.OneToOneField(
+        User,
+        related_name="default_company",
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        editable=False,
+    )
     documents = models.ManyToManyField(
         Documents, related_name="company_documents_set", blank=True
     )
@@ -107,11 +122,33 @@ class Companies(PackageExtensionsMixin, TimeStampMixin):
         return self.__str__()
 
 
+class CompanyInviteListQuerySet(models.QuerySet):
+    """
+    Filters invites on their indexed expiration time
+    """
+
+    def active(self):
+        return self.filter(expires_at__gt=timezone.now())
+
+    def expired(self):
+        return self.filter(expires_at__lte=timezone.now())
+
+
+def generate_invite_token():
+    """
+    Returns a random, URL safe secret for an invite link
+    """
+    return secrets.token_urlsafe(32)
+
+
 class CompanyInviteList(TimeStampMixin):
     """
     Table to hold emailed invites for specific companies to various users and their expected roles
     """
 
+    # Invite links are valid for seven (7) days after the latest change
+    VALID_FOR = timedelta(days=7)
+
     email = models.EmailField("Invited user")
     admin_in = models.ForeignKey(
         Companies,
@@ -127,6 +164,16 @@ class CompanyInviteList(TimeStampMixin):
         blank=True,
         null=True,
     )
+    expires_at = models.DateTimeField(
+        "Invite expiration", db_index=True, editable=False
+    )
+    # Sent only in the invite link emailed to the address. Presenting it proves the
+    # registering or logging in user controls the address, see redeem_company_invites
+    token = models.CharField(
+        max_length=64, unique=True, editable=False, default=generate_invite_token
+    )
+
+    objects = CompanyInviteListQuerySet.as_manager()
 
     class Meta:
         verbose_name = "Company Invite List"
@@ -153,14 +200,25 @@ class CompanyInviteList(TimeStampMixin):
 
     def __str__(self):
         if self.admin_in:
-            return f"{self.email} - Admin Invitation - Valid until: {(self.updated_at + timedelta(days=7)).strftime('%b. %d, %Y - %I:%M %p UTC')}"
-        return f"{self.email} - Viewer Invitation - Valid until: {(self.updated_at + timedelta(days=7)).strftime('%b. %d, %Y - %I:%M %p UTC')}"
+            return f"{self.email} - Admin Invitation - Valid until: {self.expires_at.strftime('%b. %d, %Y - %I:%M %p UTC')}"
+        return f"{self.email} - Viewer Invitation - Valid until: {self.expires_at.strftime('%b. %d, %Y - %I:%M %p UTC')}"
+
+    def save(self, *args, **kwargs):
+        """
+        Normalizes the email. Every change to the invite restarts its validity period
+        """
+        # Emails are stored lower case, so lookups hit the (email, ...) unique index
+        self.email = self.email.lower()
+        self.expires_at = timezone.now() + self.VALID_FOR
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "email", "expires_at"}
+        return super().save(*args, **kwargs)
 
     @property
     def timeout(self):
         """
         Checks if the invite has is no longer valid. Invite links are valid for seven (7) days.
 
-        Uses the 'updated_at' field, which reflects when the latest changes were made.
+        Uses the indexed 'expires_at' field, which is reset whenever changes are made.
         """
-        return self.updated_at + timedelta(days=7) < timezone.now()
+        return self.expires_at <= timezone.now()
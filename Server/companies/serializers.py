@@ -1,7 +1,6 @@
 from accounts.serializers import UserReturnStringSerializer, UsernameSerializer
 from companies.models import Companies, CompanyInviteList
 from contacts.serializers import AddressSerializer, ContactSerializer
-from datetime import datetime, timedelta
 from documents.models import Documents
 from documents.serializers import (
     DocumentCreationSerializer,
@@ -33,6 +32,8 @@ class CompanyCreationSerializer(serializers.ModelSerializer):
             "contacts",
             "notes",
         )
+        # The model field has a default of None, which would otherwise make it optional
+        extra_kwargs = {"business_name": {"required": True}}
 
 
 class CompanyFullAdminSerializer(serializers.ModelSerializer):
@@ -77,6 +78,33 @@ class CompanyFullAdminSerializer(serializers.ModelSerializer):
         )
 
 
+class CompanyListSerializer(serializers.ModelSerializer):
+    """
+    Summarizes a company for the user's company listing.
+
+    The role and counts are annotations, see companies.functions.get_user_companies
+    """
+
+    role = serializers.CharField(read_only=True)
+    building_count = serializers.IntegerField(read_only=True)
+    document_count = serializers.IntegerField(read_only=True)
+    note_count = serializers.IntegerField(read_only=True)
+    user_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Companies
+        fields = (
+            "id",
+            "business_name",
+            "legal_name",
+            "role",
+            "building_count",
+            "document_count",
+            "note_count",
+            "user_count",
+        )
+
+
 ##############################################
 #     Invite User To Company Serializer      #
 ##############################################
@@ -91,6 +119,25 @@ class CompanyInviteListSerializer(serializers.ModelSerializer):
             "viewer_in",
         )
 
+    def validate_email(self, value):
+        return value.lower()
+
+
+class CompanyBulkInviteItemSerializer(serializers.Serializer):
+    email = serializers.EmailField(max_length=254)
+    admin_in = serializers.BooleanField()
+    viewer_in = serializers.BooleanField()
+
+    def validate_email(self, value):
+        return value.lower()
+
+
+class CompanyBulkInviteSerializer(serializers.Serializer):
+    # Entries are validated one by one, so each email gets its own outcome
+    invites = serializers.ListField(
+        child=serializers.DictField(), allow_empty=False, max_length=1000
+    )
+
 
 class CompanyNameSerializer(serializers.ModelSerializer):
     class Meta:
@@ -113,9 +160,7 @@ class CompanyInviteListActiveSerializer(serializers.ModelSerializer):
         )
 
     def get_valid_until(self, obj):
-        return (obj.updated_at + timedelta(days=7)).strftime(
-            "%b. %d, %Y - %I:%M %p UTC"
-        )
+        return obj.expires_at.strftime("%b. %d, %Y - %I:%M %p UTC")
 
 
 ##############################################
@@ -0,0 +1,80 @@
+from companies.cache import get_affected_company_ids, invalidate_company_details
+from companies.serializers import CompanyFullAdminSerializer
+from core.prefetch import get_rendered_models
+from django.db.models.signals import m2m_changed, post_save, pre_delete
+
+
+def invalidate_on_save(sender, instance, created, update_fields=None, **kwargs):
+    """
+    Invalidates the details of the companies rendering the saved object.
+
+    New objects are not linked to a company yet, the link itself invalidates the details.
+    """
+    if created:
+        return
+    # Logins only write 'last_login', which no company detail renders
+    if (update_fields is not None) and (set(update_fields) <= {"last_login"}):
+        return
+    invalidate_company_details(get_affected_company_ids(sender, [instance.pk]))
+
+
+def invalidate_on_delete(sender, instance, **kwargs):
+    """
+    Invalidates the details of the companies rendering the object, before its links are removed
+    """
+    invalidate_company_details(get_affected_company_ids(sender, [instance.pk]))
+
+
+def invalidate_on_m2m_change(
+    sender, instance, action, reverse, model, pk_set, **kwargs
+):
+    """
+    Invalidates the details of the companies rendering the object whose relation changed.
+
+    Clears are handled before the links are removed, while the affected objects can still be found.
+    """
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if not reverse:
+        owner_model, owner_ids = type(instance), [instance.pk]
+    elif action == "pre_clear":
+        # The instance is on the related side, find the objects it is about to be removed from
+        field_name = next(
+            field.name
+            for field in model._meta.many_to_many
+            if field.remote_field.through is sender
+        )
+        owner_model = model
+        owner_ids = list(
+            model._default_manager.filter(**{field_name: instance}).values_list(
+                "pk", flat=True
+            )
+        )
+    else:
+        owner_model, owner_ids = model, list(pk_set)
+
+    invalidate_company_details(get_affected_company_ids(owner_model, owner_ids))
+
+
+# The receivers follow the company detail serializer, so every rendered model is covered
+rendered_models = get_rendered_models(CompanyFullAdminSerializer)
+
+for rendered_model in rendered_models.lookups:
+    post_save.connect(
+        invalidate_on_save,
+        sender=rendered_model,
+        dispatch_uid=f"company-detail-save-{rendered_model._meta.label}",
+    )
+    pre_delete.connect(
+        invalidate_on_delete,
+        sender=rendered_model,
+        dispatch_uid=f"company-detail-delete-{rendered_model._meta.label}",
+    )
+
+for rendered_field in rendered_models.many_to_many:
+    m2m_changed.connect(
+        invalidate_on_m2m_change,
+        sender=rendered_field.remote_field.through,
+        dispatch_uid=f"company-detail-m2m-{rendered_field.remote_field.through._meta.label}",
+    )
@@ -0,0 +1,420 @@
+from accounts.tests.test_models import CreateUser
+from buildings.functions import create_buildings
+from companies.functions import (
+    create_companies,
+    import_companies,
+    populate_company_dict,
+)
+from companies.models import Companies
+from companies.tests.test_views import company_data
+from contacts.functions import populate_address_dict
+from contacts.models import Addresses
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from django.apps import apps
+from django.core.management import call_command
+from django.db import connection
+from django.db.models import F
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils.translation import gettext_lazy
+from io import BytesIO, StringIO
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from roles.models import EffectiveRoles
+from general_ledger.models import GeneralLedgerCodes
+from general_ledger.tests.test_functions import count_bulk_writes
+from importlib import import_module
+from tempfile import NamedTemporaryFile
+from unittest import mock
+from uuid import uuid4
+import json
+import os
+import pytz
+
+
+def company_lines(num_companies=1, **kwargs):
+    """
+    Returns NDJSON lines of random companies
+    """
+    return [json.dumps(company_data(**kwargs)) for _ in range(num_companies)]
+
+
+class CompanyImportTestCase(TestCase):
+    """
+    Tests the chunked NDJSON company import
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.u = CreateUser()
+        self.u.create_user()
+
+    def test_import_reports_invalid_lines_and_creates_the_rest(self):
+        """
+        Invalid lines are reported by line number, valid lines are all created
+        """
+        lines = company_lines(num_companies=5, num_contacts=2, num_notes=3)
+        lines.insert(1, "{not json")
+        lines.insert(3, json.dumps(dict(legal_name="Missing business name")))
+        lines.insert(4, "")
+        lines.insert(5, json.dumps(["not", "an", "object"]))
+
+        report = import_companies(lines=lines, user=self.u.user, chunk_size=2)
+
+        self.assertEqual(report["created"], 5, "Expected 5 companies created")
+        self.assertEqual(
+            [error["line"] for error in report["errors"]],
+            [2, 4, 6],
+            "Wrong invalid line numbers",
+        )
+        self.assertIn(
+            "business_name", report["errors"][1]["errors"], "Missing field not reported"
+        )
+
+        self.assertEqual(Companies.objects.count(), 5, "Expected 5 companies")
+        for company in Companies.objects.all():
+            self.assertEqual(company.contacts.count(), 2, "Contacts not linked")
+            self.assertEqual(company.notes.count(), 3, "Notes not linked")
+            self.assertEqual(
+                company.accounts_payable_gl.name,
+                "Accounts Payable",
+                "General ledgers not linked",
+            )
+            self.assertEqual(
+                company.gl_code.name, company.business_name, "Wrong general ledger"
+            )
+        self.assertEqual(
+            EffectiveRoles.objects.filter(
+                user=self.u.user, role=EffectiveRoles.RoleList.ADMIN
+            ).count(),
+            5,
+            "Importing user not indexed as admin of every company",
+        )
+
+    def test_import_write_count_grows_with_chunks_only(self):
+        """
+        Companies are written per chunk, not per company
+        """
+        # The larger import splits the chart of accounts insert into several SQLite batches
+        query_counts = []
+        for num_companies in (10, 40):
+            lines = company_lines(num_companies=num_companies)
+            with CaptureQueriesContext(connection) as queries:
+                report = import_companies(lines=lines, user=self.u.user, chunk_size=50)
+            self.assertEqual(report["created"], num_companies, "Import failed")
+            query_counts.append(count_bulk_writes(queries))
+
+        self.assertEqual(
+            query_counts[0], query_counts[1], "Write count grew with the companies"
+        )
+
+    def test_identical_addresses_are_stored_once(self):
+        """
+        Companies sharing an address, or using it for both addresses, reuse one row
+        """
+        address = dict(address_1="111 1st St. S", city="City", zipcode="55555")
+        lines = company_lines(num_companies=3)
+        lines = [
+            json.dumps(
+                {
+                    **json.loads(line),
+                    "business_address": address,
+                    "mailing_address": address,
+                }
+            )
+            for line in lines
+        ]
+
+        report = import_companies(lines=lines, user=self.u.user)
+
+        self.assertEqual(report["created"], 3, "Import failed")
+        self.assertEqual(
+            Addresses.objects.count(), 1, "Identical addresses were duplicated"
+        )
+        self.assertEqual(
+            Companies.objects.filter(business_address=F("mailing_address")).count(),
+            3,
+            "Companies do not share the address",
+        )
+
+    def test_import_command(self):
+        """
+        The management command imports a file and prints the summary
+        """
+        with NamedTemporaryFile("w", suffix=".ndjson", delete=False) as ndjson_file:
+            ndjson_file.write("\n".join(company_lines(num_companies=3) + ["{}"]))
+
+        out = StringIO()
+        err = StringIO()
+        try:
+            call_command(
+                "import_companies",
+                ndjson_file.name,
+                username=self.u.username,
+                stdout=out,
+                stderr=err,
+            )
+        finally:
+            os.remove(ndjson_file.name)
+
+        self.assertIn(
+            "Created 3 companies, skipped 1 invalid lines",
+            out.getvalue(),
+            "Wrong summary",
+        )
+        self.assertIn("Line 4", err.getvalue(), "Invalid line not reported")
+        self.assertEqual(Companies.objects.count(), 3, "Expected 3 companies")
+
+
+class ContainerCompanyConsolidationTestCase(TestCase):
+    """
+    Tests the migration merging the duplicate container companies of each user
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.u = CreateUser()
+        self.u.create_user()
+
+    def create_container(self, **kwargs):
+        """
+        Creates a container company the way buildings without a company used to
+        """
+        company_obj = create_companies(
+            companies=[
+                populate_company_dict(dict(business_name="Rental Business", **kwargs))
+            ],
+            user=self.u.user,
+        )[0]
+        create_buildings(
+            company_id=company_obj.pk,
+            buildings=[dict(name="Building", address=populate_address_dict(None))],
+            user=self.u.user,
+        )
+        return company_obj
+
+    def test_duplicate_containers_are_merged(self):
+        """
+        The oldest container keeps every building, used containers are left alone
+        """
+        containers = [self.create_container() for _ in range(3)]
+        used_company = self.create_container(
+            notes=[dict(note="Not an empty container")]
+        )
+        num_gl_codes = GeneralLedgerCodes.objects.count()
+
+        import_module(
+            "companies.migrations.0017_consolidate_container_companies"
+        ).consolidate_container_companies(apps, None)
+
+        kept = Companies.objects.get(default_for=self.u.user)
+        self.assertEqual(kept.id, containers[0].id, "Oldest container not kept")
+        self.assertEqual(
+            kept.buildings_company_set.count(),
+            3,
+            "Buildings not moved to the kept container",
+        )
+        self.assertFalse(
+            Companies.objects.filter(
+                id__in=[containers[1].id, containers[2].id]
+            ).exists(),
+            "Duplicate containers not removed",
+        )
+        self.assertTrue(
+            Companies.objects.filter(id=used_company.id).exists(),
+            "Used company removed",
+        )
+        self.assertEqual(
+            GeneralLedgerCodes.objects.count(),
+            num_gl_codes - 2 * kept.chart_of_accounts.count(),
+            "General ledger accounts of the removed containers remain",
+        )
+        self.assertTrue(
+            EffectiveRoles.objects.filter(
+                user=self.u.user,
+                company=kept,
+                building__isnull=True,
+                role=EffectiveRoles.RoleList.ADMIN,
+            ).exists(),
+            "Admin role of the kept container lost",
+        )
+
+    def test_real_companies_with_the_container_name_are_kept(self):
+        """
+        Companies named like containers, but used or edited afterwards, are kept
+        """
+        container = self.create_container()
+        two_buildings = self.create_container()
+        create_buildings(
+            company_id=two_buildings.pk,
+            buildings=[dict(name="Second", address=populate_address_dict(None))],
+            user=self.u.user,
+        )
+        edited = self.create_container()
+        Companies.objects.filter(id=edited.id).update(
+            updated_at=F("created_at") + timedelta(days=1)
+        )
+        no_buildings = create_companies(
+            companies=[populate_company_dict(dict(business_name="Rental Business"))],
+            user=self.u.user,
+        )[0]
+
+        import_module(
+            "companies.migrations.0017_consolidate_container_companies"
+        ).consolidate_container_companies(apps, None)
+
+        self.assertEqual(
+            Companies.objects.get(default_for=self.u.user).id,
+            container.id,
+            "Container not kept as the default company",
+        )
+        for company in (two_buildings, edited, no_buildings):
+            self.assertTrue(
+                Companies.objects.filter(id=company.id, default_for=None).exists(),
+                "Real company consolidated",
+            )
+        self.assertEqual(
+            two_buildings.buildings_company_set.count(),
+            2,
+            "Buildings of a real company moved",
+        )
+
+
+class CompanyJSONRenderingTestCase(TestCase):
+    """
+    Tests that the orjson renderer and parser match the DRF JSON classes
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        pass
+
+    def test_renderer_output_matches_drf(self):
+        """
+        Payloads with datetimes, decimals, lazy strings and line separators give the same bytes
+        """
+        payloads = (
+            dict(
+                created_at=datetime(2022, 1, 16, 23, 1, 2, 345678, tzinfo=pytz.utc),
+                local_time=datetime(2022, 1, 16, 23, 1, 2),
+                day=date(2022, 1, 16),
+                time=time(23, 1, 2, 345678),
+                amount=Decimal("1250.10"),
+                duration=timedelta(days=1, seconds=5),
+                uuid=uuid4(),
+                label=gettext_lazy("Company"),
+                note="Line\u2028separator and unicode é",
+                document="/media/documents/Test_File.pdf",
+                numbers={1: "one", 2: ("two", 2.5)},
+                nested=[None, True, {"empty": []}],
+            ),
+            None,
+            [],
+        )
+
+        for payload in payloads:
+            self.assertEqual(
+                ORJSONRenderer().render(payload),
+                JSONRenderer().render(payload),
+                "Rendered JSON differs",
+            )
+
+        self.assertEqual(
+            ORJSONRenderer().render(payloads[0], "application/json; indent=4"),
+            JSONRenderer().render(payloads[0], "application/json; indent=4"),
+            "Indented JSON differs",
+        )
+
+    def test_renderer_floats_match_drf(self):
+        """
+        Floats orjson writes differently go through the DRF renderer, NaN alongside
+        other floats still raises
+        """
+        payload = dict(
+            floats=[0.0, -0.0, 0.0001, 2.5, 9999999999999998.0, 1e16, 1e-05, -1.5e300],
+            nested={"rows": ({"value": 2.5e-07},)},
+            text="1e16 0.00001 null",
+        )
+        self.assertEqual(
+            ORJSONRenderer().render(payload),
+            JSONRenderer().render(payload),
+            "Rendered floats differ",
+        )
+        for value in (float("nan"), float("inf")):
+            with self.assertRaises(ValueError):
+                ORJSONRenderer().render(dict(value=value, other=1.5, missing=None))
+
+    def test_renderer_skips_the_float_walk_without_floats(self):
+        """
+        Payloads without floats are not walked, nulls and times do not count as floats
+        """
+        payload = dict(
+            count=3,
+            missing=None,
+            rows=[None, {"name": "Unit 2.5", "at": time(10, 5, 1, 500000)}],
+            created_at=datetime(2022, 1, 16, 23, 1, 2, 345678, tzinfo=pytz.utc),
+        )
+        with mock.patch("core.renderers.has_unsafe_float") as has_unsafe_float:
+            ORJSONRenderer().render(payload)
+            has_unsafe_float.assert_not_called()
+
+            has_unsafe_float.return_value = False
+            for value in (1.5, [1, 1.5], dict(value=1e-05)):
+                ORJSONRenderer().render(value)
+            self.assertEqual(has_unsafe_float.call_count, 3, "Floats were not walked")
+
+    def test_parser_output_matches_drf(self):
+        """
+        Request bodies parse to the same data, and invalid bodies raise the same error
+        """
+        body = json.dumps(
+            dict(name="Test é", big=2**70, amount=1250.1, items=[1, None, True])
+        ).encode()
+
+        self.assertEqual(
+            ORJSONParser().parse(BytesIO(body)),
+            JSONParser().parse(BytesIO(body)),
+            "Parsed data differs",
+        )
+        for invalid in (b"{", b'{"value": NaN}'):
+            with self.assertRaises(ParseError):
+                ORJSONParser().parse(BytesIO(invalid))
+
+    def test_benchmark_command(self):
+        """
+        The benchmark compares both renderers without keeping the benchmark company
+        """
+        out = StringIO()
+        call_command("benchmark_company_json", children=3, repeat=1, stdout=out)
+
+        self.assertIn("Render: json", out.getvalue(), "Render timing missing")
+        self.assertIn("Parse: json", out.getvalue(), "Parse timing missing")
+        self.assertFalse(
+            Companies.objects.filter(business_name="Benchmark Company").exists(),
+            "Benchmark company was kept",
+        )
@@ -1,16 +1,31 @@
 from accounts.tests.test_models import CreateUser
+from accounts.models import User
 from accounts.tests.test_views import CreateCustomerViews
-from companies.models import CompanyInviteList
+from buildings.functions import create_buildings
+from buildings.tests.test_views import building_no_company_data
+from companies.cache import bump_company_versions
+from companies.checks import check_company_cache
+from companies.models import Companies, CompanyInviteList
+from companies.serializers import CompanyFullAdminSerializer
 from companies.tests.test_models import create_company_invite, create_company_obj
+from contacts.models import Contacts
 from contacts.tests.test_views import get_address_data, get_contact_data
+from core.functions import bulk_create_with_pks
 from core.settings import BASE_DIR
 from datetime import datetime, timedelta
+from django.core.cache import caches
 from django.core.files.uploadedfile import SimpleUploadedFile
-from django.test import Client, TestCase
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
+from documents.models import Documents, Images
+from io import StringIO
 from os import listdir
 from os import remove as os_remove
 from os.path import join as os_join
+from notes.models import Notes
 from notes.tests.generic_functions import (
     random_bell_curve_int,
     random_string,
@@ -191,6 +206,78 @@ class CompaniesViewsTestCase(TestCase):
             res.data["maintenance_extension"], "Maintenance expansion not False"
         )
 
+    def test_company_creation_query_count_does_not_grow_with_children(self):
+        """
+        Contacts, notes and their relations are inserted in bulk, and loaded back
+        for the response with a constant number of queries
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        query_counts = []
+        for num_children in (1, 1, 25):
+            with CaptureQueriesContext(connection) as queries:
+                res = c.client.post(
+                    path="/companies/create",
+                    data=company_data(
+                        num_contacts=num_children, num_notes=num_children
+                    ),
+                    content_type="application/json",
+                )
+            self.assertEqual(
+                res.status_code, 201, f"Expected 201. Got {res.status_code}"
+            )
+            self.assertEqual(
+                len(res.data["contacts"]), num_children, "Contacts were not all linked"
+            )
+            self.assertEqual(
+                len(res.data["notes"]), num_children, "Notes were not all linked"
+            )
+            query_counts.append(len(queries))
+
+        # The first request also authenticates the token, compare the later ones
+        self.assertEqual(
+            query_counts[1], query_counts[2], "Query count grew with the children"
+        )
+
+    def test_company_import(self):
+        """
+        Imports companies from an NDJSON upload, reporting the invalid lines
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        lines = [json.dumps(company_data()) for _ in range(3)]
+        lines.insert(1, json.dumps(dict(business_name="")))
+
+        res = c.client.post(
+            path="/companies/import",
+            data="\n".join(lines),
+            content_type="application/x-ndjson",
+        )
+
+        self.assertEqual(res.status_code, 201, f"Expected 201. Got {res.status_code}")
+        self.assertEqual(res.data["created"], 3, "Expected 3 companies created")
+        self.assertEqual(
+            [error["line"] for error in res.data["company-errors"]],
+            [2],
+            "Wrong invalid line numbers",
+        )
+        self.assertEqual(
+            c.user.company_user_set.count(), 3, "User not admin of the companies"
+        )
+
+        res = c.client.post(
+            path="/companies/import",
+            data="{}",
+            content_type="application/x-ndjson",
+        )
+
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+        self.assertEqual(res.data["created"], 0, "No companies should be created")
+
     def test_company_creation_with_no_address_information(self):
         """
         Tests that no address is created if no information is passed. Test one address as null and the other full of blanks
@@ -352,6 +439,21 @@ class CompaniesInviteListTestCase(TestCase):
 
         self.assertEqual(res.status_code, 201, f"Expected 201. Got {res.status_code}")
 
+        # Expired invites are filtered in the database, and only removed by the sweeper
+        self.assertEqual(
+            CompanyInviteList.objects.count(), 4, "Invites removed outside the sweeper"
+        )
+        self.assertEqual(
+            CompanyInviteList.objects.active().count(), 2, "Expected 2 active invites"
+        )
+        self.assertEqual(
+            CompanyInviteList.objects.expired().count(), 2, "Expected 2 expired invites"
+        )
+
+        out = StringIO()
+        call_command("sweep_expired_invites", stdout=out)
+        self.assertIn("Removed 2 expired invites", out.getvalue(), "Wrong sweep output")
+
         # Get updated invites queryset
         invites = CompanyInviteList.objects.all()
 
@@ -365,6 +467,89 @@ class CompaniesInviteListTestCase(TestCase):
                 "Remaining invite not meeting time criterium. Check the model timeout amount",
             )
 
+    def test_expired_invite_is_refreshed_by_new_invite(self):
+        """
+        Re-inviting an email with an expired invite, not yet swept, restarts the same invite
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        company = create_company_obj()
+        company.allowed_admins.add(c.user)
+
+        mocked = datetime.now(tz=pytz.utc) - timedelta(days=8)
+        with mock.patch("django.utils.timezone.now", mock.Mock(return_value=mocked)):
+            invite = create_company_invite(
+                company_obj=company,
+                email="test@email.com",
+                admin_in=False,
+                viewer_in=True,
+            )
+        # Invite to another company must not interfere
+        create_company_invite(email="test@email.com")
+
+        self.assertTrue(invite.timeout, "Invite should have expired")
+
+        res = c.client.post(
+            path=f"/companies/invite/{company.id}",
+            data=dict(email="test@email.com", admin_in=True, viewer_in=False),
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, 201, f"Expected 201. Got {res.status_code}")
+        invite.refresh_from_db()
+        self.assertFalse(invite.timeout, "Invite validity was not restarted")
+        self.assertEqual(invite.admin_in, company, "Invite role was not updated")
+        self.assertIsNone(invite.viewer_in, "Invite role was not updated")
+        self.assertEqual(
+            CompanyInviteList.objects.filter(email="test@email.com").count(),
+            2,
+            "Expected one invite per company",
+        )
+
+    def test_invite_matches_emails_case_insensitively(self):
+        """
+        Invites find existing users and pending invites regardless of the email case
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        company = create_company_obj()
+        company.allowed_admins.add(c.user)
+
+        viewer = CreateUser(
+            username="viewer", email="Viewer@Email.com", password="password"
+        )
+        viewer.create_user()
+        company.allowed_viewers.add(viewer.user)
+
+        res = c.client.post(
+            path=f"/companies/invite/{company.id}",
+            data=dict(email="VIEWER@email.COM", admin_in=False, viewer_in=True),
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+        self.assertIn("existing-viewer", res.data, "Existing user was not matched")
+
+        for email in ("New@Email.com", "new@EMAIL.com"):
+            res = c.client.post(
+                path=f"/companies/invite/{company.id}",
+                data=dict(email=email, admin_in=False, viewer_in=True),
+                content_type="application/json",
+            )
+            self.assertEqual(
+                res.status_code, 201, f"Expected 201. Got {res.status_code}"
+            )
+
+        self.assertEqual(
+            list(CompanyInviteList.objects.values_list("email", flat=True)),
+            ["new@email.com"],
+            "Invite emails were not normalized into a single invite",
+        )
+
     def test_invite_for_non_existant_company(self):
         """
         Verifies response when a non-existant company invite is sent
@@ -1179,6 +1364,329 @@ class CompaniesInviteListTestCase(TestCase):
         )
 
 
+class CompaniesBulkInviteTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        pass
+
+    def test_bulk_invite_outcomes_match_single_invites(self):
+        """
+        Each email gets the same outcome as the single invite endpoint, in the order sent
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        company = create_company_obj(random_info=False)
+        company.allowed_admins.add(c.user)
+
+        viewer = CreateUser(
+            username="viewer", email="viewer@email.com", password="password"
+        )
+        viewer.create_user()
+        company.allowed_viewers.add(viewer.user)
+
+        existing_invite = create_company_invite(
+            company_obj=company, email="pending@email.com"
+        )
+
+        res = c.client.post(
+            path=f"/companies/invite/{company.id}/bulk",
+            data=dict(
+                invites=[
+                    dict(email="new@email.com", admin_in=True, viewer_in=False),
+                    dict(email="viewer@email.com", admin_in=False, viewer_in=True),
+                    dict(email="pending@email.com", admin_in=True, viewer_in=False),
+                    dict(email="clash@email.com", admin_in=True, viewer_in=True),
+                    dict(email="not-an-email", admin_in=True, viewer_in=False),
+                ]
+            ),
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, 201, f"Expected 201. Got {res.status_code}")
+        outcomes = res.data["invites"]
+        self.assertEqual(len(outcomes), 5, "Expected one outcome per invite")
+
+        self.assertEqual(outcomes[0]["email"], "new@email.com", "Wrong invite email")
+        self.assertEqual(
+            outcomes[0]["admin_in"]["company_name"],
+            "Test | Test LLC",
+            "Admin invite not set",
+        )
+        self.assertIn("existing-viewer", outcomes[1], "Did not find expected key")
+        self.assertEqual(
+            outcomes[1]["existing-email"], "viewer@email.com", "Wrong existing email"
+        )
+        self.assertIsNone(outcomes[2]["viewer_in"], "Pending invite not updated")
+        self.assertIn("invalid-invite", outcomes[3], "Clashing roles not reported")
+        self.assertIn("invite-error", outcomes[4], "Invalid email not reported")
+
+        self.assertEqual(
+            CompanyInviteList.objects.count(), 2, "Expected 2 invites to be stored"
+        )
+        existing_invite.refresh_from_db()
+        self.assertEqual(
+            existing_invite.admin_in, company, "Existing invite was not updated"
+        )
+
+    def test_bulk_invite_query_count_does_not_grow_with_emails(self):
+        """
+        Users, roles and invites are resolved with set-based queries
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        company = create_company_obj()
+        company.allowed_admins.add(c.user)
+
+        query_counts = []
+        for num_emails in (2, 2, 20):
+            # Half of the invites are pending, the other half are new
+            emails = [f"{random_string()}@email.com" for _ in range(num_emails)]
+            for email in emails[::2]:
+                create_company_invite(company_obj=company, email=email)
+
+            with CaptureQueriesContext(connection) as queries:
+                res = c.client.post(
+                    path=f"/companies/invite/{company.id}/bulk",
+                    data=dict(
+                        invites=[
+                            dict(email=email, admin_in=False, viewer_in=True)
+                            for email in emails
+                        ]
+                    ),
+                    content_type="application/json",
+                )
+            self.assertEqual(res.status_code, 201, "Bulk invite failed")
+            query_counts.append(len(queries))
+
+        # The first request also authenticates the token, compare the later ones
+        self.assertEqual(
+            query_counts[1], query_counts[2], "Query count grew with the emails"
+        )
+
+    def test_bulk_invite_requires_company_admin(self):
+        """
+        Viewers can not send invites
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        company = create_company_obj()
+        company.allowed_viewers.add(c.user)
+
+        res = c.client.post(
+            path=f"/companies/invite/{company.id}/bulk",
+            data=dict(
+                invites=[dict(email="test@email.com", admin_in=True, viewer_in=False)]
+            ),
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+        self.assertIn("invite-error", res.data, "Did not find expected key")
+        self.assertFalse(CompanyInviteList.objects.exists(), "Invite was stored")
+
+
+def add_company_children(company_obj=None, user=None, num_children=1):
+    """
+    Fills every relation rendered by the full company serializer with 'num_children' objects
+    """
+
+    def notes():
+        return bulk_create_with_pks(
+            Notes,
+            [Notes(note=random_sentence(), user=user) for _ in range(num_children)],
+        )
+
+    for gl_code_obj in (
+        company_obj.gl_code,
+        company_obj.accounts_payable_gl,
+        company_obj.accounts_receivable_gl,
+    ):
+        gl_code_obj.notes.add(*notes())
+
+    company_obj.contacts.add(
+        *[
+            Contacts.objects.create(name_last=random_string())
+            for _ in range(num_children)
+        ]
+    )
+    company_obj.allowed_viewers.add(
+        *[
+            User.objects.create(username=random_string(length=24))
+            for _ in range(num_children)
+        ]
+    )
+    company_obj.notes.add(*notes())
+
+    for _ in range(num_children):
+        document_obj = Documents.objects.create(
+            name="Test", document="documents/test.pdf", uploaded_by=user
+        )
+        document_obj.notes.add(*notes())
+        company_obj.documents.add(document_obj)
+
+        image_obj = Images.objects.create(
+            name="Test", image="images/test.png", uploaded_by=user
+        )
+        image_obj.notes.add(*notes())
+        company_obj.images.add(image_obj)
+
+
+class CompanyListViewsTestCase(TestCase):
+    """
+    Tests the listing of the user's companies with their counts
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.c = CreateCustomerViews()
+        self.c.create_user()
+        self.c.login()
+
+    def add_companies(self, num_companies=1, num_children=1):
+        """
+        Creates companies with children, the user is admin of the even ones and viewer of the others
+        """
+        company_objs = []
+        for i in range(num_companies):
+            company_obj = create_company_obj()
+            if i % 2:
+                company_obj.allowed_viewers.add(self.c.user)
+            else:
+                company_obj.allowed_admins.add(self.c.user)
+            add_company_children(
+                company_obj=company_obj, user=self.c.user, num_children=num_children
+            )
+            create_buildings(
+                company_id=company_obj.id,
+                buildings=[building_no_company_data() for _ in range(num_children)],
+                user=self.c.user,
+            )
+            company_objs.append(company_obj)
+        return company_objs
+
+    def test_companies_are_listed_with_counts(self):
+        """
+        Every company with a role is listed once, with its role and counts
+        """
+        company_objs = self.add_companies(num_companies=3, num_children=2)
+        # Companies without a role are not listed
+        self.add_companies(num_companies=1)[0].allowed_admins.remove(self.c.user)
+
+        res = self.c.client.get(path="/companies/")
+
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+        self.assertIsNone(res.data["next"], "Expected a single page")
+        self.assertEqual(
+            [company["id"] for company in res.data["results"]],
+            [
+                company_obj.id
+                for company_obj in sorted(
+                    company_objs,
+                    key=lambda company_obj: (company_obj.business_name, company_obj.id),
+                )
+            ],
+            "Companies were not listed by name",
+        )
+
+        for company in res.data["results"]:
+            company_obj = Companies.objects.get(id=company["id"])
+            self.assertEqual(
+                company["role"],
+                "viewer" if company_obj.id == company_objs[1].id else "admin",
+                "Wrong role",
+            )
+            self.assertEqual(
+                company["building_count"],
+                company_obj.buildings_company_set.count(),
+                "Wrong building count",
+            )
+            self.assertEqual(
+                company["document_count"],
+                company_obj.documents.count(),
+                "Wrong document count",
+            )
+            self.assertEqual(
+                company["note_count"], company_obj.notes.count(), "Wrong note count"
+            )
+            self.assertEqual(
+                company["user_count"],
+                company_obj.allowed_admins.count()
+                + company_obj.allowed_viewers.count(),
+                "Wrong user count",
+            )
+
+    def test_company_list_query_count_does_not_grow_with_companies(self):
+        """
+        A page is read with one query, whatever the number of companies and children
+        """
+        query_counts = []
+        for num_companies in (1, 1, 10):
+            self.add_companies(num_companies=num_companies, num_children=3)
+            with CaptureQueriesContext(connection) as queries:
+                res = self.c.client.get(path="/companies/")
+            self.assertEqual(
+                res.status_code, 200, f"Expected 200. Got {res.status_code}"
+            )
+            query_counts.append(len(queries))
+
+        self.assertEqual(len(res.data["results"]), 12, "Companies missing")
+        # The first request also authenticates the token, compare the later ones
+        self.assertEqual(
+            query_counts[1], query_counts[2], "Query count grew with the companies"
+        )
+        self.assertEqual(query_counts[2], 1, "Expected a single query")
+
+    def test_company_list_pages(self):
+        """
+        Companies are paged by name, following the next links
+        """
+        company_objs = self.add_companies(num_companies=5)
+
+        ids = []
+        res = self.c.client.get(path="/companies/?page_size=2&fields=id,role")
+        ids.extend(company["id"] for company in res.data["results"])
+        while res.data["next"]:
+            res = self.c.client.get(res.data["next"])
+            self.assertEqual(
+                list(res.data["results"][0]), ["id", "role"], "Fieldset was lost"
+            )
+            ids.extend(company["id"] for company in res.data["results"])
+
+        self.assertEqual(
+            sorted(ids),
+            sorted(company_obj.id for company_obj in company_objs),
+            "Pages did not list every company once",
+        )
+
+    def test_unauthenticated_user_can_not_list_companies(self):
+        """
+        Listing requires an authenticated user
+        """
+        res = Client().get(path="/companies/")
+
+        self.assertEqual(res.status_code, 401, f"Expected 401. Got {res.status_code}")
+
+
 class CompanyUploadDocumentsTestCase(TestCase):
     @classmethod
     def setUpTestData(cls) -> None:
@@ -1235,6 +1743,57 @@ class CompanyUploadDocumentsTestCase(TestCase):
             if f.startswith("Test_File"):
                 os_remove(os_join(BASE_DIR, f"public/media/documents/{f}"))
 
+    def test_upload_response_query_count_does_not_grow_with_children(self):
+        """
+        The full company response loads all nested relations with a constant number of queries
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        query_counts = []
+        for num_children in (1, 1, 10):
+            company = create_company_obj()
+            company.allowed_admins.add(c.user)
+            add_company_children(
+                company_obj=company, user=c.user, num_children=num_children
+            )
+
+            with CaptureQueriesContext(connection) as queries:
+                res = c.client.post(
+                    path=f"/companies/{company.id}/upload-document",
+                    data=dict(
+                        name="Test",
+                        document=SimpleUploadedFile(
+                            name="Test File.pdf",
+                            content=b"This is a test PDF.",
+                            content_type="application/pdf",
+                        ),
+                    ),
+                )
+            self.assertEqual(
+                res.status_code, 201, f"Expected 201. Got {res.status_code}"
+            )
+            self.assertEqual(
+                len(res.data["documents"]), num_children + 1, "Documents missing"
+            )
+            self.assertEqual(
+                len(res.data["images"][0]["notes"]), num_children, "Image notes missing"
+            )
+            self.assertEqual(
+                len(res.data["gl_code"]["notes"]), num_children, "Ledger notes missing"
+            )
+            query_counts.append(len(queries))
+
+        for f in listdir(os_join(BASE_DIR, "public/media/documents")):
+            if f.startswith("Test_File"):
+                os_remove(os_join(BASE_DIR, f"public/media/documents/{f}"))
+
+        # The first request also authenticates the token, compare the later ones
+        self.assertEqual(
+            query_counts[1], query_counts[2], "Query count grew with the children"
+        )
+
     def test_upload_document_fails_with_user_not_admin_in_company(self):
         """
         Document uploads fails when user does not have admin permissions
@@ -1348,3 +1907,276 @@ class CompanyUploadDocumentsTestCase(TestCase):
             "not_authenticated",
             "Did not receive the correct error code",
         )
+
+
+class CompanyDetailViewsTestCase(TestCase):
+    """
+    Tests the cached company details endpoint
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        # Company IDs are reused between tests, drop the versions of earlier tests
+        caches["default"].clear()
+
+        self.c = CreateCustomerViews()
+        self.c.create_user()
+        self.c.login()
+
+        self.company = create_company_obj(random_info=False)
+        self.company.allowed_admins.add(self.c.user)
+        add_company_children(company_obj=self.company, user=self.c.user)
+
+    def get_company(self, etag=None, query=""):
+        if etag is None:
+            return self.c.client.get(path=f"/companies/{self.company.id}{query}")
+        return self.c.client.get(
+            path=f"/companies/{self.company.id}{query}", HTTP_IF_NONE_MATCH=etag
+        )
+
+    def test_admin_gets_company_details(self):
+        """
+        Admins get the full company details, with an ETag
+        """
+        res = self.get_company()
+
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+        self.assertEqual(
+            res.data,
+            CompanyFullAdminSerializer(Companies.objects.get(id=self.company.id)).data,
+            "Details do not match the company serializer",
+        )
+        self.assertTrue(res.has_header("ETag"), "ETag header missing")
+
+    def test_viewer_can_not_get_company_details(self):
+        """
+        Viewers and users without a role get the invalid permission response
+        """
+        self.company.allowed_admins.remove(self.c.user)
+        self.company.allowed_viewers.add(self.c.user)
+
+        res = self.get_company()
+
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+        self.assertIn("invite-error", res.data, "Did not find expected key")
+
+        res = self.c.client.get(path="/companies/999999")
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+
+    def test_cached_details_only_check_the_role(self):
+        """
+        Repeated requests are answered from the cache, after the single role query
+        """
+        first = self.get_company()
+
+        with self.assertNumQueries(1):
+            res = self.get_company()
+
+        self.assertEqual(res.data, first.data, "Cached details differ")
+        self.assertEqual(res["ETag"], first["ETag"], "ETag changed without a change")
+
+    def test_matching_etag_gets_not_modified(self):
+        """
+        Sending the current ETag back returns an empty 304 response
+        """
+        etag = self.get_company()["ETag"]
+
+        res = self.get_company(etag=etag)
+
+        self.assertEqual(res.status_code, 304, f"Expected 304. Got {res.status_code}")
+        self.assertFalse(res.content, "304 response had a body")
+        self.assertEqual(res["ETag"], etag, "ETag not returned")
+
+        res = self.get_company(etag='"outdated"')
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+
+    def test_per_process_cache_is_refused(self):
+        """
+        Without a shared cache the details are rendered each time, without an ETag
+        """
+        cache_settings = {"CACHE_ALIAS": "default", "ALLOW_PER_PROCESS": False}
+        with override_settings(COMPANY_DETAIL_CACHE=cache_settings):
+            self.assertEqual(
+                [error.id for error in check_company_cache(None)],
+                ["companies.W001"],
+                "Per process cache not reported",
+            )
+            caches["default"].clear()
+            res = self.get_company()
+            self.assertEqual(
+                res.status_code, 200, f"Expected 200. Got {res.status_code}"
+            )
+            self.assertFalse(res.has_header("ETag"), "Unshared version sent as ETag")
+            self.assertFalse(
+                caches["default"].get(f"company-version:{self.company.id}"),
+                "Details cached in a per process cache",
+            )
+
+        self.assertEqual(check_company_cache(None), [], "Allowed cache reported")
+
+    def test_changes_to_rendered_objects_bump_the_version(self):
+        """
+        Editing the company or any object it renders returns fresh details
+        """
+        contact = self.company.contacts.first()
+        note = self.company.documents.first().notes.first()
+        viewer = self.company.allowed_viewers.first()
+
+        def save_company():
+            Companies.objects.get(id=self.company.id).save()
+
+        def rename_contact():
+            contact.name_last = "Changed"
+            contact.save()
+
+        def edit_document_note():
+            note.note = "Changed"
+            note.save()
+
+        def clear_ledger_notes():
+            self.company.gl_code.notes.clear()
+
+        def add_viewer_from_user_side():
+            User.objects.create(username="new-viewer").company_viewers_set.add(
+                self.company
+            )
+
+        def rename_viewer():
+            viewer.username = "renamed-viewer"
+            viewer.save()
+
+        changes = (
+            save_company,
+            rename_contact,
+            edit_document_note,
+            clear_ledger_notes,
+            add_viewer_from_user_side,
+            rename_viewer,
+        )
+
+        etag = self.get_company()["ETag"]
+        for change in changes:
+            change()
+            res = self.get_company(etag=etag)
+            self.assertEqual(
+                res.status_code, 200, f"Expected 200. Got {res.status_code}"
+            )
+            self.assertNotEqual(
+                res["ETag"], etag, f"ETag did not change after {change.__name__}"
+            )
+            self.assertEqual(
+                res.data,
+                CompanyFullAdminSerializer(
+                    Companies.objects.get(id=self.company.id)
+                ).data,
+                "Details are stale",
+            )
+            etag = res["ETag"]
+
+    def test_login_does_not_bump_the_version(self):
+        """
+        Logging in only writes the last login time, which no company detail renders
+        """
+        etag = self.get_company()["ETag"]
+
+        self.c.login()
+
+        res = self.get_company(etag=etag)
+        self.assertEqual(res.status_code, 304, f"Expected 304. Got {res.status_code}")
+
+    def test_sparse_fieldset_prunes_details(self):
+        """
+        '?fields=' only renders the listed fields, dotted paths select nested fields
+        """
+        res = self.get_company(query="?fields=id,business_name,notes.note")
+
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+        self.assertEqual(
+            list(res.data), ["id", "business_name", "notes"], "Fields were not pruned"
+        )
+        self.assertEqual(
+            res.data["notes"],
+            [{"note": note.note} for note in self.company.notes.all()],
+            "Nested fields were not pruned",
+        )
+
+    def test_unexpanded_objects_render_as_primary_keys(self):
+        """
+        Nested objects left out of '?expand=' are rendered as their IDs
+        """
+        res = self.get_company(query="?expand=documents")
+
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+        self.assertEqual(
+            res.data["gl_code"], self.company.gl_code_id, "Ledger was not collapsed"
+        )
+        self.assertEqual(
+            sorted(res.data["notes"]),
+            sorted(self.company.notes.values_list("id", flat=True)),
+            "Notes were not collapsed",
+        )
+        document = res.data["documents"][0]
+        self.assertEqual(
+            document["name"],
+            self.company.documents.get(id=document["id"]).name,
+            "Documents were not expanded",
+        )
+        self.assertIsInstance(
+            document["uploaded_by"], int, "Objects under documents were expanded"
+        )
+
+    def test_sparse_fieldset_loads_less(self):
+        """
+        Relations left out of the fieldset are not loaded
+        """
+        # The first request also authenticates the token
+        self.get_company(query="?fields=id")
+
+        bump_company_versions([self.company.id])
+        with CaptureQueriesContext(connection) as full_queries:
+            self.get_company()
+        bump_company_versions([self.company.id])
+        with CaptureQueriesContext(connection) as sparse_queries:
+            res = self.get_company(query="?fields=id,business_name&expand=")
+
+        self.assertEqual(
+            res.data,
+            {"id": self.company.id, "business_name": self.company.business_name},
+            "Sparse details do not match",
+        )
+        # The role check and the company itself
+        self.assertEqual(len(sparse_queries), 2, "Pruned relations were loaded")
+        self.assertLess(
+            len(sparse_queries), len(full_queries), "Fieldset did not reduce queries"
+        )
+
+    def test_fieldsets_are_cached_separately(self):
+        """
+        Each fieldset gets its own cached details, equivalent fieldsets share them
+        """
+        full = self.get_company()
+        sparse = self.get_company(query="?fields=id,business_name")
+
+        self.assertNotEqual(full.data, sparse.data, "Sparse details came from cache")
+
+        with self.assertNumQueries(1):
+            res = self.get_company(query="?fields=business_name,id")
+        self.assertEqual(res.data, sparse.data, "Equivalent fieldset not cached")
+
+    def test_invalid_fieldset_is_rejected(self):
+        """
+        Unknown fields, and fields without nested objects in '?expand=', return 400
+        """
+        for query in ("?fields=id,unknown", "?fields=notes.unknown", "?expand=id"):
+            res = self.get_company(query=query)
+            self.assertEqual(
+                res.status_code, 400, f"Expected 400 for {query}. Got {res.status_code}"
+            )
+            self.assertIn("fieldset-error", res.data, "Did not find expected key")
@@ -1,13 +1,25 @@
 from companies.views import (
+    CompanyBulkInviteUserViewSet,
     CompanyCreationViewSet,
+    CompanyDetailViewSet,
+    CompanyImportViewSet,
     CompanyInviteUserViewSet,
+    CompanyListViewSet,
     CompanyUploadDocumentViewSet,
 )
 from django.urls import path
 
 urlpatterns = [
+    path("", CompanyListViewSet.as_view(), name="list-companies"),
+    path("<int:pk>", CompanyDetailViewSet.as_view(), name="company-detail"),
     path("create", CompanyCreationViewSet.as_view(), name="create-company"),
+    path("import", CompanyImportViewSet.as_view(), name="import-companies"),
     path("invite/<int:pk>", CompanyInviteUserViewSet.as_view(), name="invite-user"),
+    path(
+        "invite/<int:pk>/bulk",
+        CompanyBulkInviteUserViewSet.as_view(),
+        name="bulk-invite-users",
+    ),
     path(
         "<int:pk>/upload-document",
         CompanyUploadDocumentViewSet.as_view(),
@@ -1,38 +1,68 @@
 from accounts.models import User
+from companies.cache import (
+    get_cached_company_detail,
+    get_company_version,
+    is_company_cache_enabled,
+)
 from companies.models import Companies, CompanyInviteList
+from companies.functions import (
+    create_companies,
+    get_user_companies,
+    import_companies,
+    populate_company_dict,
+    save_company_invites,
+    send_company_invites,
+)
 from companies.serializers import (
+    CompanyBulkInviteItemSerializer,
+    CompanyBulkInviteSerializer,
     CompanyFullAdminSerializer,
     CompanyCreationSerializer,
     CompanyInviteListActiveSerializer,
     CompanyInviteListSerializer,
+    CompanyListSerializer,
     CompanyUploadDocumentsSerializer,
 )
-from contacts.functions import populate_address_dict, populate_contact_dict
-from contacts.models import Addresses, Contacts
+from core.parsers import NDJSONParser
+from core.fieldsets import SparseFieldsetMixin, get_fieldset_key
+from core.pagination import KeysetPagination
 from django.db import transaction
-from django.db.models import Q
-from general_ledger.models import GeneralLedgerCodes
-from notes.models import Notes
+from django.db.models.functions import Lower
+from django.utils.http import parse_etags
 from rest_framework import generics, status
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
+from roles.functions import get_company_role, get_company_roles
+from roles.models import EffectiveRoles
+from roles.permissions import IsCompanyAdmin
 
 # Create your views here.
 
 
-def send_invalid_permission_response(requested_level=None, level_id=None):
+class CompanyListViewSet(SparseFieldsetMixin, generics.ListAPIView):
     """
-    Generic error response for invalid permission levels.
+    Lists the companies the user is an admin or viewer of, a page at a time.
 
-    Used for invalid companies or users sending invites to companies they do not have admin_in status in
+    Each company comes with the user's role and its building, document, note and
+    user counts. A page is a single query, whatever the number of companies.
     """
-    return {
-        "invite-error": f"Invalid invite permissions for requested {requested_level}",
-        "detail": f"Can not invite user to {requested_level} with ID {level_id}",
-    }
+
+    serializer_class = CompanyListSerializer
+    pagination_class = KeysetPagination
+    permission_classes = (IsAuthenticated,)
+    keyset_ordering = ("business_name", "id")
+
+    def get_queryset(self):
+        return get_user_companies(user=self.request.user)
+
+    def list(self, request):
+        page = self.paginate_queryset(self.get_queryset())
+        return self.get_paginated_response(
+            self.get_response_serializer(page, many=True).data
+        )
 
 
-class CompanyCreationViewSet(generics.CreateAPIView):
+class CompanyCreationViewSet(SparseFieldsetMixin, generics.CreateAPIView):
     """
     Viewset responsible for the creation of a company.
 
@@ -41,6 +71,7 @@ class CompanyCreationViewSet(generics.CreateAPIView):
 
     queryset = Companies.objects.all()
     serializer_class = CompanyCreationSerializer
+    response_serializer_class = CompanyFullAdminSerializer
     permission_classes = (IsAuthenticated,)
 
     def create(self, request):
@@ -48,31 +79,9 @@ class CompanyCreationViewSet(generics.CreateAPIView):
         # Serialize the data
         serializer = self.get_serializer(data=request.data)
 
-        # Creates a valid address dictionary to be validated against.
-        # Accounts for None or missing values
-        serializer.initial_data["business_address"] = populate_address_dict(
-            None
-            if ("business_address" not in serializer.initial_data)
-            or (serializer.initial_data["business_address"] is None)
-            else serializer.initial_data["business_address"]
-        )
-
-        # Creates a valid address dictionary to be validated against.
-        # Accounts for None or missing values
-        serializer.initial_data["mailing_address"] = populate_address_dict(
-            None
-            if ("mailing_address" not in serializer.initial_data)
-            or (serializer.initial_data["mailing_address"] is None)
-            else serializer.initial_data["mailing_address"]
-        )
-
-        # Fail-safe to make sure a contacts array is included
-        if "contacts" not in serializer.initial_data:
-            serializer.initial_data["contacts"] = []
-
-        # Fail-safe to make sure a notes array is included
-        if "notes" not in serializer.initial_data:
-            serializer.initial_data["notes"] = []
+        # Creates valid address dictionaries to be validated against,
+        # and makes sure the contacts and notes arrays are included
+        populate_company_dict(serializer.initial_data)
 
         # Validates all fields. Return the errors if any are found.
         if not serializer.is_valid():
@@ -81,107 +90,145 @@ class CompanyCreationViewSet(generics.CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # Pop out the business address information
-        business_address = serializer.validated_data.pop("business_address")
+        # Save the company with its addresses, general ledgers, contacts and notes,
+        # and add the current user as an allowed admin. All entries are made
+        # behind an atomic transaction
+        company_obj = create_companies(
+            companies=[serializer.validated_data], user=request.user
+        )[0]
 
-        # Pop out the mailing address information
-        mailing_address = serializer.validated_data.pop("mailing_address")
+        # Set the response headers
+        headers = self.get_success_headers(company_obj)
 
-        # Pop out the contact list if provided
-        if "contacts" in serializer.validated_data:
-            contact_list = serializer.validated_data.pop("contacts")
-        # Otherwise, set a blank contacts array in the serializer
-        # and a blank contact_list array for later processing
-        else:
-            serializer.validated_data["contacts"] = []
-            contact_list = []
+        return Response(
+            data=self.get_response_data(company_obj),
+            status=status.HTTP_201_CREATED,
+            headers=headers,
+        )
 
-        # Pop out company notes if provided
-        company_notes = serializer.validated_data.pop("notes")
 
-        # Make all the posts behind an atomic transaction to make sure
-        # all entries are successfully made
-        with transaction.atomic():
+class CompanyImportViewSet(generics.GenericAPIView):
+    """
+    Creates many companies from a newline delimited JSON upload.
 
-            # Check if any business address values are present
-            if any(business_address.values()):
-                # Save the business address
-                business_address_obj = Addresses.objects.create(**business_address)
-            # If all values are blank, save a None value
-            else:
-                business_address_obj = None
-
-            # Check if any mailing address values are present
-            if any(mailing_address.values()):
-                # Save the mailing address
-                mailing_address_obj = Addresses.objects.create(**mailing_address)
-            # If all values are blank, save a None value
-            else:
-                mailing_address_obj = None
-
-            # Create the encompassing accounts receivable general ledger
-            accounts_receivable_gl = GeneralLedgerCodes.objects.create(
-                name="Accounts Receivable",
-                description=f"Accounts Receivable ledger for {serializer.validated_data['business_name']}",
-            )
+    Each line holds one company in the same format as the company creation request.
+    The upload is read incrementally and written in chunks. Invalid lines are
+    reported by line number, without stopping the import of the other lines.
+    """
 
-            # Create the encompassing accounts payable general ledger
-            accounts_payable_gl = GeneralLedgerCodes.objects.create(
-                name="Accounts Payable",
-                description=f"Accounts Payable ledger for {serializer.validated_data['business_name']}",
-            )
+    queryset = Companies.objects.all()
+    parser_classes = (NDJSONParser,)
+    permission_classes = (IsAuthenticated,)
 
-            # Create the general ledger account for company expenses
-            gl_code = GeneralLedgerCodes.objects.create(
-                name=f"{serializer.validated_data['business_name']}",
-                description=f"{serializer.validated_data['business_name']} general ledger",
-            )
+    def post(self, request):
+        report = import_companies(lines=request.data, user=request.user)
 
-            # Save the company with all the newly created address and gl_code objects
-            company_obj = serializer.save(
-                business_address=business_address_obj,
-                mailing_address=mailing_address_obj,
-                accounts_payable_gl=accounts_payable_gl,
-                accounts_receivable_gl=accounts_receivable_gl,
-                gl_code=gl_code,
-            )
+        return Response(
+            {"created": report["created"], "company-errors": report["errors"]},
+            status=(
+                status.HTTP_201_CREATED
+                if report["created"]
+                else status.HTTP_400_BAD_REQUEST
+            ),
+        )
 
-            # If contacts are present, loop through each contact
-            for contact in contact_list:
-                # Clean-up the contact information
-                contact = populate_contact_dict(contact)
-                # Create the contact
-                contact_obj = Contacts.objects.create(**contact)
-                # Add that contact object to the ManyToMany contacts field
-                company_obj.contacts.add(contact_obj)
-
-            # If notes are present, loop through each note
-            for company_note in company_notes:
-                # Assign the user to the note
-                company_note["user"] = request.user
-                # Create the note with associated user
-                company_note_obj = Notes.objects.create(**company_note)
-                # Add that note object to the ManyToMany notes field
-                company_obj.notes.add(company_note_obj)
-
-            # Add the current user as an allowed admin
-            company_obj.allowed_admins.add(request.user)
 
-        # Set the response headers
-        headers = self.get_success_headers(company_obj)
+class CompanyDetailViewSet(SparseFieldsetMixin, generics.RetrieveAPIView):
+    """
+    Returns the full details of a company to its admins.
 
-        return Response(
-            data=CompanyFullAdminSerializer(company_obj).data,
-            status=status.HTTP_201_CREATED,
-            headers=headers,
+    The serialized details are cached per company version, which is bumped on any
+    change to the company or the objects it renders. The version is the response ETag,
+    so polling clients sending it back in If-None-Match get an empty 304 response.
+    The cache must be shared by all workers, see companies.cache.is_company_cache_enabled.
+
+    Supports the '?fields=' and '?expand=' sparse fieldsets, each cached on its own.
+    """
+
+    queryset = Companies.objects.all()
+    serializer_class = CompanyFullAdminSerializer
+    permission_classes = (IsAuthenticated, IsCompanyAdmin)
+
+    def retrieve(self, request, **kwargs):
+        # The IsCompanyAdmin permission has verified the company exists
+        # and the requesting user is set as an admin for it
+        company_id = kwargs["pk"]
+
+        # Without a shared cache the details are rendered on each request, without an ETag
+        if not is_company_cache_enabled():
+            return Response(data=self.get_response_serializer(self.get_object()).data)
+
+        # The version is read before the database, so a change made while rendering
+        # stores the details under an already outdated version
+        version = get_company_version(company_id)
+        etag = f'"{version}-{request.accepted_renderer.format}"'
+
+        if_none_match = parse_etags(request.META.get("HTTP_IF_NONE_MATCH", ""))
+        if (etag in if_none_match) or ("*" in if_none_match):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+
+        data = get_cached_company_detail(
+            company_id,
+            version,
+            # Rendered without the request, so file URLs stay relative and shareable
+            lambda: self.get_response_serializer(self.get_object()).data,
+            fieldset=get_fieldset_key(*self.get_fieldset()),
         )
 
+        return Response(data=data, headers={"ETag": etag})
+
 
 ##############################################
 #      Invite User To Company Viewset        #
 ##############################################
 
 
+def send_invalid_invite_response(admin_in=None, viewer_in=None):
+    """
+    Response for invites not requesting EITHER admin_in OR viewer_in
+    """
+    return {
+        "invalid-invite": "clashing permission levels specified",
+        "invalid-info": f"admin_in was '{admin_in}' & viewer_in was '{viewer_in}'",
+    }
+
+
+def send_existing_role_response(
+    email=None, company_obj=None, current_role=None, admin_requested=False
+):
+    """
+    Response for invites to users already holding a role in the company, otherwise None.
+
+    If admin in company, admin requested, do not send invite
+    If viewer in company, admin requested, do not send invite - (handle via company role manager)
+    If admin in company, viewer requested, do not send invite - (handle via company role manager)
+    If viewer in company, viewer requested, do not send invite
+    """
+    if current_role == EffectiveRoles.RoleList.ADMIN:
+        response = {
+            "existing-admin": f"Requested user with email '{email}' is already set as an admin for '{company_obj.company_name}'",
+            "existing-email": email,
+        }
+        if not admin_requested:
+            response["no-change"] = (
+                "Admin status unchanged. Change permission levels in the company parameters."
+            )
+        return response
+
+    if current_role == EffectiveRoles.RoleList.VIEWER:
+        response = {
+            "existing-viewer": f"Requested user with email '{email}' is already set as a viewer for '{company_obj.company_name}'",
+            "existing-email": email,
+        }
+        if admin_requested:
+            response["no-change"] = (
+                "Viewer status unchanged. Change permission levels in the company parameters."
+            )
+        return response
+
+    return None
+
+
 class CompanyInviteUserViewSet(generics.CreateAPIView):
     """
     Save a user email to the table and which company they are invited to with a role of either admin or viewer
@@ -189,54 +236,27 @@ class CompanyInviteUserViewSet(generics.CreateAPIView):
 
     queryset = CompanyInviteList.objects.all()
     serializer_class = CompanyInviteListSerializer
-    permission_classes = (IsAuthenticated,)
+    permission_classes = (IsAuthenticated, IsCompanyAdmin)
 
     def create(self, request, **kwargs):
         """
-        Manages the company invite request methods. Cleans the database of expired invites, then does the following:
+        Manages the company invite request methods. Does the following:
 
         1.) Ensure the company exists
         2.) Verify the request user has 'allowed_admins' privilege in company
         3.) Check that the request is for EITHER admin_in OR viewer_in, not BOTH
         4.) If the requested email has an associated User model object, check if that object exists in the company permissions
             4.1) If user is admin in company and admin role requested, do not send invite
-            4.2) If user is viewer in company and admin role requested, send invite
+            4.2) If user is viewer in company and admin role requested, do not send invite
             4.3) If user is admin in company and viewer role requested, do not send invite - (handle via company role manager)
             4.4) If user is viewer in company and viewer role requested, do not send invite
         <If not step 4>
-        5.) Inspect invites for existing records
-            5.1) If email does not have current admin or viewer invites and an admin is requested, send invite
-            5.2) If email has an admin invite and a viewer role requested, do not send invite
-                5.3) Inform request.user of the current active invite
+        5.) Create the invite, or update the existing invite for the email and company
         """
 
-        # Clean the invite database of timed-out invites
-        # Get a list of all the expired invites
-        expired_invite_ids = [obj.id for obj in self.queryset.all() if obj.timeout]
-        # Delete those rows
-        self.queryset.filter(id__in=expired_invite_ids).delete()
-
-        # Check that the company exist
-        try:
-            company_obj = Companies.objects.get(pk=kwargs["pk"])
-
-        # If the company does not exist, return generic response
-        except Companies.DoesNotExist:
-            return Response(
-                data=send_invalid_permission_response(
-                    requested_level="company", level_id=kwargs["pk"]
-                ),
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Check that the requesting user is set as an admin for the indicated company
-        if not company_obj.allowed_admins.filter(pk=request.user.pk).exists():
-            return Response(
-                data=send_invalid_permission_response(
-                    requested_level="company", level_id=kwargs["pk"]
-                ),
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        # The IsCompanyAdmin permission has verified the company exists
+        # and the requesting user is set as an admin for it
+        company_obj = Companies.objects.get(pk=kwargs["pk"])
 
         # Verify there is one False and one True item in the request.data.
         # Sort the information for easier comparison
@@ -245,10 +265,10 @@ class CompanyInviteUserViewSet(generics.CreateAPIView):
             True,
         ]:
             return Response(
-                {
-                    "invalid-invite": "clashing permission levels specified",
-                    "invalid-info": f"admin_in was '{request.data['admin_in']}' & viewer_in was '{request.data['viewer_in']}'",
-                },
+                send_invalid_invite_response(
+                    admin_in=request.data["admin_in"],
+                    viewer_in=request.data["viewer_in"],
+                ),
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
@@ -272,162 +292,164 @@ class CompanyInviteUserViewSet(generics.CreateAPIView):
                 status=status.HTTP_400_BAD_REQUEST,
             )
 
-        # If admin in company, admin requested, do not send invite
-        # If viewer in company, admin requested, set invite
-        # If admin in company, viewer requested, do not send invite
-        # If viewer in company, viewer requested, do not send invite
-        # If not admin or viewer, admin requested, set invite (no dups)
-        # If not admin or viewer, viewer requested, check if invite exists, if not set invite (no dups)
-
-        # Get the requested user object to check if they already are in the permissions group
-        try:
-            invitee_obj = User.objects.get(email=serializer.validated_data["email"])
-
-            existing_admin = company_obj.allowed_admins.filter(
-                pk=invitee_obj.pk
-            ).exists()
-            existing_viewer = company_obj.allowed_viewers.filter(
-                pk=invitee_obj.pk
-            ).exists()
-
-            if serializer.validated_data["admin_in"]:
-                if existing_admin:
-                    return Response(
-                        {
-                            "existing-admin": f"Requested user with email '{serializer.validated_data['email']}' is already set as an admin for '{company_obj.company_name}'",
-                            "existing-email": serializer.validated_data["email"],
-                        },
-                        status=status.HTTP_200_OK,
-                    )
-                elif existing_viewer:
-                    return Response(
-                        {
-                            "existing-viewer": f"Requested user with email '{serializer.validated_data['email']}' is already set as a viewer for '{company_obj.company_name}'",
-                            "existing-email": serializer.validated_data["email"],
-                            "no-change": "Viewer status unchanged. Change permission levels in the company parameters.",
-                        },
-                        status=status.HTTP_200_OK,
-                    )
+        email = serializer.validated_data["email"]
+        admin_requested = serializer.validated_data["admin_in"] is not None
 
-            elif serializer.validated_data["viewer_in"]:
-                if existing_admin:
-                    return Response(
-                        {
-                            "existing-admin": f"Requested user with email '{serializer.validated_data['email']}' is already set as an admin for '{company_obj.company_name}'",
-                            "existing-email": serializer.validated_data["email"],
-                            "no-change": "Admin status unchanged. Change permission levels in the company parameters.",
-                        },
-                        status=status.HTTP_200_OK,
-                    )
-                elif existing_viewer:
-                    return Response(
-                        {
-                            "existing-viewer": f"Requested user with email '{serializer.validated_data['email']}' is already set as a viewer for '{company_obj.company_name}'",
-                            "existing-email": serializer.validated_data["email"],
-                        },
-                        status=status.HTTP_200_OK,
-                    )
+        # Get the requested user object to check if they already are in the permissions group.
+        # Emails are matched case-insensitively on the LOWER("email") index
+        invitee_obj = (
+            User.objects.alias(email_lower=Lower("email"))
+            .filter(email_lower=email)
+            .first()
+        )
 
-            # If the user exists, but is not assigned to the current company,
-            # this will set their permission level
-            invite_obj = CompanyInviteList.objects.create(**serializer.validated_data)
-            return Response(
-                data=CompanyInviteListActiveSerializer(invite_obj).data,
-                status=status.HTTP_201_CREATED,
-                headers=self.get_success_headers(invite_obj),
+        if invitee_obj is not None:
+            existing_role_response = send_existing_role_response(
+                email=email,
+                company_obj=company_obj,
+                current_role=get_company_role(
+                    user=invitee_obj, company_id=company_obj.pk
+                ),
+                admin_requested=admin_requested,
             )
+            if existing_role_response is not None:
+                return Response(existing_role_response, status=status.HTTP_200_OK)
 
-        except User.DoesNotExist:
-            qs_user_invites = self.queryset.filter(
-                email=serializer.validated_data["email"]
-            )
+        # Either no user exists for the email, or the user is not assigned to the current company
+        invite_obj = save_company_invites(
+            company_obj=company_obj, requested_roles={email: admin_requested}
+        )[email]
+        # Email the invite link, the only place its token is given out
+        send_company_invites(invites=[invite_obj])
 
-            # No email user exists, so create the invitation
-            if not qs_user_invites.exists():
-                invite_obj = CompanyInviteList.objects.create(
-                    **serializer.validated_data
-                )
-                return Response(
-                    data=CompanyInviteListActiveSerializer(invite_obj).data,
-                    status=status.HTTP_201_CREATED,
-                    headers=self.get_success_headers(invite_obj),
-                )
+        return Response(
+            data=CompanyInviteListActiveSerializer(invite_obj).data,
+            status=status.HTTP_201_CREATED,
+            headers=self.get_success_headers(invite_obj),
+        )
 
-            # If a queryset exists, there should be only one entry for the email and company combination.
-            # Wrapped in try / except block as a fail-safe for errors
-            try:
-                invite_obj = self.queryset.get(
-                    Q(email=serializer.validated_data["email"]),
-                    Q(admin_in=kwargs["pk"]) | Q(viewer_in=kwargs["pk"]),
-                )
 
-                invite_obj.admin_in = serializer.validated_data["admin_in"]
-                invite_obj.viewer_in = serializer.validated_data["viewer_in"]
-                invite_obj.save()
+class CompanyBulkInviteUserViewSet(generics.CreateAPIView):
+    """
+    Invites many emails to a company at once, each with a role of either admin or viewer.
 
-                return Response(
-                    data=CompanyInviteListActiveSerializer(invite_obj).data,
-                    status=status.HTTP_201_CREATED,
-                    headers=self.get_success_headers(invite_obj),
-                )
+    Users, roles and existing invites are resolved with a few set-based queries.
+    """
 
-            # This is the fail-safe. Should never reach this.
-            except CompanyInviteList.MultipleObjectsReturned:
-                # Get all matching invite records
-                invite_obj = self.queryset.filter(
-                    Q(email=serializer.validated_data["email"]),
-                    Q(admin_in=kwargs["pk"]) | Q(viewer_in=kwargs["pk"]),
-                )
-                # Get a list of all their IDs
-                invite_obj_ids = list(invite_obj.values_list("id", flat=True))
-                # Remove all records, except for the first record
-                invite_obj.filter(id__in=invite_obj_ids[1:]).delete()
-                # Reset the variable to the only object left
-                invite_obj = invite_obj.first()
-
-                # Save with updated data as standard
-                invite_obj.admin_in = serializer.validated_data["admin_in"]
-                invite_obj.viewer_in = serializer.validated_data["viewer_in"]
-                invite_obj.save()
-
-                return Response(
-                    data=CompanyInviteListActiveSerializer(invite_obj).data,
-                    status=status.HTTP_201_CREATED,
-                    headers=self.get_success_headers(invite_obj),
+    queryset = CompanyInviteList.objects.all()
+    serializer_class = CompanyBulkInviteSerializer
+    permission_classes = (IsAuthenticated, IsCompanyAdmin)
+
+    def create(self, request, **kwargs):
+        """
+        Returns the outcome of each invite, in the order sent.
+
+        Each outcome matches the response the single invite endpoint gives for that email.
+        """
+
+        # The IsCompanyAdmin permission has verified the company exists
+        # and the requesting user is set as an admin for it
+        company_obj = Companies.objects.get(pk=kwargs["pk"])
+
+        serializer = self.get_serializer(data=request.data)
+
+        if not serializer.is_valid():
+            return Response(
+                {"invite-error": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # List of (email, outcome), the outcome is None until the invite is resolved
+        outcomes = []
+        # Dict of email to True for admin invites, False for viewer invites
+        requested_roles = {}
+
+        # Validate each invite on its own, so one bad entry does not reject the list
+        for invite in serializer.validated_data["invites"]:
+            invite_serializer = CompanyBulkInviteItemSerializer(data=invite)
+            if not invite_serializer.is_valid():
+                outcomes.append((None, {"invite-error": invite_serializer.errors}))
+                continue
+
+            email = invite_serializer.validated_data["email"]
+            admin_in = invite_serializer.validated_data["admin_in"]
+            viewer_in = invite_serializer.validated_data["viewer_in"]
+
+            if admin_in == viewer_in:
+                outcomes.append(
+                    (
+                        None,
+                        send_invalid_invite_response(
+                            admin_in=admin_in, viewer_in=viewer_in
+                        ),
+                    )
                 )
+                continue
+
+            outcomes.append((email, None))
+            requested_roles[email] = admin_in
+
+        # Resolve the existing users and their roles in the company with two queries
+        user_ids = {
+            user_email.lower(): user_id
+            for user_email, user_id in User.objects.alias(email_lower=Lower("email"))
+            .filter(email_lower__in=requested_roles)
+            .values_list("email", "id")
+        }
+        current_roles = get_company_roles(
+            user_ids=user_ids.values(), company_id=company_obj.pk
+        )
+
+        existing_role_responses = {}
+        for email, admin_requested in requested_roles.items():
+            existing_role_response = send_existing_role_response(
+                email=email,
+                company_obj=company_obj,
+                current_role=current_roles.get(user_ids.get(email)),
+                admin_requested=admin_requested,
+            )
+            if existing_role_response is not None:
+                existing_role_responses[email] = existing_role_response
+
+        invites = save_company_invites(
+            company_obj=company_obj,
+            requested_roles={
+                email: admin_requested
+                for email, admin_requested in requested_roles.items()
+                if email not in existing_role_responses
+            },
+        )
+        send_company_invites(invites=invites.values())
+
+        results = []
+        for email, outcome in outcomes:
+            if outcome is None:
+                outcome = existing_role_responses.get(email)
+            if outcome is None:
+                outcome = CompanyInviteListActiveSerializer(invites[email]).data
+            results.append(outcome)
+
+        return Response(
+            {"invites": results},
+            status=status.HTTP_201_CREATED if invites else status.HTTP_200_OK,
+        )
 
 
-class CompanyUploadDocumentViewSet(generics.CreateAPIView):
+class CompanyUploadDocumentViewSet(SparseFieldsetMixin, generics.CreateAPIView):
     """
     Handles the upload of several documents at once.
     """
 
     queryset = Companies.objects.all()
     serializer_class = CompanyUploadDocumentsSerializer
-    permission_classes = (IsAuthenticated,)
+    response_serializer_class = CompanyFullAdminSerializer
+    permission_classes = (IsAuthenticated, IsCompanyAdmin)
 
     def create(self, request, **kwargs):
 
-        # Check that the company exist
-        try:
-            company_obj = Companies.objects.get(pk=kwargs["pk"])
-        # If the company does not exist, return generic response
-        except Companies.DoesNotExist:
-            return Response(
-                data=send_invalid_permission_response(
-                    requested_level="company", level_id=kwargs["pk"]
-                ),
-                status=status.HTTP_400_BAD_REQUEST,
-            )
-
-        # Check that the requesting user is set as an admin for the indicated company
-        if not company_obj.allowed_admins.filter(pk=request.user.pk).exists():
-            return Response(
-                data=send_invalid_permission_response(
-                    requested_level="company", level_id=kwargs["pk"]
-                ),
-                status=status.HTTP_400_BAD_REQUEST,
-            )
+        # The IsCompanyAdmin permission has verified the company exists
+        # and the requesting user is set as an admin for it
+        company_obj = Companies.objects.get(pk=kwargs["pk"])
 
         # Serialize the data
         serializer = self.get_serializer(data=request.data)
@@ -452,7 +474,7 @@ class CompanyUploadDocumentViewSet(generics.CreateAPIView):
         headers = self.get_success_headers(company_obj)
 
         return Response(
-            data=CompanyFullAdminSerializer(company_obj).data,
+            data=self.get_response_data(company_obj),
             status=status.HTTP_201_CREATED,
             headers=headers,
         )
@@ -1,66 +1,167 @@
 from contacts.models import Addresses, Contacts
+import re
 
+# Matches anything that is not a digit, to keep phone numbers as a string of numbers only
+NON_DIGITS = re.compile(r"\D")
 
-def populate_address_dict(address):
+
+def collapse_spaces(value):
     """
-    Takes in either an address dict or None and populates any missing fields as blanks.
+    Removes leading, trailing and repeated whitespace
+    """
+    return " ".join(value.split())
 
-    Used to quickly serialize and validate an Address object
+
+def digits_only(value):
+    """
+    Removes every character that is not a digit
     """
-    # Get the fields from the address model
-    address_fields = Addresses._meta.fields
+    return NON_DIGITS.sub("", value)
 
-    # If the field is set to None, create a blank Address dict
-    if address is None:
-        address = {}
 
-    # Otherwise, if a field is missing from the provided address
-    # dict, add it with a value of blank
-    for field in address_fields:
-        # Get the field name as a string
-        field_str = str(field).split(".")[-1]
-        # Skip the 'id' value
-        if field_str == "id":
+def compile_field_rules(model, cleaners=None):
+    """
+    Returns a tuple of (field name, cleaning function) for the editable fields of the model.
+
+    Built once at import time, so normalizing a record does not walk the model fields.
+    'cleaners' maps field name prefixes to a specific cleaning function.
+    Fields without a matching prefix get their extra spaces removed.
+    """
+    cleaners = cleaners or {}
+    rules = []
+    for field in model._meta.fields:
+        # Skip the 'id' value and values not entered by users
+        if field.primary_key or not field.editable:
             continue
+        cleaner = next(
+            (
+                cleaner
+                for prefix, cleaner in cleaners.items()
+                if field.name.startswith(prefix)
+            ),
+            collapse_spaces,
+        )
+        rules.append((field.name, cleaner))
+    return tuple(rules)
+
+
+ADDRESS_FIELD_RULES = compile_field_rules(Addresses)
+CONTACT_FIELD_RULES = compile_field_rules(Contacts, cleaners={"phone": digits_only})
+
+
+def populate_dict(record, field_rules):
+    """
+    Populates the missing fields of the record as blanks, and cleans the provided fields.
+
+    Extra fields, not in the rules, are left unchanged.
+    """
+    # If the record is set to None, create a blank dict
+    if record is None:
+        record = {}
+
+    for field_name, cleaner in field_rules:
         # If a field is missing, add a blank value to the dict
-        if field_str not in address:
-            address[field_str] = ""
-        # Otherwise, make sure the supplied address gets extra spaces removed
-        else:
-            address[field_str] = " ".join(address[field_str].split())
+        if field_name not in record:
+            record[field_name] = ""
+        # Otherwise, clean the supplied value. Nullable fields may hold None
+        elif record[field_name] is not None:
+            record[field_name] = cleaner(record[field_name])
 
-    return address
+    return record
+
+
+def populate_address_dict(address):
+    """
+    Takes in either an address dict or None and populates any missing fields as blanks.
+
+    Used to quickly serialize and validate an Address object
+    """
+    return populate_dict(address, ADDRESS_FIELD_RULES)
 
 
 def populate_contact_dict(contact):
     """
     Takes in either an contact dict or None and populates any missing fields as blanks.
 
+    Phone numbers are set to be a string of numbers only.
     Used to quickly serialize and validate an Contact object
     """
-    # Get the fields from the contact model
-    contact_fields = Contacts._meta.fields
+    return populate_dict(contact, CONTACT_FIELD_RULES)
 
-    # If the field is set to None, create a blank Contact dict
-    if contact is None:
-        contact = {}
 
-    # Otherwise, if a field is missing from the provided contact
-    # dict, add it with a value of blank
-    for field in contact_fields:
-        # Get the field name as a string
-        field_str = str(field).split(".")[-1]
-        # Skip the 'id' value
-        if field_str in ["id", "notes"]:
-            continue
-        # If a field is missing, add a blank value to the dict
-        if field_str not in contact:
-            contact[field_str] = ""
-        # Set the phone record to be a string of numbers only
-        elif field_str.startswith("phone"):
-            contact[field_str] = "".join(n for n in contact[field_str] if n.isdigit())
-        # Otherwise, make sure the supplied contact gets extra spaces removed
-        else:
-            contact[field_str] = " ".join(contact[field_str].split())
-
-    return contact
+def populate_address_dicts(addresses):
+    """
+    Populates a batch of address dicts or None values in one pass. Used by the bulk write paths.
+    """
+    return [populate_dict(address, ADDRESS_FIELD_RULES) for address in addresses]
+
+
+def populate_contact_dicts(contacts):
+    """
+    Populates a batch of contact dicts or None values in one pass. Used by the bulk write paths.
+    """
+    return [populate_dict(contact, CONTACT_FIELD_RULES) for contact in contacts]
+
+
+def get_or_create_addresses(addresses):
+    """
+    Returns the address object for each address dict, reusing identical stored addresses.
+
+    Blank addresses and None values give None. Addresses are normalized, then identified
+    by their content hash: one query finds the stored rows, one insert adds the missing ones.
+    """
+    addresses = populate_address_dicts(addresses)
+    hashes = [
+        (
+            Addresses.hash_address(address)
+            if any(address[field] for field in Addresses.HASHED_FIELDS)
+            else None
+        )
+        for address in addresses
+    ]
+
+    address_objs = Addresses.objects.in_bulk(
+        {content_hash for content_hash in hashes if content_hash},
+        field_name="content_hash",
+    )
+
+    missing = {}
+    for content_hash, address in zip(hashes, addresses):
+        if content_hash and (content_hash not in address_objs):
+            missing[content_hash] = Addresses(
+                content_hash=content_hash,
+                **{field: address[field] for field in Addresses.HASHED_FIELDS},
+            )
+
+    if missing:
+        # Conflicts are rows inserted concurrently, read back with the new rows
+        Addresses.objects.bulk_create(missing.values(), ignore_conflicts=True)
+        address_objs.update(
+            Addresses.objects.in_bulk(missing, field_name="content_hash")
+        )
+
+    return [
+        address_objs[content_hash] if content_hash else None for content_hash in hashes
+    ]
+
+
+def get_or_create_address(address):
+    """
+    Returns the stored address matching the address dict, creating it if needed.
+
+    Returns None for blank addresses.
+    """
+    return get_or_create_addresses([address])[0]
+
+
+def replace_address(address_obj, changes):
+    """
+    Copy-on-write edit of an address. Address rows are shared by every object with
+    the same address, so the stored row is never modified.
+
+    Returns the address matching the edited values, which the caller assigns in place
+    of the previous address.
+    """
+    address = {field: getattr(address_obj, field) for field in Addresses.HASHED_FIELDS}
+    address.update(changes)
+    return get_or_create_address(address)
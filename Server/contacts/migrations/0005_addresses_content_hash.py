@@ -0,0 +1,133 @@
+import hashlib
+
+from django.db import migrations, models
+from django.db.models import Case, Value, When
+
+# Copied from Addresses.hash_address, so later model changes do not alter this migration
+HASHED_FIELDS = ("address_1", "address_2", "city", "state", "zipcode")
+BATCH_SIZE = 500
+
+
+def hash_address(address):
+    return hashlib.sha256(
+        "\x1f".join(
+            " ".join(str(getattr(address, field) or "").split())
+            for field in HASHED_FIELDS
+        ).encode("utf-8")
+    ).hexdigest()
+
+
+def move_address_notes(apps, schema_editor):
+    """
+    Moves the notes of every address to the companies and buildings using the address.
+
+    Addresses are about to be shared between owners, so their notes would be visible to
+    every owner of the same address. Notes of addresses no object uses are unlinked.
+    """
+    Addresses = apps.get_model("contacts", "Addresses")
+    Buildings = apps.get_model("buildings", "Buildings")
+    Companies = apps.get_model("companies", "Companies")
+    NoteLinks = Addresses.notes.through
+
+    address_notes = {}
+    for addresses_id, notes_id in NoteLinks.objects.values_list(
+        "addresses_id", "notes_id"
+    ).iterator():
+        address_notes.setdefault(addresses_id, []).append(notes_id)
+    if not address_notes:
+        return
+
+    owner_links = (
+        (Companies, "business_address_id", "companies_id"),
+        (Companies, "mailing_address_id", "companies_id"),
+        (Buildings, "address_id", "buildings_id"),
+    )
+    for model, address_column, owner_column in owner_links:
+        OwnerNoteLinks = model.notes.through
+        owners = model._base_manager.filter(
+            **{f"{address_column}__in": list(address_notes)}
+        ).values_list("id", address_column)
+        OwnerNoteLinks.objects.bulk_create(
+            [
+                OwnerNoteLinks(**{owner_column: owner_id, "notes_id": notes_id})
+                for owner_id, address_id in owners.iterator()
+                for notes_id in address_notes[address_id]
+            ],
+            batch_size=BATCH_SIZE,
+            ignore_conflicts=True,
+        )
+
+    NoteLinks.objects.all().delete()
+
+
+def merge_duplicate_addresses(apps, schema_editor):
+    """
+    Hashes every address and merges the duplicates into the oldest identical address.
+
+    Foreign keys pointing to a duplicate are moved to the kept address.
+    """
+    Addresses = apps.get_model("contacts", "Addresses")
+
+    kept_ids = {}
+    duplicate_ids = {}
+    kept_addresses = []
+    for address in Addresses.objects.order_by("id").iterator():
+        content_hash = hash_address(address)
+        if content_hash in kept_ids:
+            duplicate_ids[address.id] = kept_ids[content_hash]
+        else:
+            kept_ids[content_hash] = address.id
+            address.content_hash = content_hash
+            kept_addresses.append(address)
+
+    duplicates = list(duplicate_ids.items())
+    for i in range(0, len(duplicates), BATCH_SIZE):
+        batch = duplicates[i : i + BATCH_SIZE]
+        batch_ids = [duplicate_id for duplicate_id, _ in batch]
+
+        # Point every foreign key (companies, buildings, ...) to the kept addresses
+        for relation in Addresses._meta.related_objects:
+            if not (relation.one_to_many or relation.one_to_one):
+                continue
+            attname = relation.field.attname
+            relation.related_model._base_manager.filter(
+                **{f"{attname}__in": batch_ids}
+            ).update(
+                **{
+                    attname: Case(
+                        *[
+                            When(**{attname: duplicate_id}, then=Value(kept_id))
+                            for duplicate_id, kept_id in batch
+                        ],
+                        output_field=models.IntegerField(),
+                    )
+                }
+            )
+
+        Addresses.objects.filter(id__in=batch_ids).delete()
+
+    Addresses.objects.bulk_update(kept_addresses, ["content_hash"], batch_size=BATCH_SIZE)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('buildings', '0003_alter_buildings_name'),
+        ('companies', '0014_normalize_invite_emails'),
+        ('contacts', '0004_auto_20220116_2301'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='addresses',
+            name='content_hash',
+            field=models.CharField(editable=False, max_length=64, null=True),
+        ),
+        migrations.RunPython(move_address_notes, migrations.RunPython.noop),
+        migrations.RunPython(merge_duplicate_addresses, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='addresses',
+            name='content_hash',
+            field=models.CharField(editable=False, max_length=64, unique=True),
+        ),
+    ]
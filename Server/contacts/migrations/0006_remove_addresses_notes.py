@@ -0,0 +1,17 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:58
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contacts', '0005_addresses_content_hash'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='addresses',
+            name='notes',
+        ),
+    ]
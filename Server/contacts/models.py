@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import RegexValidator
 from notes.models import Notes
+import hashlib
 
 # Create your models here.
 
@@ -79,7 +80,13 @@ class Addresses(models.Model):
             ),
         ],
     )
-    notes = models.ManyToManyField(Notes, related_name="address_notes_set", blank=True)
+    # Identical addresses share one row, identified by the hash of their fields.
+    # Rows are shared between objects, so edits must save a new address (copy-on-write,
+    # see contacts.functions.replace_address), and notes are kept on the owning objects
+    content_hash = models.CharField(max_length=64, unique=True, editable=False)
+
+    # Fields making up the content hash
+    HASHED_FIELDS = ("address_1", "address_2", "city", "state", "zipcode")
 
     class Meta:
         ordering = (
@@ -90,6 +97,36 @@ class Addresses(models.Model):
         verbose_name = "Address"
         verbose_name_plural = "Addresses"
 
+    @classmethod
+    def hash_address(cls, address):
+        """
+        Returns the content hash of an address dict. Extra spaces are ignored.
+        """
+        return hashlib.sha256(
+            "\x1f".join(
+                " ".join(str(address.get(field) or "").split())
+                for field in cls.HASHED_FIELDS
+            ).encode("utf-8")
+        ).hexdigest()
+
+    def save(self, *args, **kwargs):
+        """
+        Saves a new address. Stored addresses are shared, so changing their fields
+        raises a ValueError, use contacts.functions.replace_address instead.
+        """
+        content_hash = self.hash_address(
+            {field: getattr(self, field) for field in self.HASHED_FIELDS}
+        )
+        if (not self._state.adding) and (content_hash != self.content_hash):
+            raise ValueError(
+                "Stored addresses are shared and can not be edited in place, "
+                "use replace_address"
+            )
+        self.content_hash = content_hash
+        if kwargs.get("update_fields") is not None:
+            kwargs["update_fields"] = {*kwargs["update_fields"], "content_hash"}
+        return super().save(*args, **kwargs)
+
     def __str__(self):
         """
         Returns the address string based on available information.
@@ -1,8 +1,9 @@
 from contacts.models import Addresses, Contacts
+from core.serializers import FastRepresentationMixin
 from rest_framework import serializers
 
 
-class AddressSerializer(serializers.ModelSerializer):
+class AddressSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     """
     Serializes the Address model
     """
@@ -19,7 +20,7 @@ class AddressSerializer(serializers.ModelSerializer):
         )
 
 
-class ContactSerializer(serializers.ModelSerializer):
+class ContactSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     """
     Serializes the Contact model
     """
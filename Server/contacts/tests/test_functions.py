@@ -1,4 +1,13 @@
-from contacts.functions import populate_address_dict
+from contacts.functions import (
+    get_or_create_address,
+    get_or_create_addresses,
+    populate_address_dict,
+    populate_address_dicts,
+    populate_contact_dict,
+    populate_contact_dicts,
+    replace_address,
+)
+from contacts.models import Addresses
 from django.test import TestCase
 
 
@@ -154,3 +163,138 @@ class PopulateAddressDictTestCase(TestCase):
             ),
             "Excess spaces were removed from the untracked value",
         )
+
+
+class PopulateContactDictTestCase(TestCase):
+    """
+    Tests the contact normalizers, single and batched
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self) -> None:
+        return super().setUp()
+
+    def test_phone_numbers_keep_digits_only(self):
+        """
+        Phone numbers are stripped of everything but digits, other fields of extra spaces
+        """
+        res = populate_contact_dict(
+            dict(
+                name_first="  John  ", phone_1="(555) 555-5555", phone_2=" 555.555.5555"
+            )
+        )
+        self.assertEqual(res["name_first"], "John", "Extra spaces not removed")
+        self.assertEqual(res["phone_1"], "5555555555", "Phone not cleaned")
+        self.assertEqual(res["phone_2"], "5555555555", "Phone not cleaned")
+        self.assertEqual(res["name_last"], "", "Missing field not populated")
+        self.assertNotIn("notes", res, "ManyToMany field should not be populated")
+        self.assertNotIn("id", res, "ID field should not be populated")
+
+    def test_null_email_is_kept(self):
+        """
+        Nullable values are not cleaned
+        """
+        res = populate_contact_dict(dict(email=None))
+        self.assertIsNone(res["email"], "None email was changed")
+
+    def test_batches_match_single_normalization(self):
+        """
+        Batch normalizers give the same result as normalizing each record
+        """
+        addresses = [None, dict(address_1="  111  1st St. S  "), dict(city=" City ")]
+        contacts = [None, dict(name_last=" Doe  ", phone_1="555-555-5555")]
+
+        self.assertEqual(
+            populate_address_dicts([None if a is None else dict(a) for a in addresses]),
+            [populate_address_dict(None if a is None else dict(a)) for a in addresses],
+            "Batched addresses do not match",
+        )
+        self.assertEqual(
+            populate_contact_dicts([None if c is None else dict(c) for c in contacts]),
+            [populate_contact_dict(None if c is None else dict(c)) for c in contacts],
+            "Batched contacts do not match",
+        )
+
+
+class AddressDeduplicationTestCase(TestCase):
+    """
+    Tests that identical addresses are stored once
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self) -> None:
+        return super().setUp()
+
+    def test_identical_addresses_share_one_row(self):
+        """
+        Addresses differing only by whitespace resolve to the same row, blanks to None
+        """
+        address_objs = get_or_create_addresses(
+            [
+                dict(address_1="111 1st St. S", city="City", zipcode="55555"),
+                dict(address_1="  111  1st St. S ", city="City ", zipcode="55555"),
+                dict(address_1="222 2nd St. S", city="City", zipcode="55555"),
+                None,
+                dict(),
+            ]
+        )
+
+        self.assertEqual(
+            address_objs[0].id, address_objs[1].id, "Duplicate row created"
+        )
+        self.assertNotEqual(address_objs[0].id, address_objs[2].id, "Rows merged")
+        self.assertIsNone(address_objs[3], "None address should give None")
+        self.assertIsNone(address_objs[4], "Blank address should give None")
+        self.assertEqual(Addresses.objects.count(), 2, "Expected 2 stored addresses")
+
+        with self.assertNumQueries(1):
+            existing = get_or_create_address(
+                dict(address_1="222 2nd St. S", city="City", zipcode="55555")
+            )
+        self.assertEqual(existing.id, address_objs[2].id, "Stored address not reused")
+
+    def test_replace_address_keeps_shared_row(self):
+        """
+        Editing an address returns another row and leaves the shared one unchanged
+        """
+        shared = get_or_create_address(dict(address_1="111 1st St. S", city="City"))
+
+        edited = replace_address(shared, dict(city="Town"))
+
+        shared.refresh_from_db()
+        self.assertEqual(shared.city, "City", "Shared address was modified")
+        self.assertEqual(edited.city, "Town", "Edit not applied")
+        self.assertEqual(edited.address_1, "111 1st St. S", "Unchanged field lost")
+        self.assertEqual(
+            replace_address(edited, dict(city="City")).id,
+            shared.id,
+            "Reverting the edit should reuse the original row",
+        )
+
+    def test_stored_address_can_not_be_edited_in_place(self):
+        """
+        Saving changed fields of a stored address raises, saving it unchanged does not
+        """
+        shared = get_or_create_address(dict(address_1="111 1st St. S", city="City"))
+
+        shared.save()
+        shared.city = "Town"
+        with self.assertRaises(ValueError):
+            shared.save()
+
+        shared.refresh_from_db()
+        self.assertEqual(shared.city, "City", "Shared address was modified")
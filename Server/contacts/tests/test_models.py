@@ -1,3 +1,4 @@
+from contacts.functions import get_or_create_address
 from contacts.models import Addresses, Contacts
 from django.test import TestCase
 from notes.tests.generic_functions import (
@@ -13,12 +14,14 @@ def default_address():
     """
     Default address to use
     """
-    return Addresses.objects.create(
-        address_1="111 1st. St. S",
-        address_2="Apt. 1",
-        city="City",
-        state="MN",
-        zipcode="55555-5555",
+    return get_or_create_address(
+        dict(
+            address_1="111 1st. St. S",
+            address_2="Apt. 1",
+            city="City",
+            state="MN",
+            zipcode="55555-5555",
+        )
     )
 
 
@@ -0,0 +1,163 @@
+from core.prefetch import PrefetchPlanMixin, get_nested_serializer
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+def parse_field_paths(value):
+    """
+    Returns the tree of the comma separated, dotted field paths, or None if not given.
+
+    'id,notes.note,notes.user' gives {"id": {}, "notes": {"note": {}, "user": {}}}
+    """
+    if value is None:
+        return None
+
+    tree = {}
+    for path in value.split(","):
+        path = path.strip()
+        if not path:
+            continue
+        node = tree
+        for name in path.split("."):
+            if not name:
+                raise serializers.ValidationError(
+                    {"fieldset-error": f"Invalid field path '{path}'"}
+                )
+            node = node.setdefault(name, {})
+    return tree
+
+
+def format_field_paths(tree, prefix=""):
+    """
+    Returns the sorted dotted paths of the tree, the reverse of parse_field_paths
+    """
+    paths = []
+    for name, subtree in sorted(tree.items()):
+        if subtree:
+            paths.extend(format_field_paths(subtree, prefix=f"{prefix}{name}."))
+        else:
+            paths.append(f"{prefix}{name}")
+    return paths
+
+
+def get_fieldset_key(fields, expand):
+    """
+    Returns a string identifying the fieldset, the same for equivalent query parameters
+    """
+    return ";".join(
+        "*" if tree is None else ",".join(format_field_paths(tree))
+        for tree in (fields, expand)
+    )
+
+
+def get_primary_key_field(field, model):
+    """
+    Returns a read only field rendering the primary keys of the objects the
+    nested serializer field renders, or None if the field is not a model relation
+    """
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        return None
+    if not model_field.is_relation:
+        return None
+
+    kwargs = {"read_only": True}
+    if field.source != field.field_name:
+        kwargs["source"] = field.source
+    if model_field.many_to_many or model_field.one_to_many:
+        kwargs["many"] = True
+    return serializers.PrimaryKeyRelatedField(**kwargs)
+
+
+def prune_serializer(serializer, fields=None, expand=None, path=""):
+    """
+    Removes the fields not listed in 'fields', and renders the nested objects not
+    listed in 'expand' as primary keys, recursively. The serializer is changed in place.
+
+    'fields' and 'expand' are trees from parse_field_paths. None keeps every field and
+    expands every nested object. A nested path in 'fields' also expands its object.
+    """
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    # Validate against every field, so expanding a field left out of 'fields' is not an error
+    for name in fields or {}:
+        if name not in serializer.fields:
+            raise serializers.ValidationError(
+                {"fieldset-error": f"Unknown field '{path}{name}'"}
+            )
+    for name in expand or {}:
+        if get_nested_serializer(serializer.fields.get(name)) is None:
+            raise serializers.ValidationError(
+                {"fieldset-error": f"Field '{path}{name}' can not be expanded"}
+            )
+
+    if fields:
+        for name in list(serializer.fields):
+            if name not in fields:
+                del serializer.fields[name]
+
+    for name, field in list(serializer.fields.items()):
+        nested_serializer = get_nested_serializer(field)
+        if nested_serializer is None:
+            continue
+
+        nested_fields = (fields or {}).get(name) or None
+        if expand is None:
+            nested_expand = None
+        elif (name in expand) or nested_fields:
+            nested_expand = expand.get(name, {})
+        else:
+            primary_key_field = get_primary_key_field(field, serializer.Meta.model)
+            if primary_key_field is not None:
+                serializer.fields[name] = primary_key_field
+                continue
+            nested_expand = {}
+
+        prune_serializer(
+            nested_serializer, nested_fields, nested_expand, path=f"{path}{name}."
+        )
+
+    return serializer
+
+
+class SparseFieldsetMixin(PrefetchPlanMixin):
+    """
+    Generic view mixin pruning the response serializer to the requested fieldset.
+
+    '?fields=id,notes.note' only renders the listed fields, dotted paths select
+    the fields of nested objects. '?expand=documents' only embeds the listed nested
+    objects, the others are rendered as primary keys, and an empty '?expand=' embeds none.
+    The prefetch plan is built from the pruned serializer, so left out relations are not loaded.
+    """
+
+    def get_fieldset(self):
+        """
+        Returns the (fields, expand) trees of the request, None when not given
+        """
+        query_params = self.request.query_params
+        return (
+            parse_field_paths(query_params.get("fields")),
+            parse_field_paths(query_params.get("expand")),
+        )
+
+    def has_fieldset(self):
+        return self.get_fieldset() != (None, None)
+
+    def get_response_serializer(self, *args, **kwargs):
+        serializer = super().get_response_serializer(*args, **kwargs)
+        if self.has_fieldset():
+            prune_serializer(serializer, *self.get_fieldset())
+        return serializer
+
+    def get_planned_serializer(self):
+        if self.has_fieldset():
+            return self.get_response_serializer()
+        return super().get_planned_serializer()
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        # Invalid fieldsets are rejected before the request changes anything
+        if self.has_fieldset():
+            self.get_response_serializer()
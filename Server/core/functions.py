@@ -0,0 +1,72 @@
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections, router, transaction
+from django.db.models import IntegerField, Subquery
+
+
+def bulk_create_with_pks(model, objs, batch_size=None):
+    """
+    Inserts the objects with 'bulk_create', making sure each object gets its primary key.
+
+    Needed so the new rows can be linked through ManyToMany relations right away.
+
+    - Backends returning the inserted rows (PostgreSQL) set the keys directly.
+    - SQLite does not return them. Inside the transaction the write lock is held,
+      and the AUTOINCREMENT keys are handed out in insertion order, so the newest
+      keys of the table belong to the inserted objects.
+    - Other backends fall back to saving the objects one at a time.
+    """
+    objs = list(objs)
+    if not objs:
+        return objs
+
+    using = router.db_for_write(model)
+    connection = connections[using]
+
+    if connection.features.can_return_rows_from_bulk_insert:
+        return model._base_manager.using(using).bulk_create(objs, batch_size=batch_size)
+
+    if connection.vendor == "sqlite":
+        with transaction.atomic(using=using):
+            model._base_manager.using(using).bulk_create(objs, batch_size=batch_size)
+            pks = list(
+                model._base_manager.using(using)
+                .order_by("-pk")
+                .values_list("pk", flat=True)[: len(objs)]
+            )
+        # 'bulk_create' only marks the objects as saved when it gets their keys back
+        for obj, pk in zip(objs, reversed(pks)):
+            obj.pk = pk
+            obj._state.adding = False
+            obj._state.db = using
+        return objs
+
+    with transaction.atomic(using=using):
+        for obj in objs:
+            obj.save(using=using)
+    return objs
+
+
+class SubqueryCount(Subquery):
+    """
+    Counts the rows of a correlated queryset, e.g. the buildings of each listed company.
+
+    Counting several relations with Count() joins them all at once, multiplying the
+    rows. Each subquery count reads only its own relation, through its index.
+    """
+
+    template = "(SELECT COUNT(*) FROM (%(subquery)s) _count)"
+    output_field = IntegerField()
+
+    def __init__(self, queryset, **kwargs):
+        super().__init__(queryset.order_by().values("pk"), **kwargs)
+
+
+def is_shared_cache(alias):
+    """
+    Returns True if the cache of the alias is shared by all worker processes.
+
+    The local memory backend keeps a separate cache in each process, so what one
+    worker stores or invalidates is never seen by the others.
+    """
+    return not isinstance(caches[alias], LocMemCache)
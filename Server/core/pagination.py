@@ -0,0 +1,141 @@
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from binascii import Error as BinasciiError
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+import json
+
+
+def get_keyset_filter(ordering, values):
+    """
+    Returns the filter of the rows sorted after 'values' on the 'ordering' fields.
+
+    For ("name", "id") it is: name >= v0 AND (name > v0 OR id > v1). The leading
+    range on the first field lets the database seek into the index, instead of
+    testing the OR against every row. Fields prefixed with '-' are descending.
+    """
+    field, value = ordering[0], values[0]
+    descending = field.startswith("-")
+    field = field.lstrip("-")
+    after = f"{field}__lt" if descending else f"{field}__gt"
+    after_or_equal = f"{field}__lte" if descending else f"{field}__gte"
+
+    if len(ordering) == 1:
+        return Q(**{after: value})
+
+    return Q(**{after_or_equal: value}) & (
+        Q(**{after: value}) | get_keyset_filter(ordering[1:], values[1:])
+    )
+
+
+class KeysetPagination(BasePagination):
+    """
+    Forward only cursor pagination seeking on the ordering fields.
+
+    The cursor holds the ordering values of the last row of the page, and the next
+    page is read with a range filter on them. With an index on the ordering fields
+    every page costs the same, however deep, and rows added or removed between
+    requests do not shift the pages. The last ordering field must be unique.
+    """
+
+    ordering = ("id",)
+    page_size = api_settings.PAGE_SIZE or 50
+    page_size_query_param = "page_size"
+    max_page_size = 100
+    cursor_query_param = "cursor"
+    invalid_cursor_message = "Invalid cursor"
+
+    def get_ordering(self, view):
+        return getattr(view, "keyset_ordering", self.ordering)
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        if page_size < 1:
+            return self.page_size
+        return min(page_size, self.max_page_size)
+
+    def encode_cursor(self, values):
+        return urlsafe_b64encode(
+            json.dumps(values, cls=DjangoJSONEncoder).encode()
+        ).decode()
+
+    def decode_cursor(self, cursor, ordering, model):
+        """
+        Returns the ordering values of the cursor, converted to their model field types.
+
+        Tampered cursors, including values of the wrong type, raise a 404.
+        """
+        try:
+            values = json.loads(urlsafe_b64decode(cursor.encode()))
+        except (BinasciiError, UnicodeError, ValueError):
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(values, list)) or (len(values) != len(ordering)):
+            raise NotFound(self.invalid_cursor_message)
+
+        converted = []
+        for field_name, value in zip(ordering, values):
+            field = model._meta.get_field(field_name.lstrip("-"))
+            try:
+                value = field.get_prep_value(field.to_python(value))
+            except (TypeError, ValueError, ValidationError):
+                raise NotFound(self.invalid_cursor_message)
+            # Range lookups can not compare with None
+            if value is None:
+                raise NotFound(self.invalid_cursor_message)
+            converted.append(value)
+        return converted
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        ordering = self.get_ordering(view)
+        page_size = self.get_page_size(request)
+
+        queryset = queryset.order_by(*ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+        if cursor:
+            queryset = queryset.filter(
+                get_keyset_filter(
+                    ordering, self.decode_cursor(cursor, ordering, queryset.model)
+                )
+            )
+
+        # One extra row tells if there is a next page, without counting
+        page = list(queryset[: page_size + 1])
+        self.has_next = len(page) > page_size
+        page = page[:page_size]
+
+        self.next_cursor = None
+        if self.has_next:
+            self.next_cursor = self.encode_cursor(
+                [getattr(page[-1], field.lstrip("-")) for field in ordering]
+            )
+        return page
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor,
+        )
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "next": {"type": "string", "nullable": True},
+                "results": schema,
+            },
+        }
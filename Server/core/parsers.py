@@ -0,0 +1,44 @@
+from core.renderers import ORJSONRenderer
+from django.conf import settings
+from io import BytesIO
+from rest_framework.parsers import BaseParser, JSONParser
+import codecs
+import orjson
+
+
+class NDJSONParser(BaseParser):
+    """
+    Parses newline delimited JSON uploads.
+
+    Returns a generator of the raw lines, so large uploads are read incrementally
+    instead of being loaded into memory at once. Each line is decoded, parsed and
+    validated by the view consuming it, so a bad line does not fail the whole upload.
+    """
+
+    media_type = "application/x-ndjson"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        return (line for line in stream)
+
+
+class ORJSONParser(JSONParser):
+    """
+    Parses JSON request bodies with orjson.
+
+    Bodies orjson rejects (invalid JSON, integers past 64 bits, other encodings) are
+    parsed again by the DRF parser, which gives the same data or the usual parse error.
+    """
+
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get("encoding", settings.DEFAULT_CHARSET)
+        if codecs.lookup(encoding).name != "utf-8":
+            return super().parse(stream, media_type, parser_context)
+
+        body = stream.read()
+        try:
+            return orjson.loads(body)
+        except orjson.JSONDecodeError:
+            return super().parse(BytesIO(body), media_type, parser_context)
@@ -0,0 +1,209 @@
+from collections import namedtuple
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from functools import lru_cache
+from rest_framework import serializers
+
+# Lookups for QuerySet.select_related and QuerySet.prefetch_related
+PrefetchPlan = namedtuple("PrefetchPlan", ("select_related", "prefetch_related"))
+
+
+def get_nested_serializer(field):
+    """
+    Returns the model serializer rendering the related objects of the field, or None
+    """
+    if isinstance(field, serializers.ListSerializer):
+        field = field.child
+    if isinstance(field, serializers.ModelSerializer):
+        return field
+    return None
+
+
+def needs_related_object(field):
+    """
+    True if the field renders more than the primary key of the related object
+    """
+    if isinstance(field, serializers.ManyRelatedField):
+        return True
+    if isinstance(field, serializers.RelatedField):
+        return not field.use_pk_only_optimization()
+    return isinstance(field, serializers.BaseSerializer)
+
+
+def iter_relation_fields(serializer, model):
+    """
+    Yields (serializer field, model field) for the fields rendering related objects.
+
+    Fields with a custom source ('*', dotted paths, methods) are skipped.
+    """
+    for field in serializer.fields.values():
+        if field.write_only or (field.source == "*") or ("." in field.source):
+            continue
+        if not needs_related_object(field):
+            continue
+        try:
+            model_field = model._meta.get_field(field.source)
+        except FieldDoesNotExist:
+            continue
+        if model_field.is_relation:
+            yield field, model_field
+
+
+def walk_serializer(serializer, model, prefix=""):
+    """
+    Collects the lookups needed by the fields of the serializer, recursively.
+
+    Single related objects are joined with select_related, and their own relations
+    are followed under the same prefix. Related object lists are prefetched, with a
+    queryset planned from the nested serializer, so each level costs one query.
+    """
+    select_related = []
+    prefetch_related = []
+
+    for field, model_field in iter_relation_fields(serializer, model):
+        lookup = f"{prefix}{field.source}"
+        nested_serializer = get_nested_serializer(field)
+
+        if model_field.many_to_many or model_field.one_to_many:
+            if nested_serializer is None:
+                prefetch_related.append(lookup)
+            else:
+                prefetch_related.append(
+                    Prefetch(
+                        lookup,
+                        queryset=apply_prefetch_plan(
+                            model_field.related_model._default_manager.all(),
+                            nested_serializer,
+                        ),
+                    )
+                )
+        else:
+            select_related.append(lookup)
+            if nested_serializer is not None:
+                nested_select, nested_prefetch = walk_serializer(
+                    nested_serializer,
+                    model_field.related_model,
+                    prefix=f"{lookup}__",
+                )
+                select_related.extend(nested_select)
+                prefetch_related.extend(nested_prefetch)
+
+    return select_related, prefetch_related
+
+
+@lru_cache(maxsize=None)
+def get_serializer_class_prefetch_plan(serializer_class):
+    """
+    Plans are static for a serializer class, so they are only built once
+    """
+    return get_prefetch_plan(serializer_class())
+
+
+def get_prefetch_plan(serializer):
+    """
+    Returns the select_related and prefetch_related lookups rendering the serializer
+    needs, so nested serializers do not load their related objects one by one.
+
+    Accepts a model serializer class or instance, including 'many=True' instances.
+    """
+    if isinstance(serializer, type):
+        return get_serializer_class_prefetch_plan(serializer)
+    if isinstance(serializer, serializers.ListSerializer):
+        serializer = serializer.child
+
+    select_related, prefetch_related = walk_serializer(
+        serializer, serializer.Meta.model
+    )
+    return PrefetchPlan(tuple(select_related), tuple(prefetch_related))
+
+
+# Lookups from the root model to each rendered model, and the rendered ManyToMany fields
+RenderedModels = namedtuple("RenderedModels", ("lookups", "many_to_many"))
+
+
+def walk_rendered_models(serializer, model, prefix, lookups, many_to_many):
+    """
+    Records the lookup to every related model the serializer renders, recursively
+    """
+    for field, model_field in iter_relation_fields(serializer, model):
+        lookup = f"{prefix}{field.source}"
+        lookups.setdefault(model_field.related_model, []).append(lookup)
+        if model_field.many_to_many:
+            many_to_many.add(model_field)
+
+        nested_serializer = get_nested_serializer(field)
+        if nested_serializer is not None:
+            walk_rendered_models(
+                nested_serializer,
+                model_field.related_model,
+                f"{lookup}__",
+                lookups,
+                many_to_many,
+            )
+
+
+@lru_cache(maxsize=None)
+def get_rendered_models(serializer_class):
+    """
+    Returns the models rendered by the serializer, with the lookups leading to them.
+
+    Used to find the root objects whose representation depends on a changed object.
+    """
+    serializer = serializer_class()
+    lookups = {serializer.Meta.model: ["pk"]}
+    many_to_many = set()
+    walk_rendered_models(serializer, serializer.Meta.model, "", lookups, many_to_many)
+    return RenderedModels(
+        {model: tuple(model_lookups) for model, model_lookups in lookups.items()},
+        frozenset(many_to_many),
+    )
+
+
+def apply_prefetch_plan(queryset, serializer):
+    """
+    Returns the queryset, loading everything the serializer renders
+    """
+    plan = get_prefetch_plan(serializer)
+    # select_related() without lookups would follow every non-null foreign key
+    if plan.select_related:
+        queryset = queryset.select_related(*plan.select_related)
+    if plan.prefetch_related:
+        queryset = queryset.prefetch_related(*plan.prefetch_related)
+    return queryset
+
+
+class PrefetchPlanMixin:
+    """
+    Generic view mixin loading the objects with the prefetch plan of the response serializer.
+
+    'response_serializer_class' is the serializer of the returned objects, when it
+    differs from the serializer validating the request.
+    """
+
+    response_serializer_class = None
+
+    def get_response_serializer_class(self):
+        return self.response_serializer_class or self.get_serializer_class()
+
+    def get_response_serializer(self, *args, **kwargs):
+        return self.get_response_serializer_class()(*args, **kwargs)
+
+    def get_planned_serializer(self):
+        """
+        Returns the serializer the prefetch plan is built for.
+
+        The class is used when the rendered fields are static, so its plan is cached.
+        """
+        return self.get_response_serializer_class()
+
+    def get_queryset(self):
+        return apply_prefetch_plan(
+            super().get_queryset(), self.get_planned_serializer()
+        )
+
+    def get_response_data(self, instance):
+        """
+        Serializes the instance with the response serializer, reloaded with its relations
+        """
+        instance = self.get_queryset().get(pk=instance.pk)
+        return self.get_response_serializer(instance).data
@@ -0,0 +1,103 @@
+from rest_framework.renderers import JSONRenderer
+import orjson
+import re
+
+# A number with a fraction or an exponent in the compact output, so the data holds a
+# float. Searched for one prefix at a time, a single pattern is several times slower
+FLOAT_TOKEN_PATTERNS = (
+    re.compile(rb'":-?\d+[.eE]'),
+    re.compile(rb",-?\d+[.eE]"),
+    re.compile(rb"\[-?\d+[.eE]"),
+)
+FLOAT_PATTERN = re.compile(rb"-?\d+[.eE]")
+
+
+def has_float_token(ret):
+    """
+    Returns True if the orjson output 'ret' holds a float.
+
+    Strings holding e.g. ",1.5" also match, which only costs a walk of the data. Times
+    such as "10:05.1" do not match, nor do nulls and integers.
+    """
+    return bool(FLOAT_PATTERN.match(ret)) or any(
+        pattern.search(ret) for pattern in FLOAT_TOKEN_PATTERNS
+    )
+
+
+def has_unsafe_float(data):
+    """
+    Returns True if 'data' holds a float orjson does not write like the json module.
+
+    Both write the same digits for zero and magnitudes from 1e-4 up to 1e16, where the
+    json module uses no exponent. NaN and Infinity fail the range check.
+    """
+    values = [data]
+    while values:
+        value = values.pop()
+        if type(value) is float:
+            if value and not (1e-4 <= abs(value) < 1e16):
+                return True
+        elif isinstance(value, dict):
+            values.extend(value)
+            values.extend(value.values())
+        elif isinstance(value, (list, tuple)):
+            values.extend(value)
+    return False
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Renders JSON with orjson, giving the same bytes as the DRF JSONRenderer.
+
+    Types orjson would encode differently (datetimes, dates, times, dataclasses) and
+    types it does not know (Decimal, lazy strings, querysets) go through the DRF
+    encoder, so e.g. datetimes keep their 'Z' suffix and file URLs stay plain strings.
+    Indented output, ASCII output, non compact output and anything orjson can not
+    encode fall back to the DRF renderer. So do floats orjson writes differently
+    (1e16 instead of 1e+16), and NaN / Infinity, which the DRF renderer refuses.
+
+    The data is only walked for such floats when the output holds a float. orjson
+    writes NaN and Infinity as null, so a payload whose only floats are NaN or
+    Infinity is rendered with null instead of raising.
+    """
+
+    options = (
+        orjson.OPT_NON_STR_KEYS
+        | orjson.OPT_PASSTHROUGH_DATETIME
+        | orjson.OPT_PASSTHROUGH_DATACLASS
+    )
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+
+        renderer_context = renderer_context or {}
+        if (
+            (not self.compact)
+            or self.ensure_ascii
+            or (self.get_indent(accepted_media_type, renderer_context) is not None)
+        ):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        encoder_default = self.encoder_class().default
+
+        def default(obj):
+            # Values built by the encoder are not walked below, check them here
+            value = encoder_default(obj)
+            if (type(value) is not str) and has_unsafe_float(value):
+                raise TypeError("Float rendered differently by orjson")
+            return value
+
+        try:
+            ret = orjson.dumps(data, default=default, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Only walk the data when it holds floats
+        if has_float_token(ret) and has_unsafe_float(data):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Same as the DRF renderer, keep the output a strict javascript subset
+        return ret.replace(b"\xe2\x80\xa8", b"\\u2028").replace(
+            b"\xe2\x80\xa9", b"\\u2029"
+        )
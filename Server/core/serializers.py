@@ -0,0 +1,142 @@
+from collections.abc import Mapping
+from django.core.exceptions import FieldDoesNotExist
+from functools import cached_property
+from inspect import isfunction
+from rest_framework import serializers
+from rest_framework.fields import SkipField
+from rest_framework.relations import PKOnlyObject
+
+# How a plain field reads its value, see get_attribute_kind
+ATTRIBUTE_FIELD = "field"
+ATTRIBUTE_PROPERTY = "property"
+ATTRIBUTE_METHOD = "method"
+
+# Serializer context key rendering the fast serializers with the DRF implementation,
+# to compare both in tests and benchmarks
+DRF_REPRESENTATION = "drf_representation"
+
+
+def get_attribute_kind(field, model):
+    """
+    Returns how the value of the field is read from a model instance, or None if the
+    field needs the generic DRF lookup (relations, nested serializers, '*' and dotted
+    sources, serializer methods).
+    """
+    if isinstance(
+        field,
+        (
+            serializers.BaseSerializer,
+            serializers.RelatedField,
+            serializers.ManyRelatedField,
+            serializers.SerializerMethodField,
+        ),
+    ):
+        return None
+    # '*' sources have no attributes, dotted sources have several
+    if len(field.source_attrs) != 1:
+        return None
+
+    try:
+        model_field = model._meta.get_field(field.source)
+    except FieldDoesNotExist:
+        model_attribute = getattr(model, field.source, None)
+        if isinstance(model_attribute, property):
+            return ATTRIBUTE_PROPERTY
+        if isfunction(model_attribute):
+            return ATTRIBUTE_METHOD
+        return None
+
+    if model_field.concrete and not model_field.is_relation:
+        return ATTRIBUTE_FIELD
+    return None
+
+
+def get_value_converter(field):
+    """
+    Returns the function giving the representation of a value that is not None,
+    or None when the value is its own representation.
+
+    The common DRF fields are replaced by what their to_representation does.
+    """
+    to_representation = type(field).to_representation
+    if to_representation is serializers.CharField.to_representation:
+        return str
+    if to_representation is serializers.IntegerField.to_representation:
+        return int
+    if to_representation is serializers.ReadOnlyField.to_representation:
+        return None
+    return field.to_representation
+
+
+class FastRepresentationMixin:
+    """
+    Read only fast path for model serializers rendered once per nested object.
+
+    The readable fields are compiled into (name, attribute, kind, converter, field)
+    accessors the first time an object is rendered, so plain values are read and
+    converted directly instead of going through the generic DRF field lookups.
+    Relations, nested serializers and anything unusual still go through DRF.
+    Model instances and '.values()' rows are both accepted.
+
+    The output is the same as the DRF one, as plain dicts instead of OrderedDicts.
+    Fields are compiled after the serializer is pruned, see core.fieldsets.
+    A true DRF_REPRESENTATION context value renders with DRF instead.
+    """
+
+    @cached_property
+    def fast_accessors(self):
+        if self.context.get(DRF_REPRESENTATION):
+            return None
+
+        model = self.Meta.model
+        accessors = []
+        for field in self._readable_fields:
+            kind = get_attribute_kind(field, model)
+            accessors.append(
+                (
+                    field.field_name,
+                    field.source if kind else None,
+                    kind,
+                    get_value_converter(field) if kind else None,
+                    field,
+                )
+            )
+        return accessors
+
+    def to_representation(self, instance):
+        accessors = self.fast_accessors
+        if accessors is None:
+            return super().to_representation(instance)
+
+        is_row = isinstance(instance, Mapping)
+        ret = {}
+
+        for field_name, attribute, kind, convert, field in accessors:
+            if attribute is not None:
+                try:
+                    value = (
+                        instance[attribute] if is_row else getattr(instance, attribute)
+                    )
+                except (KeyError, AttributeError):
+                    # Let DRF decide between a default, None, skipping or raising
+                    pass
+                else:
+                    if (kind == ATTRIBUTE_METHOD) and (not is_row):
+                        value = value()
+                    if (value is None) or (convert is None):
+                        ret[field_name] = value
+                    else:
+                        ret[field_name] = convert(value)
+                    continue
+
+            try:
+                value = field.get_attribute(instance)
+            except SkipField:
+                continue
+            check_for_none = value.pk if isinstance(value, PKOnlyObject) else value
+            if check_for_none is None:
+                ret[field_name] = None
+            else:
+                ret[field_name] = field.to_representation(value)
+
+        return ret
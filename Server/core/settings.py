@@ -48,6 +48,8 @@ INSTALLED_APPS = [
     "documents",
     "general_ledger",
     "notes",
+    "roles",
+    "summaries",
     # 3rd-party apps
     "rest_framework",
     "knox",
@@ -122,10 +124,67 @@ AUTH_PASSWORD_VALIDATORS = [
 
 # Knox authentication
 # https://james1345.github.io/django-rest-knox/installation/
+# JSON uses the DRF JSONRenderer and JSONParser. To render and parse it with orjson
+# instead, with the same output, opt in by adding:
+#     "DEFAULT_RENDERER_CLASSES": (
+#         "core.renderers.ORJSONRenderer",
+#         "rest_framework.renderers.BrowsableAPIRenderer",
+#     ),
+#     "DEFAULT_PARSER_CLASSES": (
+#         "core.parsers.ORJSONParser",
+#         "rest_framework.parsers.FormParser",
+#         "rest_framework.parsers.MultiPartParser",
+#     ),
+# Compare both on your data first with "python manage.py benchmark_company_json".
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": ("knox.auth.TokenAuthentication",),
+    "DEFAULT_AUTHENTICATION_CLASSES": (
+        "accounts.authentication.CachedTokenAuthentication",
+    ),
 }
 
+# Cache
+# https://docs.djangoproject.com/en/3.2/topics/cache/
+# The local-memory cache is per process, only fit for the single process development
+# server. Running several workers requires a shared backend (memcached, redis), so
+# token invalidations and company detail versions reach all of them. Without one the
+# tokens and company details are not cached, see the ALLOW_PER_PROCESS settings below.
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    }
+}
+
+# Validated knox tokens are cached in-process for TTL seconds, up to MAX_SIZE tokens.
+# Invalidations (logout, user changes) are shared through the CACHE_ALIAS cache, which
+# must be shared by all workers. A per process CACHE_ALIAS is refused unless
+# ALLOW_PER_PROCESS, set in development only.
+AUTH_TOKEN_CACHE = {
+    "CACHE_ALIAS": "default",
+    "TTL": 60,
+    "MAX_SIZE": 4096,
+    "ALLOW_PER_PROCESS": DEBUG,
+}
+
+# Serialized company details are cached for TIMEOUT seconds, per company version.
+# Versions are bumped on every change to the company or the objects it renders.
+# A per process CACHE_ALIAS is refused unless ALLOW_PER_PROCESS, set in development only.
+COMPANY_DETAIL_CACHE = {
+    "CACHE_ALIAS": "default",
+    "TIMEOUT": 3600,
+    "ALLOW_PER_PROCESS": DEBUG,
+}
+
+# Email
+# https://docs.djangoproject.com/en/3.2/topics/email/
+# Company invites are emailed with a link carrying their token. The console backend
+# prints the mails, configure an SMTP backend to deliver them.
+EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
+DEFAULT_FROM_EMAIL = "invites@localhost"
+
+# Link of the company invite emails, '{token}' is replaced by the invite token,
+# to be sent back as 'invite_token' on registration or login
+COMPANY_INVITE_URL = "http://localhost:3000/register?invite_token={token}"
+
 # Internationalization
 # https://docs.djangoproject.com/en/3.2/topics/i18n/
 
@@ -0,0 +1,210 @@
+from accounts.tests.test_models import CreateUser
+from companies.models import Companies
+from companies.serializers import CompanyFullAdminSerializer
+from companies.tests.test_models import create_company_obj
+from companies.tests.test_views import add_company_children
+from contacts.models import Contacts
+from contacts.serializers import AddressSerializer, ContactSerializer
+from core.fieldsets import parse_field_paths, prune_serializer
+from core.prefetch import apply_prefetch_plan
+from core.serializers import DRF_REPRESENTATION, FastRepresentationMixin
+from django.core.management import call_command
+from django.test import RequestFactory, TestCase
+from io import StringIO
+from rest_framework import serializers
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+
+
+class ContactSourcesSerializer(FastRepresentationMixin, serializers.ModelSerializer):
+    """
+    Renames contact fields, with a choice source, an email source and a default
+    """
+
+    phone = serializers.ChoiceField(
+        source="phone_1", choices=[(1234567890, "Office")], required=False
+    )
+    contact_email = serializers.EmailField(source="email", required=False)
+    nickname = serializers.CharField(source="name_middle", default="none")
+
+    class Meta:
+        model = Contacts
+        fields = (
+            "id",
+            "name_last",
+            "phone",
+            "contact_email",
+            "nickname",
+        )
+
+
+class FastSerializersTestCase(TestCase):
+    """
+    Tests that the fast read only serializers give the same output as DRF
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.u = CreateUser()
+        self.u.create_user()
+
+        self.company = create_company_obj()
+        self.company.allowed_admins.add(self.u.user)
+        add_company_children(company_obj=self.company, user=self.u.user, num_children=3)
+        # Leave a nullable relation empty
+        Companies.objects.filter(pk=self.company.pk).update(mailing_address=None)
+
+    def assertSameOutput(self, render):
+        """
+        Renders with the fast serializers and with DRF, the JSON must be byte identical.
+
+        'render' takes the serializer context to use.
+        """
+        fast = JSONRenderer().render(render({}))
+        standard = JSONRenderer().render(render({DRF_REPRESENTATION: True}))
+        self.assertEqual(fast, standard, "Fast serializer output differs from DRF")
+
+    def test_company_details_match_drf(self):
+        """
+        Full company details, with relative and absolute file URLs, and pruned
+        """
+        company_obj = apply_prefetch_plan(
+            Companies.objects.all(), CompanyFullAdminSerializer
+        ).get(pk=self.company.pk)
+        request = Request(RequestFactory().get("/companies/"))
+
+        def render_details(context):
+            return CompanyFullAdminSerializer(company_obj, context=context).data
+
+        def render_with_request(context):
+            return CompanyFullAdminSerializer(
+                company_obj, context={"request": request, **context}
+            ).data
+
+        def render_pruned(context):
+            serializer = CompanyFullAdminSerializer(company_obj, context=context)
+            prune_serializer(
+                serializer,
+                fields=parse_field_paths("id,contacts,notes,documents.notes"),
+                expand=parse_field_paths("contacts,documents"),
+            )
+            return serializer.data
+
+        self.assertSameOutput(render_details)
+        self.assertSameOutput(render_with_request)
+        self.assertSameOutput(render_pruned)
+
+    def test_values_rows_match_drf(self):
+        """
+        '.values()' rows render like model instances of the same serializer
+        """
+        contacts = self.company.contacts.all()
+
+        def render_rows(context):
+            return ContactSerializer(
+                contacts.values(*ContactSerializer.Meta.fields),
+                many=True,
+                context=context,
+            ).data
+
+        self.assertSameOutput(render_rows)
+        self.assertEqual(
+            render_rows({}),
+            ContactSerializer(contacts, many=True).data,
+            "Rows and instances render differently",
+        )
+
+    def test_rows_missing_fields_match_drf(self):
+        """
+        Fields missing from a row are skipped, or given their default, like DRF does
+        """
+        rows = list(self.company.contacts.values("id", "name_last"))
+
+        def render_contacts(context):
+            return ContactSerializer(rows, many=True, context=context).data
+
+        def render_sources(context):
+            return ContactSourcesSerializer(rows, many=True, context=context).data
+
+        self.assertSameOutput(render_contacts)
+        self.assertSameOutput(render_sources)
+        # Blank fields are skipped, the nullable email is None
+        self.assertEqual(
+            render_contacts({})[0],
+            {**rows[0], "email": None},
+            "Missing fields not skipped",
+        )
+        self.assertEqual(
+            render_sources({})[0]["nickname"], "none", "Default of a missing field lost"
+        )
+
+    def test_choice_and_email_sources_match_drf(self):
+        """
+        Choice and email fields read from another source convert like DRF
+        """
+        self.company.contacts.update(phone_1="1234567890", email="a@example.com")
+        self.company.business_address.state = "MN"
+        self.company.business_address.save(update_fields=["state"])
+        contacts = self.company.contacts.all()
+
+        def render_instances(context):
+            return ContactSourcesSerializer(contacts, many=True, context=context).data
+
+        def render_rows(context):
+            return ContactSourcesSerializer(
+                contacts.values("id", "name_last", "phone_1", "email", "name_middle"),
+                many=True,
+                context=context,
+            ).data
+
+        def render_address(context):
+            return AddressSerializer(
+                self.company.business_address, context=context
+            ).data
+
+        self.assertSameOutput(render_instances)
+        self.assertSameOutput(render_rows)
+        self.assertSameOutput(render_address)
+        self.assertEqual(
+            render_rows({})[0]["phone"], 1234567890, "Choice value not converted"
+        )
+        self.assertEqual(
+            render_instances({})[0]["contact_email"],
+            "a@example.com",
+            "Email source not read",
+        )
+
+    def test_drf_representation_is_per_serializer(self):
+        """
+        The DRF flag of one serializer context does not switch other serializers
+        """
+        contacts = self.company.contacts.all()
+        standard = ContactSerializer(
+            contacts, many=True, context={DRF_REPRESENTATION: True}
+        )
+        fast = ContactSerializer(contacts, many=True)
+
+        self.assertEqual(
+            type(standard.data[0]).__name__, "OrderedDict", "DRF output not used"
+        )
+        self.assertIs(type(fast.data[0]), dict, "Fast output not used")
+
+    def test_benchmark_serializers_command(self):
+        """
+        The benchmark checks every serializer against DRF without keeping its company
+        """
+        out = StringIO()
+        call_command("benchmark_serializers", children=3, repeat=1, stdout=out)
+
+        self.assertIn("NotesSerializer", out.getvalue(), "Notes timing missing")
+        self.assertFalse(
+            Companies.objects.filter(business_name="Benchmark Company").exists(),
+            "Benchmark company was kept",
+        )
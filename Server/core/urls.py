@@ -24,6 +24,7 @@ urlpatterns = [
     path("buildings/", include("buildings.urls")),
     path("companies/", include("companies.urls")),
     path("notes/", include("notes.urls")),
+    path("roles/", include("roles.urls")),
     path("admin/", admin.site.urls),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
 
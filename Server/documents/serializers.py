@@ -1,4 +1,5 @@
 from accounts.serializers import UserReturnStringSerializer
+from core.serializers import FastRepresentationMixin
 from documents.models import Documents, Images
 from notes.serializers import NoteCreateSerializer, NotesSerializer
 from rest_framework import serializers
@@ -21,7 +22,7 @@ class DocumentCreationSerializer(serializers.ModelSerializer):
         )
 
 
-class DocumentSerializer(serializers.ModelSerializer):
+class DocumentSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     """
     Serializes an existing document object.
     """
@@ -41,7 +42,7 @@ class DocumentSerializer(serializers.ModelSerializer):
         )
 
 
-class ImageSerializer(serializers.ModelSerializer):
+class ImageSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     """
     Serializes an existing image object.
     """
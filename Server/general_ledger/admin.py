@@ -1,6 +1,54 @@
 from django.contrib import admin
-from .models import GeneralLedgerCodes
+from django.core.exceptions import ValidationError
+from django.forms.models import BaseInlineFormSet
+from general_ledger.functions import get_missing_account_roles
+from notes.admin import TimeStampFullMixinAdmin
+from .models import (
+    ChartOfAccountsTemplate,
+    ChartOfAccountsTemplateCode,
+    GeneralLedgerCodes,
+)
 
 # Register your models here.
 
+
+class ChartOfAccountsTemplateCodeFormSet(BaseInlineFormSet):
+    """
+    Rejects templates missing an account role their companies or buildings require
+    """
+
+    def clean(self):
+        super().clean()
+        if any(self.errors):
+            return
+        missing_roles = get_missing_account_roles(
+            entity_type=self.instance.entity_type,
+            account_roles={
+                form.cleaned_data.get("account_role")
+                for form in self.forms
+                if form.cleaned_data and not form.cleaned_data.get("DELETE")
+            },
+        )
+        if missing_roles:
+            raise ValidationError(
+                f"The chart of accounts needs a {', '.join(missing_roles)} account"
+            )
+
+
+class ChartOfAccountsTemplateCodeInline(admin.TabularInline):
+    """
+    Edits the accounts of a chart of accounts template on the template page
+    """
+
+    model = ChartOfAccountsTemplateCode
+    formset = ChartOfAccountsTemplateCodeFormSet
+    extra = 0
+
+
+class ChartOfAccountsTemplateAdmin(TimeStampFullMixinAdmin):
+    list_display = ("name", "entity_type", "is_default")
+    inlines = (ChartOfAccountsTemplateCodeInline,)
+
+
 admin.site.register(GeneralLedgerCodes)
+admin.site.register(ChartOfAccountsTemplate, ChartOfAccountsTemplateAdmin)
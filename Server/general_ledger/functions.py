@@ -0,0 +1,99 @@
+from core.functions import bulk_create_with_pks
+from general_ledger.models import (
+    ChartOfAccountsTemplate,
+    ChartOfAccountsTemplateCode,
+    GeneralLedgerCodes,
+)
+from rest_framework import serializers
+
+
+def get_chart_template(entity_type=None, template_id=None):
+    """
+    Returns the requested chart of accounts template, with its codes loaded.
+
+    Without a 'template_id', the default template of the entity type is returned.
+    """
+    templates = ChartOfAccountsTemplate.objects.filter(
+        entity_type=entity_type
+    ).prefetch_related("codes")
+
+    if template_id is None:
+        return templates.get(is_default=True)
+    return templates.get(pk=template_id)
+
+
+def get_missing_account_roles(entity_type=None, account_roles=None):
+    """
+    Returns the labels of the account roles required for the entity type, not in 'account_roles'
+    """
+    return [
+        role.label
+        for role in ChartOfAccountsTemplateCode.REQUIRED_ROLES.get(entity_type, ())
+        if role not in account_roles
+    ]
+
+
+def validate_chart_template(template=None):
+    """
+    Raises a ValidationError, a 400 response in views, if the template lacks an account
+    its entities require. Checked before provisioning, so creation never fails half way.
+    """
+    missing_roles = get_missing_account_roles(
+        entity_type=template.entity_type,
+        account_roles={code.account_role for code in template.codes.all()},
+    )
+    if missing_roles:
+        raise serializers.ValidationError(
+            {
+                "chart-of-accounts-error": (
+                    f"Chart of accounts template '{template.name}' has no "
+                    f"{', '.join(missing_roles)} account"
+                )
+            }
+        )
+
+
+def fill_chart_name(text, name):
+    """
+    Replaces the '{name}' placeholder of a template text with the entity name
+    """
+    return text.replace("{name}", f"{name}")
+
+
+def provision_charts_of_accounts(template=None, names=None):
+    """
+    Creates the general ledger accounts of the template for each entity name.
+
+    All accounts of all entities are saved with a single insert. A template missing
+    a required account role is rejected first, see validate_chart_template.
+    Returns one dict per name, in the order given, holding the created accounts
+    under "accounts" and the accounts with a role under their role name
+    (e.g. "gl_code" or "accounts_payable_gl"), ready to be set on the entity.
+    """
+    validate_chart_template(template=template)
+    names = list(names)
+    codes = list(template.codes.all())
+
+    gl_code_objs = bulk_create_with_pks(
+        GeneralLedgerCodes,
+        [
+            GeneralLedgerCodes(
+                name=fill_chart_name(code.name, name),
+                code=code.code,
+                description=fill_chart_name(code.description, name),
+            )
+            for name in names
+            for code in codes
+        ],
+    )
+
+    charts = []
+    for i in range(len(names)):
+        accounts = gl_code_objs[i * len(codes) : (i + 1) * len(codes)]
+        chart = {"accounts": accounts}
+        for code, gl_code_obj in zip(codes, accounts):
+            if code.account_role:
+                chart[code.account_role] = gl_code_obj
+        charts.append(chart)
+
+    return charts
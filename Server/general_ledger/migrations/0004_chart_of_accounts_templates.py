@@ -0,0 +1,56 @@
+# Generated by Django 3.2.8 on 2026-10-18 19:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('general_ledger', '0003_auto_20211218_2011'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ChartOfAccountsTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('name', models.CharField(max_length=127, unique=True)),
+                ('description', models.CharField(blank=True, max_length=1023)),
+                ('entity_type', models.CharField(choices=[('company', 'Company'), ('building', 'Building')], max_length=15)),
+                ('is_default', models.BooleanField(default=False)),
+            ],
+            options={
+                'verbose_name': 'Chart of Accounts Template',
+                'verbose_name_plural': 'Chart of Accounts Templates',
+                'ordering': ('entity_type', 'name'),
+            },
+        ),
+        migrations.CreateModel(
+            name='ChartOfAccountsTemplateCode',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=127, verbose_name='General Ledger Name')),
+                ('code', models.CharField(blank=True, max_length=15, verbose_name='General Ledger Code')),
+                ('description', models.CharField(blank=True, max_length=1023)),
+                ('account_role', models.CharField(blank=True, choices=[('gl_code', 'General Ledger'), ('accounts_payable_gl', 'Accounts Payable'), ('accounts_receivable_gl', 'Accounts Receivable')], max_length=31)),
+                ('position', models.PositiveSmallIntegerField(default=0)),
+                ('template', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='codes', to='general_ledger.chartofaccountstemplate')),
+            ],
+            options={
+                'verbose_name': 'Chart of Accounts Template Code',
+                'verbose_name_plural': 'Chart of Accounts Template Codes',
+                'ordering': ('template', 'position', 'code'),
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='chartofaccountstemplate',
+            constraint=models.UniqueConstraint(condition=models.Q(('is_default', True)), fields=('entity_type',), name='general_ledger_one_default_chart_per_entity'),
+        ),
+        migrations.AddConstraint(
+            model_name='chartofaccountstemplatecode',
+            constraint=models.UniqueConstraint(condition=models.Q(('account_role', ''), _negated=True), fields=('template', 'account_role'), name='general_ledger_one_account_per_role'),
+        ),
+    ]
@@ -0,0 +1,92 @@
+from django.db import migrations
+
+# (name, code, description, account role)
+COMPANY_CHART = (
+    ("Cash", "1000", "Operating cash of {name}", ""),
+    (
+        "Accounts Receivable",
+        "",
+        "Accounts Receivable ledger for {name}",
+        "accounts_receivable_gl",
+    ),
+    (
+        "Accounts Payable",
+        "",
+        "Accounts Payable ledger for {name}",
+        "accounts_payable_gl",
+    ),
+    ("Security Deposits Held", "2100", "Tenant security deposits held by {name}", ""),
+    ("Owner Equity", "3000", "Owner equity of {name}", ""),
+    ("{name}", "", "{name} general ledger", "gl_code"),
+    ("Rental Income", "4000", "Rent collected by {name}", ""),
+    ("Late Fees", "4100", "Late fees collected by {name}", ""),
+    ("Repairs and Maintenance", "5000", "Repairs and maintenance paid by {name}", ""),
+    ("Utilities", "5100", "Utilities paid by {name}", ""),
+    ("Property Taxes", "5200", "Property taxes paid by {name}", ""),
+    ("Insurance", "5300", "Insurance premiums paid by {name}", ""),
+    ("Management Fees", "5400", "Property management fees paid by {name}", ""),
+    ("Mortgage Interest", "5500", "Mortgage interest paid by {name}", ""),
+)
+
+BUILDING_CHART = (
+    ("{name}", "", "{name} general ledger", "gl_code"),
+    ("Rental Income", "4000", "Rent collected at {name}", ""),
+    ("Repairs and Maintenance", "5000", "Repairs and maintenance of {name}", ""),
+    ("Utilities", "5100", "Utilities of {name}", ""),
+    ("Property Taxes", "5200", "Property taxes of {name}", ""),
+    ("Insurance", "5300", "Insurance premiums of {name}", ""),
+)
+
+
+def seed_default_templates(apps, schema_editor):
+    """
+    Creates the default company and building charts of accounts
+    """
+    ChartOfAccountsTemplate = apps.get_model("general_ledger", "ChartOfAccountsTemplate")
+    ChartOfAccountsTemplateCode = apps.get_model(
+        "general_ledger", "ChartOfAccountsTemplateCode"
+    )
+
+    for entity_type, name, chart in (
+        ("company", "Default Company Chart", COMPANY_CHART),
+        ("building", "Default Building Chart", BUILDING_CHART),
+    ):
+        template = ChartOfAccountsTemplate.objects.create(
+            name=name,
+            description=f"Chart of accounts provisioned for each new {entity_type}",
+            entity_type=entity_type,
+            is_default=True,
+        )
+        ChartOfAccountsTemplateCode.objects.bulk_create(
+            [
+                ChartOfAccountsTemplateCode(
+                    template=template,
+                    name=code_name,
+                    code=code,
+                    description=description,
+                    account_role=account_role,
+                    position=position,
+                )
+                for position, (code_name, code, description, account_role) in enumerate(
+                    chart
+                )
+            ]
+        )
+
+
+def remove_default_templates(apps, schema_editor):
+    ChartOfAccountsTemplate = apps.get_model("general_ledger", "ChartOfAccountsTemplate")
+    ChartOfAccountsTemplate.objects.filter(
+        name__in=("Default Company Chart", "Default Building Chart")
+    ).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('general_ledger', '0004_chart_of_accounts_templates'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_default_templates, remove_default_templates),
+    ]
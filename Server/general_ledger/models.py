@@ -28,3 +28,95 @@ class GeneralLedgerCodes(TimeStampMixin):
         if self.code:
             return f"{self.name} | {self.code}"
         return f"{self.name}"
+
+
+class ChartOfAccountsTemplate(TimeStampMixin):
+    """
+    Reusable list of general ledger accounts, provisioned for each new company or building.
+
+    The default template of each entity type is used when no template is requested.
+    """
+
+    class EntityList(models.TextChoices):
+        COMPANY = "company", "Company"
+        BUILDING = "building", "Building"
+
+    name = models.CharField(max_length=127, unique=True)
+    description = models.CharField(max_length=1023, blank=True)
+    entity_type = models.CharField(max_length=15, choices=EntityList.choices)
+    is_default = models.BooleanField(default=False)
+
+    class Meta:
+        verbose_name = "Chart of Accounts Template"
+        verbose_name_plural = "Chart of Accounts Templates"
+        ordering = (
+            "entity_type",
+            "name",
+        )
+        constraints = [
+            models.UniqueConstraint(
+                fields=["entity_type"],
+                condition=models.Q(is_default=True),
+                name="general_ledger_one_default_chart_per_entity",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.get_entity_type_display()} | {self.name}"
+
+
+class ChartOfAccountsTemplateCode(models.Model):
+    """
+    A general ledger account of a chart of accounts template.
+
+    Names and descriptions may hold a '{name}' placeholder, replaced by the name
+    of the company or building. The account role links the provisioned account
+    to the matching general ledger field of the company or building.
+    """
+
+    class AccountRoleList(models.TextChoices):
+        GENERAL = "gl_code", "General Ledger"
+        ACCOUNTS_PAYABLE = "accounts_payable_gl", "Accounts Payable"
+        ACCOUNTS_RECEIVABLE = "accounts_receivable_gl", "Accounts Receivable"
+
+    # Roles the chart of each entity type must hold, as they fill required entity fields
+    REQUIRED_ROLES = {
+        ChartOfAccountsTemplate.EntityList.COMPANY: (
+            AccountRoleList.GENERAL,
+            AccountRoleList.ACCOUNTS_PAYABLE,
+            AccountRoleList.ACCOUNTS_RECEIVABLE,
+        ),
+        ChartOfAccountsTemplate.EntityList.BUILDING: (AccountRoleList.GENERAL,),
+    }
+
+    template = models.ForeignKey(
+        ChartOfAccountsTemplate, related_name="codes", on_delete=models.CASCADE
+    )
+    name = models.CharField("General Ledger Name", max_length=127)
+    code = models.CharField("General Ledger Code", max_length=15, blank=True)
+    description = models.CharField(max_length=1023, blank=True)
+    account_role = models.CharField(
+        max_length=31, choices=AccountRoleList.choices, blank=True
+    )
+    position = models.PositiveSmallIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Chart of Accounts Template Code"
+        verbose_name_plural = "Chart of Accounts Template Codes"
+        ordering = (
+            "template",
+            "position",
+            "code",
+        )
+        constraints = [
+            models.UniqueConstraint(
+                fields=["template", "account_role"],
+                condition=~models.Q(account_role=""),
+                name="general_ledger_one_account_per_role",
+            ),
+        ]
+
+    def __str__(self):
+        if self.code:
+            return f"{self.name} | {self.code}"
+        return f"{self.name}"
@@ -0,0 +1,278 @@
+from accounts.tests.test_models import CreateUser
+from accounts.tests.test_views import CreateCustomerViews
+from buildings.functions import create_buildings
+from companies.functions import create_companies, populate_company_dict
+from companies.models import Companies
+from companies.tests.test_models import create_company_obj
+from companies.tests.test_views import company_data
+from contacts.functions import populate_address_dict
+from django.db import connection
+from django.forms.models import inlineformset_factory
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from general_ledger.admin import ChartOfAccountsTemplateCodeFormSet
+from general_ledger.functions import get_chart_template, provision_charts_of_accounts
+from general_ledger.models import (
+    ChartOfAccountsTemplate,
+    ChartOfAccountsTemplateCode,
+    GeneralLedgerCodes,
+)
+from rest_framework.exceptions import ValidationError
+
+
+def create_chart_template(entity_type=ChartOfAccountsTemplate.EntityList.COMPANY):
+    """
+    Creates a small chart of accounts template, with every company account role
+    """
+    template = ChartOfAccountsTemplate.objects.create(
+        name=f"Test {entity_type} chart", entity_type=entity_type
+    )
+    ChartOfAccountsTemplateCode.objects.bulk_create(
+        [
+            ChartOfAccountsTemplateCode(
+                template=template,
+                name=name,
+                code=code,
+                description=description,
+                account_role=account_role,
+                position=position,
+            )
+            for position, (name, code, description, account_role) in enumerate(
+                (
+                    (
+                        "Receivables",
+                        "1200",
+                        "Receivables of {name}",
+                        "accounts_receivable_gl",
+                    ),
+                    ("Payables", "2000", "Payables of {name}", "accounts_payable_gl"),
+                    ("{name}", "3000", "{name} ledger", "gl_code"),
+                    ("Rent", "4000", "Rent of {name}", ""),
+                )
+            )
+        ]
+    )
+    return template
+
+
+def get_insert_shape(sql):
+    """
+    Returns the (table and columns, number of rows) of an INSERT statement
+    """
+    columns, rows = sql.split(")", 1)
+    # SQLite inserts many rows as 'SELECT ... UNION ALL SELECT ...'
+    return columns, rows.count(" UNION ALL SELECT ") + rows.count("), (") + 1
+
+
+def count_bulk_writes(queries):
+    """
+    Returns the number of write statements, counting a bulk insert split into several
+    SQLite batches once. Only inserts following a full batch of the same insert are
+    folded, so inserting row by row is still counted row by row.
+    """
+    count = 0
+    previous_columns, previous_full = None, False
+    for query in queries:
+        sql = query["sql"]
+        if sql.startswith("SELECT"):
+            continue
+        columns, num_rows = None, 0
+        if sql.startswith("INSERT"):
+            columns, num_rows = get_insert_shape(sql)
+        if not (
+            previous_full and (columns is not None) and columns == previous_columns
+        ):
+            count += 1
+        previous_columns = columns
+        previous_full = (columns is not None) and (
+            num_rows
+            == connection.ops.bulk_batch_size([None] * (columns.count('", "') + 1), [])
+        )
+    return count
+
+
+class ChartOfAccountsTestCase(TestCase):
+    """
+    Tests the provisioning of the chart of accounts templates
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.u = CreateUser()
+        self.u.create_user()
+
+    def test_default_templates_are_seeded(self):
+        """
+        Each entity type has a default template, with its general ledger account role
+        """
+        for entity_type in ChartOfAccountsTemplate.EntityList:
+            template = get_chart_template(entity_type=entity_type)
+            self.assertIn(
+                ChartOfAccountsTemplateCode.AccountRoleList.GENERAL,
+                [code.account_role for code in template.codes.all()],
+                f"Default {entity_type} chart has no general ledger account",
+            )
+
+    def test_provisioning_is_a_single_insert(self):
+        """
+        The accounts of every entity are created with one insert, and named after the entity
+        """
+        template = get_chart_template(
+            entity_type=ChartOfAccountsTemplate.EntityList.COMPANY
+        )
+        num_codes = template.codes.count()
+
+        with CaptureQueriesContext(connection) as queries:
+            charts = provision_charts_of_accounts(
+                template=template, names=["First", "Second", "Third"]
+            )
+
+        self.assertEqual(
+            len([q for q in queries if q["sql"].startswith("INSERT")]),
+            1,
+            "Accounts were not created with one insert",
+        )
+        self.assertEqual(
+            GeneralLedgerCodes.objects.count(),
+            3 * num_codes,
+            "Wrong number of accounts",
+        )
+        self.assertEqual(len(charts[1]["accounts"]), num_codes, "Wrong chart size")
+        self.assertEqual(charts[1]["gl_code"].name, "Second", "Name not filled in")
+        self.assertEqual(
+            charts[2]["accounts_payable_gl"].description,
+            "Accounts Payable ledger for Third",
+            "Description not filled in",
+        )
+
+    def test_companies_and_buildings_get_their_chart(self):
+        """
+        Created entities hold every account of the template, and the role accounts
+        """
+        company_obj = create_companies(
+            companies=[populate_company_dict(dict(business_name="Test Company"))],
+            user=self.u.user,
+            chart_template=create_chart_template(),
+        )[0]
+
+        self.assertEqual(
+            sorted(company_obj.chart_of_accounts.values_list("code", flat=True)),
+            ["1200", "2000", "3000", "4000"],
+            "Company chart of accounts does not match the template",
+        )
+        self.assertEqual(company_obj.accounts_receivable_gl.code, "1200")
+        self.assertEqual(company_obj.accounts_payable_gl.code, "2000")
+        self.assertEqual(company_obj.gl_code.name, "Test Company")
+
+        building_obj = create_buildings(
+            company_id=create_company_obj().pk,
+            buildings=[dict(name="Test Building", address=populate_address_dict(None))],
+            user=self.u.user,
+        )[0]
+
+        self.assertEqual(
+            building_obj.chart_of_accounts.count(),
+            get_chart_template(
+                entity_type=ChartOfAccountsTemplate.EntityList.BUILDING
+            ).codes.count(),
+            "Building chart of accounts does not match the default template",
+        )
+        self.assertEqual(building_obj.gl_code.name, "Test Building")
+
+    def test_templates_missing_required_accounts_are_rejected(self):
+        """
+        A template without the accounts its entities need fails before anything is written
+        """
+        template = create_chart_template()
+        template.codes.filter(account_role="accounts_payable_gl").delete()
+        company_count = Companies.objects.count()
+
+        with self.assertRaises(ValidationError) as context:
+            create_companies(
+                companies=[populate_company_dict(dict(business_name="Test Company"))],
+                user=self.u.user,
+                chart_template=template,
+            )
+        self.assertIn(
+            "Accounts Payable",
+            str(context.exception.detail["chart-of-accounts-error"]),
+            "Missing account not named",
+        )
+        self.assertEqual(Companies.objects.count(), company_count, "Company created")
+
+        building_template = create_chart_template(
+            entity_type=ChartOfAccountsTemplate.EntityList.BUILDING
+        )
+        building_template.codes.filter(account_role="gl_code").delete()
+        with self.assertRaises(ValidationError):
+            create_buildings(
+                company_id=create_company_obj().pk,
+                buildings=[dict(name="Building", address=populate_address_dict(None))],
+                user=self.u.user,
+                chart_template=building_template,
+            )
+
+    def test_default_template_missing_accounts_gives_400(self):
+        """
+        Creating a company with a broken default template returns a clear 400
+        """
+        get_chart_template(
+            entity_type=ChartOfAccountsTemplate.EntityList.COMPANY
+        ).codes.filter(account_role="gl_code").delete()
+
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+        res = c.client.post(
+            path="/companies/create",
+            data=company_data(),
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+        self.assertIn("chart-of-accounts-error", res.data)
+        self.assertFalse(
+            Companies.objects.filter(allowed_admins=c.user).exists(),
+            "Company created with a broken template",
+        )
+
+    def test_admin_rejects_templates_missing_required_accounts(self):
+        """
+        The template admin does not save a chart without its required account roles
+        """
+        template = ChartOfAccountsTemplate.objects.create(
+            name="Admin chart", entity_type=ChartOfAccountsTemplate.EntityList.BUILDING
+        )
+        FormSet = inlineformset_factory(
+            ChartOfAccountsTemplate,
+            ChartOfAccountsTemplateCode,
+            formset=ChartOfAccountsTemplateCodeFormSet,
+            fields=("name", "code", "account_role", "position"),
+            extra=0,
+        )
+
+        def get_formset(account_role):
+            return FormSet(
+                data={
+                    "codes-TOTAL_FORMS": "1",
+                    "codes-INITIAL_FORMS": "0",
+                    "codes-0-name": "{name}",
+                    "codes-0-code": "1000",
+                    "codes-0-account_role": account_role,
+                    "codes-0-position": "0",
+                },
+                instance=template,
+                prefix="codes",
+            )
+
+        formset = get_formset("")
+        self.assertFalse(formset.is_valid(), "Chart without general ledger accepted")
+        self.assertIn("General Ledger", str(formset.non_form_errors()))
+        self.assertTrue(get_formset("gl_code").is_valid(), "Valid chart rejected")
@@ -1,5 +1,6 @@
 from accounts.serializers import UserReturnStringSerializer
 from change_log.models import ChangeLog
+from core.serializers import FastRepresentationMixin
 from django.db import transaction
 from notes.models import Notes
 from rest_framework import serializers, status
@@ -76,7 +77,7 @@ class NoteUpdateSerializer(serializers.ModelSerializer):
         return super(NoteUpdateSerializer, self).update(instance, validated_data)
 
 
-class NotesSerializer(serializers.ModelSerializer):
+class NotesSerializer(FastRepresentationMixin, serializers.ModelSerializer):
     """
     Serializes a newly created note object
     """
@@ -0,0 +1,6 @@
+from django.contrib import admin
+from roles.models import EffectiveRoles
+
+# Register your models here.
+
+admin.site.register(EffectiveRoles)
@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class RolesConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "roles"
+
+    def ready(self):
+        # Connects the signals that keep the effective roles index up to date
+        import roles.signals
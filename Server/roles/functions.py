@@ -0,0 +1,141 @@
+from buildings.models import Buildings
+from companies.models import Companies
+from django.db import transaction
+from django.db.models import Q
+from roles.models import EffectiveRoles
+
+
+def _collect_roles(admin_qs, viewer_qs, key_fields):
+    """
+    Merges the admin and viewer through table rows into a dict of roles.
+
+    Admin permissions take precedence when a user is listed in both relations.
+    """
+    roles = {}
+    for row in viewer_qs.values_list(*key_fields):
+        roles[row] = EffectiveRoles.RoleList.VIEWER
+    for row in admin_qs.values_list(*key_fields):
+        roles[row] = EffectiveRoles.RoleList.ADMIN
+    return roles
+
+
+def refresh_company_roles(company_ids=None, user_ids=None):
+    """
+    Rebuilds the company level rows of the effective roles index.
+
+    Either argument may be None to refresh every company or every user.
+    Reads the 'allowed_admins' / 'allowed_viewers' through tables in one query each.
+    """
+    admin_qs = Companies.allowed_admins.through.objects.all()
+    viewer_qs = Companies.allowed_viewers.through.objects.all()
+    stale_qs = EffectiveRoles.objects.filter(building__isnull=True)
+
+    if company_ids is not None:
+        admin_qs = admin_qs.filter(companies_id__in=company_ids)
+        viewer_qs = viewer_qs.filter(companies_id__in=company_ids)
+        stale_qs = stale_qs.filter(company_id__in=company_ids)
+    if user_ids is not None:
+        admin_qs = admin_qs.filter(user_id__in=user_ids)
+        viewer_qs = viewer_qs.filter(user_id__in=user_ids)
+        stale_qs = stale_qs.filter(user_id__in=user_ids)
+
+    roles = _collect_roles(admin_qs, viewer_qs, ("companies_id", "user_id"))
+
+    with transaction.atomic():
+        stale_qs.delete()
+        EffectiveRoles.objects.bulk_create(
+            [
+                EffectiveRoles(company_id=company_id, user_id=user_id, role=role)
+                for (company_id, user_id), role in roles.items()
+            ]
+        )
+
+
+def refresh_building_roles(building_ids=None, user_ids=None):
+    """
+    Rebuilds the building level rows of the effective roles index.
+
+    Either argument may be None to refresh every building or every user.
+    Reads the 'allowed_admins' / 'allowed_viewers' through tables in one query each.
+    """
+    admin_qs = Buildings.allowed_admins.through.objects.all()
+    viewer_qs = Buildings.allowed_viewers.through.objects.all()
+    stale_qs = EffectiveRoles.objects.filter(building__isnull=False)
+
+    if building_ids is not None:
+        admin_qs = admin_qs.filter(buildings_id__in=building_ids)
+        viewer_qs = viewer_qs.filter(buildings_id__in=building_ids)
+        stale_qs = stale_qs.filter(building_id__in=building_ids)
+    if user_ids is not None:
+        admin_qs = admin_qs.filter(user_id__in=user_ids)
+        viewer_qs = viewer_qs.filter(user_id__in=user_ids)
+        stale_qs = stale_qs.filter(user_id__in=user_ids)
+
+    roles = _collect_roles(
+        admin_qs, viewer_qs, ("buildings_id", "buildings__company_id", "user_id")
+    )
+
+    with transaction.atomic():
+        stale_qs.delete()
+        EffectiveRoles.objects.bulk_create(
+            [
+                EffectiveRoles(
+                    building_id=building_id,
+                    company_id=company_id,
+                    user_id=user_id,
+                    role=role,
+                )
+                for (building_id, company_id, user_id), role in roles.items()
+            ]
+        )
+
+
+def resolve_building_role(building_role=None, company_role=None):
+    """
+    Combines the building and company level roles into the effective building role.
+
+    A role set directly on the building always wins. Otherwise the company role is inherited.
+    """
+    if building_role:
+        return building_role
+    return company_role
+
+
+def get_company_role(user=None, company_id=None):
+    """
+    Returns the user's role for the company, or None. Single indexed lookup.
+    """
+    return (
+        EffectiveRoles.objects.filter(
+            user_id=user.pk, company_id=company_id, building__isnull=True
+        )
+        .values_list("role", flat=True)
+        .first()
+    )
+
+
+def get_company_roles(user_ids=None, company_id=None):
+    """
+    Returns a dict of user id to role for the users having a role in the company. Single indexed lookup.
+    """
+    return dict(
+        EffectiveRoles.objects.filter(
+            user_id__in=user_ids, company_id=company_id, building__isnull=True
+        ).values_list("user_id", "role")
+    )
+
+
+def get_building_role(user=None, building_obj=None):
+    """
+    Returns the user's effective role for the building, or None. Single indexed lookup.
+    """
+    roles = dict(
+        EffectiveRoles.objects.filter(
+            Q(building__isnull=True) | Q(building_id=building_obj.pk),
+            user_id=user.pk,
+            company_id=building_obj.company_id,
+        ).values_list("building_id", "role")
+    )
+    return resolve_building_role(
+        building_role=roles.get(building_obj.pk), company_role=roles.get(None)
+    )
@@ -0,0 +1,45 @@
+# Generated by Django 3.2.8 on 2026-10-18 19:09
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('companies', '0012_auto_20220102_1606'),
+        ('buildings', '0003_alter_buildings_name'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EffectiveRoles',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('role', models.CharField(choices=[('admin', 'Admin'), ('viewer', 'Viewer')], max_length=7)),
+                ('building', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='effective_roles_set', to='buildings.buildings')),
+                ('company', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_roles_set', to='companies.companies')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='effective_roles_set', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Effective Role',
+                'verbose_name_plural': 'Effective Roles',
+            },
+        ),
+        migrations.AddIndex(
+            model_name='effectiveroles',
+            index=models.Index(fields=['user', 'company', 'building'], name='roles_user_company_bldg_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='effectiveroles',
+            constraint=models.UniqueConstraint(condition=models.Q(('building__isnull', True)), fields=('user', 'company'), name='roles_effectiveroles_unique_company_role'),
+        ),
+        migrations.AddConstraint(
+            model_name='effectiveroles',
+            constraint=models.UniqueConstraint(condition=models.Q(('building__isnull', False)), fields=('user', 'building'), name='roles_effectiveroles_unique_building_role'),
+        ),
+    ]
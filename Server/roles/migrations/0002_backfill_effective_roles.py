@@ -0,0 +1,59 @@
+from django.db import migrations
+
+
+def backfill_effective_roles(apps, schema_editor):
+    """
+    Builds the effective roles index from the existing company and building permissions.
+    """
+    Buildings = apps.get_model("buildings", "Buildings")
+    Companies = apps.get_model("companies", "Companies")
+    EffectiveRoles = apps.get_model("roles", "EffectiveRoles")
+
+    company_roles = {}
+    for company_id, user_id in Companies.allowed_viewers.through.objects.values_list(
+        "companies_id", "user_id"
+    ):
+        company_roles[(company_id, user_id)] = "viewer"
+    for company_id, user_id in Companies.allowed_admins.through.objects.values_list(
+        "companies_id", "user_id"
+    ):
+        company_roles[(company_id, user_id)] = "admin"
+
+    building_roles = {}
+    for row in Buildings.allowed_viewers.through.objects.values_list(
+        "buildings_id", "buildings__company_id", "user_id"
+    ):
+        building_roles[row] = "viewer"
+    for row in Buildings.allowed_admins.through.objects.values_list(
+        "buildings_id", "buildings__company_id", "user_id"
+    ):
+        building_roles[row] = "admin"
+
+    EffectiveRoles.objects.all().delete()
+    EffectiveRoles.objects.bulk_create(
+        [
+            EffectiveRoles(company_id=company_id, user_id=user_id, role=role)
+            for (company_id, user_id), role in company_roles.items()
+        ]
+        + [
+            EffectiveRoles(
+                building_id=building_id,
+                company_id=company_id,
+                user_id=user_id,
+                role=role,
+            )
+            for (building_id, company_id, user_id), role in building_roles.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('roles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_effective_roles, migrations.RunPython.noop),
+    ]
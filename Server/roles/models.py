@@ -0,0 +1,65 @@
+from accounts.models import User
+from buildings.models import Buildings
+from companies.models import Companies
+from django.db import models
+
+# Create your models here.
+
+
+class EffectiveRoles(models.Model):
+    """
+    Materialized index of the roles a user holds within companies and buildings.
+
+    Rows with no building hold the user's role for the company itself. Rows with
+    a building hold the role granted directly on that building, which overrides
+    the company level role.
+
+    Maintained from the 'allowed_admins' / 'allowed_viewers' relations by the
+    signals in roles.signals. Never write to this table directly.
+    """
+
+    class RoleList(models.TextChoices):
+        ADMIN = "admin", "Admin"
+        VIEWER = "viewer", "Viewer"
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="effective_roles_set"
+    )
+    company = models.ForeignKey(
+        Companies, on_delete=models.CASCADE, related_name="effective_roles_set"
+    )
+    building = models.ForeignKey(
+        Buildings,
+        on_delete=models.CASCADE,
+        related_name="effective_roles_set",
+        blank=True,
+        null=True,
+    )
+    role = models.CharField(max_length=7, choices=RoleList.choices)
+
+    class Meta:
+        verbose_name = "Effective Role"
+        verbose_name_plural = "Effective Roles"
+        constraints = [
+            models.UniqueConstraint(
+                fields=("user", "company"),
+                condition=models.Q(building__isnull=True),
+                name="%(app_label)s_%(class)s_unique_company_role",
+            ),
+            models.UniqueConstraint(
+                fields=("user", "building"),
+                condition=models.Q(building__isnull=False),
+                name="%(app_label)s_%(class)s_unique_building_role",
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=("user", "company", "building"),
+                name="roles_user_company_bldg_idx",
+            ),
+        ]
+
+    def __str__(self):
+        if self.building_id:
+            return f"{self.user} | {self.company} | {self.building.name} - {self.get_role_display()}"
+        return f"{self.user} | {self.company} - {self.get_role_display()}"
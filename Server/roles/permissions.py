@@ -0,0 +1,81 @@
+from buildings.models import Buildings
+from rest_framework import exceptions, status
+from rest_framework.permissions import SAFE_METHODS, BasePermission
+from roles.resolvers import get_role_resolver
+
+
+def send_invalid_permission_response(requested_level=None, level_id=None):
+    """
+    Generic error response for invalid permission levels.
+
+    Used for invalid companies or users sending invites to companies they do not have admin_in status in
+    """
+    return {
+        "invite-error": f"Invalid invite permissions for requested {requested_level}",
+        "detail": f"Can not invite user to {requested_level} with ID {level_id}",
+    }
+
+
+class InvalidPermissionLevel(exceptions.APIException):
+    """
+    Raised when the user does not have the required role.
+
+    Missing and forbidden objects get the same response, so object IDs can not be probed.
+    """
+
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_code = "invalid-permission"
+
+    def __init__(self, requested_level=None, level_id=None):
+        super().__init__(
+            detail=send_invalid_permission_response(
+                requested_level=requested_level, level_id=level_id
+            )
+        )
+
+
+class IsCompanyAdmin(BasePermission):
+    """
+    Allows access to admins of the company referenced by the URL.
+    """
+
+    lookup_url_kwarg = "pk"
+
+    def has_permission(self, request, view):
+        company_id = view.kwargs[self.lookup_url_kwarg]
+        if not get_role_resolver(request).can_admin(company_id):
+            raise InvalidPermissionLevel(requested_level="company", level_id=company_id)
+        return True
+
+
+class IsBuildingEditor(BasePermission):
+    """
+    Allows access to the building referenced by the URL.
+
+    Read requests need any role in the building, other requests need edit rights.
+    """
+
+    lookup_url_kwarg = "pk"
+
+    def has_permission(self, request, view):
+        building_id = view.kwargs[self.lookup_url_kwarg]
+        try:
+            building_obj = Buildings.objects.only("id", "company_id").get(
+                pk=building_id
+            )
+        except Buildings.DoesNotExist:
+            building_obj = None
+
+        resolver = get_role_resolver(request)
+        if building_obj is None:
+            allowed = False
+        elif request.method in SAFE_METHODS:
+            allowed = resolver.can_view_building(building_obj)
+        else:
+            allowed = resolver.can_edit(building_obj)
+
+        if not allowed:
+            raise InvalidPermissionLevel(
+                requested_level="building", level_id=building_id
+            )
+        return True
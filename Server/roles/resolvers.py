@@ -0,0 +1,128 @@
+from roles.functions import resolve_building_role
+from roles.models import EffectiveRoles
+
+
+class RoleResolver:
+    """
+    Answers permission questions for a single user.
+
+    All of the user's company and building roles are loaded from the effective
+    roles index with one query, the first time a question is asked.
+    """
+
+    def __init__(self, user=None):
+        self.user = user
+        self._company_roles = None
+        self._building_roles = None
+        self._building_company_ids = None
+
+    def _load(self):
+        """
+        Loads every role of the user. Runs at most once per resolver.
+        """
+        if self._company_roles is not None:
+            return
+
+        self._company_roles = {}
+        self._building_roles = {}
+        self._building_company_ids = {}
+
+        if not (self.user and self.user.is_authenticated):
+            return
+
+        for company_id, building_id, role in EffectiveRoles.objects.filter(
+            user_id=self.user.pk
+        ).values_list("company_id", "building_id", "role"):
+            if building_id is None:
+                self._company_roles[company_id] = role
+            else:
+                self._building_roles[building_id] = role
+                self._building_company_ids[building_id] = company_id
+
+    @property
+    def company_roles(self):
+        """
+        Dict of company id to the user's company level role
+        """
+        self._load()
+        return self._company_roles
+
+    @property
+    def building_roles(self):
+        """
+        Dict of building id to the role set directly on the building
+        """
+        self._load()
+        return self._building_roles
+
+    def role_building_ids(self, company):
+        """
+        Returns the IDs of the buildings of the company holding a role set directly on
+        the building. Accepts a company object or ID.
+        """
+        self._load()
+        company_id = int(getattr(company, "pk", company))
+        return [
+            building_id
+            for building_id, building_company_id in self._building_company_ids.items()
+            if building_company_id == company_id
+        ]
+
+    def company_role(self, company):
+        """
+        Returns the user's role in the company. Accepts a company object or ID.
+        """
+        company_id = getattr(company, "pk", company)
+        return self.company_roles.get(int(company_id))
+
+    def building_role(self, building):
+        """
+        Returns the user's effective role in the building.
+
+        Accepts a building object, or anything with 'pk' and 'company_id' attributes.
+        """
+        return resolve_building_role(
+            building_role=self.building_roles.get(building.pk),
+            company_role=self.company_roles.get(building.company_id),
+        )
+
+    def can_admin(self, company):
+        """
+        True if the user is an admin of the company
+        """
+        return self.company_role(company) == EffectiveRoles.RoleList.ADMIN
+
+    def can_view(self, company):
+        """
+        True if the user has any role in the company
+        """
+        return self.company_role(company) is not None
+
+    def can_edit(self, building):
+        """
+        True if the user is allowed to edit the building
+        """
+        return self.building_role(building) == EffectiveRoles.RoleList.ADMIN
+
+    def can_view_building(self, building):
+        """
+        True if the user has any effective role in the building
+        """
+        return self.building_role(building) is not None
+
+
+def get_role_resolver(request):
+    """
+    Returns the role resolver of the request, creating it on first use.
+
+    The resolver is kept on the underlying Django request, so every permission
+    class and view handling the request shares the same single role query.
+    """
+    http_request = getattr(request, "_request", request)
+    resolver = getattr(http_request, "role_resolver", None)
+
+    if (resolver is None) or (resolver.user != request.user):
+        resolver = RoleResolver(user=request.user)
+        http_request.role_resolver = resolver
+
+    return resolver
@@ -0,0 +1,20 @@
+from rest_framework import serializers
+
+
+class RoleLookupSerializer(serializers.Serializer):
+    """
+    Validates the company and building IDs sent for a bulk role lookup
+    """
+
+    companies = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        default=list,
+        max_length=1000,
+    )
+    buildings = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        required=False,
+        default=list,
+        max_length=1000,
+    )
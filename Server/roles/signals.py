@@ -0,0 +1,55 @@
+from buildings.models import Buildings
+from companies.models import Companies
+from django.db.models.signals import m2m_changed, post_save
+from django.dispatch import receiver
+from roles.functions import refresh_building_roles, refresh_company_roles
+from roles.models import EffectiveRoles
+
+
+def _changed_ids(instance, reverse, pk_set, action):
+    """
+    Returns the (entity_ids, user_ids) touched by an m2m_changed signal.
+
+    On a forward change the instance is the company / building, on a reverse change it is the user.
+    A 'post_clear' has no pk_set, so the other side is refreshed completely (None).
+    """
+    other_ids = None if action == "post_clear" else pk_set
+    if reverse:
+        return other_ids, [instance.pk]
+    return [instance.pk], other_ids
+
+
+@receiver(m2m_changed, sender=Companies.allowed_admins.through)
+@receiver(m2m_changed, sender=Companies.allowed_viewers.through)
+def update_company_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps the company level effective roles in sync with the company permission relations.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    company_ids, user_ids = _changed_ids(instance, reverse, pk_set, action)
+    refresh_company_roles(company_ids=company_ids, user_ids=user_ids)
+
+
+@receiver(m2m_changed, sender=Buildings.allowed_admins.through)
+@receiver(m2m_changed, sender=Buildings.allowed_viewers.through)
+def update_building_roles(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps the building level effective roles in sync with the building permission relations.
+    """
+    if action not in ("post_add", "post_remove", "post_clear"):
+        return
+    building_ids, user_ids = _changed_ids(instance, reverse, pk_set, action)
+    refresh_building_roles(building_ids=building_ids, user_ids=user_ids)
+
+
+@receiver(post_save, sender=Buildings)
+def update_building_company(sender, instance, created, **kwargs):
+    """
+    Moves the building level roles along when a building is assigned to a different company.
+    """
+    if created:
+        return
+    EffectiveRoles.objects.filter(building_id=instance.pk).exclude(
+        company_id=instance.company_id
+    ).update(company_id=instance.company_id)
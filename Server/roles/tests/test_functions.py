@@ -0,0 +1,167 @@
+from accounts.tests.test_models import CreateUser
+from buildings.tests.test_models import create_building_obj
+from companies.tests.test_models import create_company_obj
+from django.test import TestCase
+from roles.functions import (
+    get_building_role,
+    get_company_role,
+    refresh_building_roles,
+    refresh_company_roles,
+)
+from roles.models import EffectiveRoles
+
+
+class EffectiveRolesIndexTestCase(TestCase):
+    """
+    Tests that the effective roles index follows the company and building permissions
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.u = CreateUser()
+        self.u.create_user()
+
+    def test_company_roles_follow_company_permissions(self):
+        """
+        Adding, switching and removing company permissions updates the index
+        """
+        company = create_company_obj()
+
+        self.assertIsNone(get_company_role(user=self.u.user, company_id=company.id))
+
+        company.allowed_viewers.add(self.u.user)
+        self.assertEqual(
+            get_company_role(user=self.u.user, company_id=company.id),
+            EffectiveRoles.RoleList.VIEWER,
+            "Viewer role not indexed",
+        )
+
+        company.allowed_admins.add(self.u.user)
+        self.assertEqual(
+            get_company_role(user=self.u.user, company_id=company.id),
+            EffectiveRoles.RoleList.ADMIN,
+            "Admin role should take precedence over viewer role",
+        )
+
+        company.allowed_admins.remove(self.u.user)
+        self.assertEqual(
+            get_company_role(user=self.u.user, company_id=company.id),
+            EffectiveRoles.RoleList.VIEWER,
+            "Removing the admin role did not fall back to viewer",
+        )
+
+        company.allowed_viewers.clear()
+        self.assertIsNone(get_company_role(user=self.u.user, company_id=company.id))
+        self.assertFalse(EffectiveRoles.objects.exists(), "Stale index rows remain")
+
+    def test_company_roles_follow_reverse_relation_changes(self):
+        """
+        Changes made from the user side of the relation are indexed too
+        """
+        company_1 = create_company_obj()
+        company_2 = create_company_obj()
+
+        self.u.user.company_user_set.add(company_1, company_2)
+        self.assertEqual(
+            EffectiveRoles.objects.filter(
+                user=self.u.user, role=EffectiveRoles.RoleList.ADMIN
+            ).count(),
+            2,
+            "Expected 2 admin roles",
+        )
+
+        self.u.user.company_user_set.clear()
+        self.assertFalse(
+            EffectiveRoles.objects.filter(user=self.u.user).exists(),
+            "Roles were not removed on clear",
+        )
+
+    def test_building_role_resolution(self):
+        """
+        Building roles override the company role, which is inherited otherwise
+        """
+        building = create_building_obj()
+        company = building.company
+
+        self.assertIsNone(get_building_role(user=self.u.user, building_obj=building))
+
+        company.allowed_admins.add(self.u.user)
+        self.assertEqual(
+            get_building_role(user=self.u.user, building_obj=building),
+            EffectiveRoles.RoleList.ADMIN,
+            "Company admin role not inherited",
+        )
+
+        building.allowed_viewers.add(self.u.user)
+        self.assertEqual(
+            get_building_role(user=self.u.user, building_obj=building),
+            EffectiveRoles.RoleList.VIEWER,
+            "Building viewer role should override the company admin role",
+        )
+
+        building.allowed_admins.add(self.u.user)
+        self.assertEqual(
+            get_building_role(user=self.u.user, building_obj=building),
+            EffectiveRoles.RoleList.ADMIN,
+            "Building admin role should take precedence",
+        )
+
+    def test_building_roles_follow_company_reassignment(self):
+        """
+        Moving a building to another company moves its indexed roles along
+        """
+        building = create_building_obj()
+        building.allowed_admins.add(self.u.user)
+
+        new_company = create_company_obj()
+        building.company = new_company
+        building.save()
+
+        self.assertTrue(
+            EffectiveRoles.objects.filter(
+                building=building, company=new_company
+            ).exists(),
+            "Building role not moved to the new company",
+        )
+
+    def test_role_lookup_is_a_single_query(self):
+        """
+        Permission decisions only need one query each
+        """
+        building = create_building_obj()
+        building.company.allowed_admins.add(self.u.user)
+
+        with self.assertNumQueries(1):
+            get_company_role(user=self.u.user, company_id=building.company_id)
+        with self.assertNumQueries(1):
+            get_building_role(user=self.u.user, building_obj=building)
+
+    def test_refresh_rebuilds_missing_rows(self):
+        """
+        Full refreshes restore the index from the permission relations
+        """
+        building = create_building_obj()
+        building.company.allowed_viewers.add(self.u.user)
+        building.allowed_admins.add(self.u.user)
+
+        EffectiveRoles.objects.all().delete()
+        refresh_company_roles()
+        refresh_building_roles()
+
+        self.assertEqual(
+            get_company_role(user=self.u.user, company_id=building.company_id),
+            EffectiveRoles.RoleList.VIEWER,
+            "Company role not rebuilt",
+        )
+        self.assertEqual(
+            get_building_role(user=self.u.user, building_obj=building),
+            EffectiveRoles.RoleList.ADMIN,
+            "Building role not rebuilt",
+        )
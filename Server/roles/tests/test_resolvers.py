@@ -0,0 +1,75 @@
+from accounts.tests.test_models import CreateUser
+from buildings.tests.test_models import create_building_obj
+from companies.tests.test_models import create_company_obj
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase
+from roles.resolvers import RoleResolver, get_role_resolver
+
+
+class RoleResolverTestCase(TestCase):
+    """
+    Tests the per-request role resolver
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.u = CreateUser()
+        self.u.create_user()
+
+    def test_all_roles_are_loaded_with_one_query(self):
+        """
+        Any number of permission questions only issue a single role query
+        """
+        admin_company = create_company_obj()
+        admin_company.allowed_admins.add(self.u.user)
+        viewer_company = create_company_obj()
+        viewer_company.allowed_viewers.add(self.u.user)
+        other_company = create_company_obj()
+
+        inherited_building = create_building_obj()
+        inherited_building.company.allowed_admins.add(self.u.user)
+        viewer_building = create_building_obj()
+        viewer_building.company.allowed_admins.add(self.u.user)
+        viewer_building.allowed_viewers.add(self.u.user)
+        admin_building = create_building_obj()
+        admin_building.company.allowed_viewers.add(self.u.user)
+        admin_building.allowed_admins.add(self.u.user)
+
+        resolver = RoleResolver(user=self.u.user)
+
+        with self.assertNumQueries(1):
+            self.assertTrue(resolver.can_admin(admin_company))
+            self.assertTrue(resolver.can_admin(str(admin_company.id)))
+            self.assertFalse(resolver.can_admin(viewer_company))
+            self.assertTrue(resolver.can_view(viewer_company))
+            self.assertFalse(resolver.can_view(other_company))
+            self.assertTrue(resolver.can_edit(inherited_building))
+            self.assertFalse(resolver.can_edit(viewer_building))
+            self.assertTrue(resolver.can_view_building(viewer_building))
+            self.assertTrue(resolver.can_edit(admin_building))
+
+    def test_anonymous_user_has_no_roles(self):
+        """
+        Unauthenticated users never trigger a role query
+        """
+        company = create_company_obj()
+        resolver = RoleResolver(user=AnonymousUser())
+
+        with self.assertNumQueries(0):
+            self.assertFalse(resolver.can_view(company))
+
+    def test_resolver_is_shared_by_the_request(self):
+        """
+        The same resolver is returned for the lifetime of the request
+        """
+        request = RequestFactory().get("/")
+        request.user = self.u.user
+
+        self.assertIs(get_role_resolver(request), get_role_resolver(request))
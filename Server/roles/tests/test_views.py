@@ -0,0 +1,136 @@
+from accounts.tests.test_views import CreateCustomerViews
+from buildings.tests.test_models import create_building_obj
+from companies.tests.test_models import create_company_obj
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+
+class RoleLookupViewsTestCase(TestCase):
+    """
+    Tests the bulk role lookup endpoint
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        pass
+
+    def test_role_lookup_for_companies_and_buildings(self):
+        """
+        Returns the effective role for every requested ID
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        admin_company = create_company_obj()
+        admin_company.allowed_admins.add(c.user)
+        other_company = create_company_obj()
+
+        inherited_building = create_building_obj()
+        inherited_building.company.allowed_admins.add(c.user)
+        viewer_building = create_building_obj()
+        viewer_building.company.allowed_admins.add(c.user)
+        viewer_building.allowed_viewers.add(c.user)
+        hidden_building = create_building_obj()
+
+        res = c.client.post(
+            path="/roles/lookup",
+            data=dict(
+                companies=[admin_company.id, other_company.id],
+                buildings=[
+                    inherited_building.id,
+                    viewer_building.id,
+                    hidden_building.id,
+                    1234,
+                ],
+            ),
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, 200, f"Expected 200. Got {res.status_code}")
+        self.assertEqual(
+            res.data["companies"],
+            {admin_company.id: "admin", other_company.id: None},
+            "Did not get the expected company roles",
+        )
+        self.assertEqual(
+            res.data["buildings"],
+            {
+                inherited_building.id: "admin",
+                viewer_building.id: "viewer",
+                hidden_building.id: None,
+                1234: None,
+            },
+            "Did not get the expected building roles",
+        )
+
+    def test_role_lookup_query_count_does_not_grow_with_ids(self):
+        """
+        The lookup is set based, so more IDs do not mean more queries
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        buildings = [create_building_obj() for _ in range(6)]
+        for building in buildings:
+            building.company.allowed_viewers.add(c.user)
+
+        query_counts = []
+        for num_ids in (1, 1, 6):
+            with CaptureQueriesContext(connection) as queries:
+                res = c.client.post(
+                    path="/roles/lookup",
+                    data=dict(
+                        companies=[b.company_id for b in buildings[:num_ids]],
+                        buildings=[b.id for b in buildings[:num_ids]],
+                    ),
+                    content_type="application/json",
+                )
+            self.assertEqual(res.status_code, 200, "Lookup failed")
+            query_counts.append(len(queries))
+
+        # The first request also authenticates the token, compare the later ones
+        self.assertEqual(
+            query_counts[1], query_counts[2], "Query count grew with the IDs"
+        )
+
+    def test_role_lookup_rejects_invalid_ids(self):
+        """
+        Non integer IDs return the serializer errors
+        """
+        c = CreateCustomerViews()
+        c.create_user()
+        c.login()
+
+        res = c.client.post(
+            path="/roles/lookup",
+            data=dict(buildings=["abc"]),
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, 400, f"Expected 400. Got {res.status_code}")
+        self.assertIn("role-errors", res.data, "Did not find expected key")
+        self.assertIn("buildings", res.data["role-errors"], "Did not find expected key")
+
+    def test_unauthenticated_user_can_not_lookup_roles(self):
+        """
+        Users without a token get the standard error
+        """
+        c = CreateCustomerViews()
+
+        res = c.client.post(
+            path="/roles/lookup",
+            data=dict(companies=[1]),
+            content_type="application/json",
+        )
+
+        self.assertEqual(res.status_code, 401, f"Expected 401. Got {res.status_code}")
@@ -0,0 +1,6 @@
+from django.urls import path
+from roles.views import RoleLookupViewSet
+
+urlpatterns = [
+    path("lookup", RoleLookupViewSet.as_view(), name="role-lookup"),
+]
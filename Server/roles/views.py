@@ -0,0 +1,84 @@
+from buildings.models import Buildings
+from django.db.models import Q
+from rest_framework import generics, status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from roles.functions import resolve_building_role
+from roles.models import EffectiveRoles
+from roles.serializers import RoleLookupSerializer
+
+# Create your views here.
+
+
+class RoleLookupViewSet(generics.GenericAPIView):
+    """
+    Returns the requesting user's effective role for many companies and buildings at once.
+
+    Roles are 'admin' (edits allowed), 'viewer' or None when the user has no access.
+    """
+
+    serializer_class = RoleLookupSerializer
+    permission_classes = (IsAuthenticated,)
+
+    def post(self, request):
+
+        # Serialize the data
+        serializer = self.get_serializer(data=request.data)
+
+        # Check if the information is correct
+        if not serializer.is_valid():
+            return Response(
+                {"role-errors": serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        company_ids = set(serializer.validated_data["companies"])
+        building_ids = set(serializer.validated_data["buildings"])
+
+        # Map each requested building to its company in a single query.
+        # Unknown buildings are left out and reported as having no role.
+        building_companies = (
+            dict(
+                Buildings.objects.filter(pk__in=building_ids)
+                .order_by()
+                .values_list("id", "company_id")
+            )
+            if building_ids
+            else {}
+        )
+
+        # Fetch every relevant company and building role of the user in a single query
+        role_filter = Q(
+            building__isnull=True,
+            company_id__in=company_ids.union(building_companies.values()),
+        ) | Q(building_id__in=building_companies.keys())
+
+        company_roles = {}
+        building_roles = {}
+        if company_ids or building_companies:
+            for company_id, building_id, role in EffectiveRoles.objects.filter(
+                role_filter, user_id=request.user.pk
+            ).values_list("company_id", "building_id", "role"):
+                if building_id is None:
+                    company_roles[company_id] = role
+                else:
+                    building_roles[building_id] = role
+
+        return Response(
+            data={
+                "companies": {
+                    company_id: company_roles.get(company_id)
+                    for company_id in sorted(company_ids)
+                },
+                "buildings": {
+                    building_id: resolve_building_role(
+                        building_role=building_roles.get(building_id),
+                        company_role=company_roles.get(
+                            building_companies.get(building_id)
+                        ),
+                    )
+                    for building_id in sorted(building_ids)
+                },
+            },
+            status=status.HTTP_200_OK,
+        )
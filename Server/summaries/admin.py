@@ -0,0 +1,7 @@
+from django.contrib import admin
+from summaries.models import BuildingSummaries, CompanySummaries
+
+# Register your models here.
+
+admin.site.register(BuildingSummaries)
+admin.site.register(CompanySummaries)
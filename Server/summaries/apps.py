@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class SummariesConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "summaries"
+
+    def ready(self):
+        # Connects the signals that keep the counter caches up to date
+        import summaries.signals
@@ -0,0 +1,140 @@
+from buildings.models import Buildings
+from companies.models import Companies
+from core.functions import SubqueryCount
+from django.db import transaction
+from django.db.models import F, OuterRef
+from functools import lru_cache
+from summaries.models import BuildingSummaries, CompanySummaries
+
+# Counter fields of each summary, with the model of the counted rows and its column
+# holding the ID of the summarized company or building
+SUMMARY_COUNTERS = {
+    CompanySummaries: {
+        "building_count": (Buildings, "company_id"),
+        "document_count": (Companies.documents.through, "companies_id"),
+        "note_count": (Companies.notes.through, "companies_id"),
+        "admin_count": (Companies.allowed_admins.through, "companies_id"),
+        "viewer_count": (Companies.allowed_viewers.through, "companies_id"),
+    },
+    BuildingSummaries: {
+        "document_count": (Buildings.documents.through, "buildings_id"),
+        "note_count": (Buildings.notes.through, "buildings_id"),
+        "admin_count": (Buildings.allowed_admins.through, "buildings_id"),
+        "viewer_count": (Buildings.allowed_viewers.through, "buildings_id"),
+    },
+}
+
+
+@lru_cache(maxsize=None)
+def get_m2m_counters():
+    """
+    Returns a dict of each counted ManyToMany through model to
+    (summary model, counter, summarized object column, related object column, related model)
+    """
+    m2m_counters = {}
+    for summary_model, counters in SUMMARY_COUNTERS.items():
+        for counter, (model, owner_column) in counters.items():
+            if not model._meta.auto_created:
+                continue
+            # The through model has one foreign key to each side of the relation
+            related_field = next(
+                field
+                for field in model._meta.get_fields()
+                if field.many_to_one and (field.attname != owner_column)
+            )
+            m2m_counters[model] = (
+                summary_model,
+                counter,
+                owner_column,
+                related_field.attname,
+                related_field.related_model,
+            )
+    return m2m_counters
+
+
+def get_counter_subquery(summary_model, counter):
+    """
+    Returns the count of the counter's rows, for the summary or summarized object in OuterRef("pk")
+    """
+    model, owner_column = SUMMARY_COUNTERS[summary_model][counter]
+    return SubqueryCount(model.objects.filter(**{owner_column: OuterRef("pk")}))
+
+
+def increment_counter(summary_model, owner_ids, counter, amount=1):
+    """
+    Adds 'amount' to the counter of the summaries of 'owner_ids', with one UPDATE.
+
+    Counters that would go below zero have drifted, they are left for the reconcile command.
+    """
+    if (not owner_ids) or (not amount):
+        return
+    queryset = summary_model.objects.filter(pk__in=owner_ids)
+    if amount < 0:
+        queryset = queryset.filter(**{f"{counter}__gte": -amount})
+    queryset.update(**{counter: F(counter) + amount})
+
+
+def recount_summaries(summary_model, owner_ids=None, counters=None):
+    """
+    Recomputes the counters of the summaries of 'owner_ids', every summary if None.
+
+    A single UPDATE counts the rows in the database, so concurrent changes are not lost.
+    """
+    counters = counters or SUMMARY_COUNTERS[summary_model]
+    queryset = summary_model.objects.all()
+    if owner_ids is not None:
+        if not owner_ids:
+            return
+        queryset = queryset.filter(pk__in=owner_ids)
+    queryset.update(
+        **{
+            counter: get_counter_subquery(summary_model, counter)
+            for counter in counters
+        }
+    )
+
+
+def reconcile_summaries(summary_model, chunk_size=500):
+    """
+    Creates the missing summaries and fixes the drifted counters, chunk by chunk.
+
+    The expected counters of a chunk are read with one query, and only the summaries
+    that differ are written. Returns the number of summaries created or fixed.
+    """
+    counters = list(SUMMARY_COUNTERS[summary_model])
+    owner_model = summary_model._meta.pk.related_model
+    owner_ids = list(owner_model.objects.order_by("pk").values_list("pk", flat=True))
+
+    fixed = 0
+    for start in range(0, len(owner_ids), chunk_size):
+        chunk = owner_ids[start : start + chunk_size]
+        expected = (
+            owner_model.objects.filter(pk__in=chunk)
+            .order_by()
+            .annotate(
+                **{
+                    counter: get_counter_subquery(summary_model, counter)
+                    for counter in counters
+                }
+            )
+            .values_list("pk", *counters)
+        )
+        summary_objs = summary_model.objects.in_bulk(chunk)
+
+        missing = []
+        drifted_ids = []
+        for owner_id, *counts in expected:
+            summary_obj = summary_objs.get(owner_id)
+            if summary_obj is None:
+                missing.append(
+                    summary_model(pk=owner_id, **dict(zip(counters, counts)))
+                )
+            elif [getattr(summary_obj, counter) for counter in counters] != counts:
+                drifted_ids.append(owner_id)
+
+        with transaction.atomic():
+            summary_model.objects.bulk_create(missing, ignore_conflicts=True)
+            recount_summaries(summary_model, drifted_ids)
+        fixed += len(missing) + len(drifted_ids)
+
+    return fixed
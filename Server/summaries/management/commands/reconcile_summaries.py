@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+from summaries.functions import reconcile_summaries
+from summaries.models import BuildingSummaries, CompanySummaries
+
+
+class Command(BaseCommand):
+    """
+    Recomputes the company and building counter caches, fixing any drift.
+
+    Meant to be scheduled, e.g. nightly from cron: 'python manage.py reconcile_summaries'
+    """
+
+    help = "Recomputes the company and building summaries and fixes any drift"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=500,
+            help="Number of companies or buildings recounted per query",
+        )
+
+    def handle(self, *args, **options):
+        for summary_model in (CompanySummaries, BuildingSummaries):
+            fixed = reconcile_summaries(summary_model, chunk_size=options["chunk_size"])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"Fixed {fixed} {summary_model._meta.verbose_name_plural.lower()}"
+                )
+            )
@@ -0,0 +1,64 @@
+# Generated by Django 3.2.8 on 2026-10-18 20:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("buildings", "0005_buildings_company_name_id_idx"),
+        ("companies", "0017_consolidate_container_companies"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="BuildingSummaries",
+            fields=[
+                (
+                    "building",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="buildings.buildings",
+                    ),
+                ),
+                ("document_count", models.PositiveIntegerField(default=0)),
+                ("note_count", models.PositiveIntegerField(default=0)),
+                ("admin_count", models.PositiveIntegerField(default=0)),
+                ("viewer_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Building Summary",
+                "verbose_name_plural": "Building Summaries",
+            },
+        ),
+        migrations.CreateModel(
+            name="CompanySummaries",
+            fields=[
+                (
+                    "company",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="summary",
+                        serialize=False,
+                        to="companies.companies",
+                    ),
+                ),
+                ("building_count", models.PositiveIntegerField(default=0)),
+                ("document_count", models.PositiveIntegerField(default=0)),
+                ("note_count", models.PositiveIntegerField(default=0)),
+                ("admin_count", models.PositiveIntegerField(default=0)),
+                ("viewer_count", models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                "verbose_name": "Company Summary",
+                "verbose_name_plural": "Company Summaries",
+            },
+        ),
+    ]
@@ -0,0 +1,73 @@
+from collections import Counter
+from django.db import migrations
+
+
+def count_by(model, column):
+    """
+    Returns a Counter of the rows of the model, by the value of the column.
+    """
+    return Counter(model.objects.values_list(column, flat=True))
+
+
+def backfill_summaries(apps, schema_editor):
+    """
+    Builds the company and building summaries from the existing rows.
+    """
+    Buildings = apps.get_model("buildings", "Buildings")
+    Companies = apps.get_model("companies", "Companies")
+    BuildingSummaries = apps.get_model("summaries", "BuildingSummaries")
+    CompanySummaries = apps.get_model("summaries", "CompanySummaries")
+
+    company_counts = {
+        "building_count": count_by(Buildings, "company_id"),
+        "document_count": count_by(Companies.documents.through, "companies_id"),
+        "note_count": count_by(Companies.notes.through, "companies_id"),
+        "admin_count": count_by(Companies.allowed_admins.through, "companies_id"),
+        "viewer_count": count_by(Companies.allowed_viewers.through, "companies_id"),
+    }
+    building_counts = {
+        "document_count": count_by(Buildings.documents.through, "buildings_id"),
+        "note_count": count_by(Buildings.notes.through, "buildings_id"),
+        "admin_count": count_by(Buildings.allowed_admins.through, "buildings_id"),
+        "viewer_count": count_by(Buildings.allowed_viewers.through, "buildings_id"),
+    }
+
+    CompanySummaries.objects.all().delete()
+    CompanySummaries.objects.bulk_create(
+        [
+            CompanySummaries(
+                company_id=company_id,
+                **{
+                    field: counts[company_id]
+                    for field, counts in company_counts.items()
+                },
+            )
+            for company_id in Companies.objects.values_list("pk", flat=True)
+        ],
+        batch_size=1000,
+    )
+    BuildingSummaries.objects.all().delete()
+    BuildingSummaries.objects.bulk_create(
+        [
+            BuildingSummaries(
+                building_id=building_id,
+                **{
+                    field: counts[building_id]
+                    for field, counts in building_counts.items()
+                },
+            )
+            for building_id in Buildings.objects.values_list("pk", flat=True)
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("summaries", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_summaries, migrations.RunPython.noop),
+    ]
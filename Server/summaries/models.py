@@ -0,0 +1,54 @@
+from buildings.models import Buildings
+from companies.models import Companies
+from django.db import models
+
+# Create your models here.
+
+
+class CompanySummaries(models.Model):
+    """
+    Counter cache of the company aggregates shown on dashboards.
+
+    Counts are adjusted as the relations change by the signals in summaries.signals.
+    Bulk writers skipping the signals update them explicitly. The
+    'reconcile_summaries' command recomputes every count and fixes any drift.
+    """
+
+    company = models.OneToOneField(
+        Companies, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    building_count = models.PositiveIntegerField(default=0)
+    document_count = models.PositiveIntegerField(default=0)
+    note_count = models.PositiveIntegerField(default=0)
+    admin_count = models.PositiveIntegerField(default=0)
+    viewer_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Company Summary"
+        verbose_name_plural = "Company Summaries"
+
+    def __str__(self):
+        return f"{self.company} - {self.building_count} buildings"
+
+
+class BuildingSummaries(models.Model):
+    """
+    Counter cache of the building aggregates shown on dashboards.
+
+    Maintained the same way as the company summaries.
+    """
+
+    building = models.OneToOneField(
+        Buildings, on_delete=models.CASCADE, primary_key=True, related_name="summary"
+    )
+    document_count = models.PositiveIntegerField(default=0)
+    note_count = models.PositiveIntegerField(default=0)
+    admin_count = models.PositiveIntegerField(default=0)
+    viewer_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Building Summary"
+        verbose_name_plural = "Building Summaries"
+
+    def __str__(self):
+        return f"{self.building} - {self.document_count} documents"
@@ -0,0 +1,157 @@
+from accounts.models import User
+from buildings.models import Buildings
+from companies.models import Companies
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+from documents.models import Documents
+from notes.models import Notes
+from summaries.functions import (
+    get_m2m_counters,
+    increment_counter,
+    recount_summaries,
+)
+from summaries.models import BuildingSummaries, CompanySummaries
+
+
+@receiver(post_save, sender=Companies)
+def create_company_summary(sender, instance, created, **kwargs):
+    """
+    Starts the counters of a new company at zero.
+    """
+    if created:
+        CompanySummaries.objects.bulk_create(
+            [CompanySummaries(company_id=instance.pk)], ignore_conflicts=True
+        )
+
+
+@receiver(pre_save, sender=Buildings)
+def remember_building_company(sender, instance, update_fields=None, **kwargs):
+    """
+    Keeps the stored company of an existing building, to move its count on post_save.
+
+    Saves limited to other fields can not move the building, they skip the query.
+    """
+    if instance._state.adding:
+        return
+    if (update_fields is not None) and update_fields.isdisjoint(
+        ("company", "company_id")
+    ):
+        instance._summary_company_id = instance.company_id
+        return
+    instance._summary_company_id = (
+        Buildings.objects.filter(pk=instance.pk)
+        .values_list("company_id", flat=True)
+        .first()
+    )
+
+
+@receiver(post_save, sender=Buildings)
+def update_building_summaries(sender, instance, created, **kwargs):
+    """
+    Starts the counters of a new building, and keeps the building count of its company.
+    """
+    if created:
+        BuildingSummaries.objects.bulk_create(
+            [BuildingSummaries(building_id=instance.pk)], ignore_conflicts=True
+        )
+        increment_counter(CompanySummaries, [instance.company_id], "building_count")
+        return
+
+    old_company_id = getattr(instance, "_summary_company_id", instance.company_id)
+    if old_company_id != instance.company_id:
+        increment_counter(CompanySummaries, [old_company_id], "building_count", -1)
+        increment_counter(CompanySummaries, [instance.company_id], "building_count")
+
+
+@receiver(post_delete, sender=Buildings)
+def remove_building_count(sender, instance, **kwargs):
+    increment_counter(CompanySummaries, [instance.company_id], "building_count", -1)
+
+
+@receiver(m2m_changed, sender=Companies.documents.through)
+@receiver(m2m_changed, sender=Companies.notes.through)
+@receiver(m2m_changed, sender=Companies.allowed_admins.through)
+@receiver(m2m_changed, sender=Companies.allowed_viewers.through)
+@receiver(m2m_changed, sender=Buildings.documents.through)
+@receiver(m2m_changed, sender=Buildings.notes.through)
+@receiver(m2m_changed, sender=Buildings.allowed_admins.through)
+@receiver(m2m_changed, sender=Buildings.allowed_viewers.through)
+def update_relation_counts(sender, instance, action, reverse, pk_set, **kwargs):
+    """
+    Keeps the counters of the summarized relations.
+
+    On a forward change the instance is the company / building, on a reverse change it is
+    the related document, note or user. Adds only hold the new links, so they increment
+    the counters. Removes may list links that did not exist, so the owners are recounted.
+    """
+    summary_model, counter, owner_column, related_column, _ = get_m2m_counters()[sender]
+
+    if action == "post_add":
+        if reverse:
+            increment_counter(summary_model, pk_set, counter)
+        else:
+            increment_counter(summary_model, [instance.pk], counter, len(pk_set))
+
+    elif action == "post_remove":
+        owner_ids = pk_set if reverse else [instance.pk]
+        recount_summaries(summary_model, owner_ids, [counter])
+
+    elif (action == "pre_clear") and reverse:
+        # A reverse clear has no pk_set, the owners are only known before the links go
+        instance._summary_clear_ids = list(
+            sender.objects.filter(**{related_column: instance.pk}).values_list(
+                owner_column, flat=True
+            )
+        )
+
+    elif action == "post_clear":
+        owner_ids = (
+            getattr(instance, "_summary_clear_ids", []) if reverse else [instance.pk]
+        )
+        recount_summaries(summary_model, owner_ids, [counter])
+
+
+@receiver(pre_delete, sender=Documents)
+@receiver(pre_delete, sender=Notes)
+@receiver(pre_delete, sender=User)
+def remember_related_owners(sender, instance, **kwargs):
+    """
+    Keeps the companies and buildings linked to a deleted document, note or user.
+
+    The links are removed by the cascade without any m2m_changed signal.
+    Having delete receivers, these models are never fast deleted: a queryset delete
+    loads its rows and runs one query per link table and one recount per row.
+    """
+    instance._summary_owners = [
+        (
+            summary_model,
+            counter,
+            list(
+                through.objects.filter(**{related_column: instance.pk}).values_list(
+                    owner_column, flat=True
+                )
+            ),
+        )
+        for through, (
+            summary_model,
+            counter,
+            owner_column,
+            related_column,
+            related_model,
+        ) in get_m2m_counters().items()
+        if related_model is sender
+    ]
+
+
+@receiver(post_delete, sender=Documents)
+@receiver(post_delete, sender=Notes)
+@receiver(post_delete, sender=User)
+def recount_related_owners(sender, instance, **kwargs):
+    for summary_model, counter, owner_ids in getattr(instance, "_summary_owners", []):
+        recount_summaries(summary_model, owner_ids, [counter])
@@ -0,0 +1,204 @@
+from accounts.tests.test_models import CreateUser
+from buildings.functions import create_buildings
+from buildings.models import Buildings
+from buildings.tests.test_models import create_building_obj
+from buildings.tests.test_views import building_no_company_data
+from companies.functions import create_companies
+from companies.tests.test_models import create_company_obj
+from companies.tests.test_views import company_data
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from documents.models import Documents
+from io import StringIO
+from notes.tests.test_models import create_note
+from summaries.functions import reconcile_summaries
+from summaries.models import BuildingSummaries, CompanySummaries
+
+
+def get_company_counts(company_obj):
+    """
+    Returns the counts the company summary should hold, counted from the relations
+    """
+    return dict(
+        building_count=Buildings.objects.filter(company=company_obj).count(),
+        document_count=company_obj.documents.count(),
+        note_count=company_obj.notes.count(),
+        admin_count=company_obj.allowed_admins.count(),
+        viewer_count=company_obj.allowed_viewers.count(),
+    )
+
+
+def get_building_counts(building_obj):
+    """
+    Returns the counts the building summary should hold, counted from the relations
+    """
+    return dict(
+        document_count=building_obj.documents.count(),
+        note_count=building_obj.notes.count(),
+        admin_count=building_obj.allowed_admins.count(),
+        viewer_count=building_obj.allowed_viewers.count(),
+    )
+
+
+def get_summary_counts(summary_obj):
+    summary_obj.refresh_from_db()
+    return {
+        field.name: getattr(summary_obj, field.name)
+        for field in summary_obj._meta.fields
+        if not field.primary_key
+    }
+
+
+class SummariesTestCase(TestCase):
+    """
+    Tests that the company and building summaries follow the relations they count
+    """
+
+    @classmethod
+    def setUpTestData(cls) -> None:
+        return super().setUpTestData()
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        return super().tearDownClass()
+
+    def setUp(self):
+        self.u = CreateUser()
+        self.u.create_user()
+
+    def assertCompanyCounts(self, company_obj, msg=None):
+        self.assertEqual(
+            get_summary_counts(company_obj.summary),
+            get_company_counts(company_obj),
+            msg,
+        )
+
+    def assertBuildingCounts(self, building_obj, msg=None):
+        self.assertEqual(
+            get_summary_counts(building_obj.summary),
+            get_building_counts(building_obj),
+            msg,
+        )
+
+    def test_relation_changes_update_the_counts(self):
+        """
+        Forward and reverse adds, removes and clears keep the counts
+        """
+        company_obj = create_company_obj(num_allowed_admins=2, num_notes=3)
+        self.assertCompanyCounts(company_obj, "Counts of the new company are wrong")
+        self.assertEqual(company_obj.summary.note_count, 3)
+
+        note_obj = company_obj.notes.first()
+        company_obj.notes.remove(note_obj, create_note(user=self.u.user))
+        self.assertCompanyCounts(company_obj, "Removing notes broke the count")
+        company_obj.notes.add(note_obj, note_obj)
+        self.assertCompanyCounts(company_obj, "Adding a note twice broke the count")
+
+        # Reverse changes, from the user side
+        self.u.user.company_viewers_set.add(company_obj)
+        self.assertCompanyCounts(company_obj, "Reverse add broke the count")
+        self.u.user.company_viewers_set.clear()
+        self.assertCompanyCounts(company_obj, "Reverse clear broke the count")
+
+        company_obj.allowed_admins.clear()
+        self.assertCompanyCounts(company_obj, "Clear broke the count")
+        self.assertEqual(company_obj.summary.admin_count, 0)
+
+    def test_deleting_related_objects_updates_the_counts(self):
+        """
+        Deleted notes, documents and users are removed from the counts
+        """
+        building_obj = create_building_obj(num_allowed_viewers=2)
+        company_obj = building_obj.company
+        document_obj = Documents.objects.create(
+            name="Test", document="documents/test.pdf", uploaded_by=self.u.user
+        )
+        company_obj.documents.add(document_obj)
+        building_obj.documents.add(document_obj)
+        note_obj = create_note(user=self.u.user)
+        company_obj.notes.add(note_obj)
+        building_obj.notes.add(note_obj)
+        company_obj.allowed_viewers.add(self.u.user)
+        building_obj.allowed_viewers.add(self.u.user)
+
+        document_obj.delete()
+        note_obj.delete()
+        building_obj.allowed_viewers.first().delete()
+
+        self.assertCompanyCounts(company_obj)
+        self.assertBuildingCounts(building_obj)
+        self.assertEqual(building_obj.summary.viewer_count, 2)
+
+    def test_building_changes_update_the_company_count(self):
+        """
+        Creating, moving and deleting buildings keeps the building counts of the companies
+        """
+        building_obj = create_building_obj()
+        old_company_obj = building_obj.company
+        new_company_obj = create_company_obj()
+        self.assertEqual(old_company_obj.summary.building_count, 1)
+
+        building_obj.company = new_company_obj
+        building_obj.save()
+        self.assertCompanyCounts(old_company_obj, "Moved building still counted")
+        self.assertCompanyCounts(new_company_obj, "Moved building not counted")
+
+        # Saves of other fields can not move the building, they do not read its company
+        building_obj.name = "Renamed"
+        with CaptureQueriesContext(connection) as queries:
+            building_obj.save(update_fields=["name"])
+        self.assertFalse(
+            [query for query in queries if query["sql"].startswith("SELECT")],
+            "Stored company read on a save of other fields",
+        )
+        self.assertCompanyCounts(new_company_obj, "Renamed building not counted")
+        building_obj.company = old_company_obj
+        building_obj.save(update_fields=["company"])
+        self.assertCompanyCounts(old_company_obj, "Building moved back not counted")
+        self.assertCompanyCounts(new_company_obj, "Building moved back still counted")
+
+        building_obj.delete()
+        self.assertCompanyCounts(old_company_obj, "Deleted building still counted")
+
+    def test_bulk_writers_write_the_counts(self):
+        """
+        Companies and buildings created in bulk, without signals, get the right counts
+        """
+        company_obj = create_companies(
+            companies=[company_data(num_notes=2)], user=self.u.user
+        )[0]
+        building_objs = create_buildings(
+            company_id=company_obj.pk,
+            buildings=[building_no_company_data(num_notes=3) for _ in range(2)],
+            user=self.u.user,
+        )
+
+        self.assertCompanyCounts(company_obj)
+        self.assertEqual(company_obj.summary.building_count, 2)
+        for building_obj in building_objs:
+            self.assertBuildingCounts(building_obj)
+
+    def test_reconcile_fixes_drift(self):
+        """
+        The reconcile command recreates missing summaries and fixes drifted counts
+        """
+        building_obj = create_building_obj(num_allowed_admins=1, num_notes=2)
+        company_obj = create_company_obj(num_allowed_viewers=2)
+        untouched_obj = create_company_obj()
+
+        CompanySummaries.objects.filter(pk=company_obj.pk).update(
+            viewer_count=7, note_count=1
+        )
+        BuildingSummaries.objects.filter(pk=building_obj.pk).delete()
+
+        out = StringIO()
+        call_command("reconcile_summaries", chunk_size=1, stdout=out)
+        self.assertIn("Fixed 1 company summaries", out.getvalue())
+        self.assertIn("Fixed 1 building summaries", out.getvalue())
+
+        self.assertCompanyCounts(company_obj)
+        self.assertCompanyCounts(untouched_obj)
+        self.assertBuildingCounts(Buildings.objects.get(pk=building_obj.pk))
+        self.assertEqual(reconcile_summaries(CompanySummaries), 0, "Drift remains")